@@ -0,0 +1,222 @@
+# coding: utf-8
+'''
+Content-addressed cache of notebook execution results, stored on disk.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from threading import Lock
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from path_helpers import path
+
+logger = logging.getLogger(__name__)
+
+#: Version of cache key scheme (changing it invalidates existing entries).
+KEY_VERSION = 1
+
+
+def default_cache_dir():
+    '''
+    Returns
+    -------
+    path_helpers.path
+        Directory of execution cache, in the Jupyter data directory.
+    '''
+    from jupyter_core.paths import jupyter_data_dir
+
+    return path(jupyter_data_dir()).joinpath('jupyter_helpers',
+                                             'execution-cache')
+
+
+def _bytes(text):
+    return text if isinstance(text, bytes) else text.encode('utf8')
+
+
+def _file_digest(filepath, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as input_:
+        for chunk in iter(lambda: input_.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExecutionCache(object):
+    '''
+    Cache of outputs of executed notebooks, keyed by a hash of the source of
+    the code cells (which includes parameters injected from templates), the
+    kernel spec, execution options and the contents of declared input files.
+
+    Each entry is stored in a separate JSON file.  Least recently used entries
+    are removed when the total size of the entries exceeds ``max_bytes``.
+
+    Parameters
+    ----------
+    root : str, optional
+        Cache directory (default: :func:`default_cache_dir`).
+    max_bytes : int, optional
+        Maximum total size of cached entries.
+
+    Example
+    -------
+
+        >>> session = Session(execution_cache=True)
+        >>> session.start(notebook_dir='notebooks')
+        >>> session.execute('analysis.ipynb', inputs=['data.csv'])
+        >>> session.execute('analysis.ipynb', inputs=['data.csv'])  # Hit.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, root=None, max_bytes=256 << 20):
+        self.root = path(root or default_cache_dir())
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+
+    def key(self, notebook, kernelspec=None, inputs=(), **options):
+        '''
+        Parameters
+        ----------
+        notebook : nbformat.NotebookNode
+            Notebook to execute.
+        kernelspec : dict, optional
+            Kernel spec to execute notebook with (e.g., ``spec`` of kernel spec
+            model of notebook server, including ``argv`` and ``env``).
+        inputs : list, optional
+            Paths of input files read by notebook.
+        **options : dict
+            Execution options affecting outputs (e.g., ``allow_errors``).
+
+        Returns
+        -------
+        str
+            Cache key.
+
+        Raises
+        ------
+        IOError
+            If an input file does not exist.
+        '''
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'version': KEY_VERSION,
+                                  'kernelspec': kernelspec,
+                                  'options': options}, sort_keys=True)
+                      .encode('utf8'))
+        for cell in notebook.cells:
+            if cell.cell_type == 'code':
+                digest.update(b'\0cell\0' + _bytes(cell.source))
+        for input_path in sorted(path(p).abspath() for p in inputs):
+            digest.update(b'\0input\0' + _bytes(input_path) + b'\0' +
+                          _bytes(_file_digest(input_path)))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return self.root.joinpath(key[:2], '%s.json' % key)
+
+    def get(self, key):
+        '''
+        Returns
+        -------
+        dict or None
+            Cached entry (see :meth:`put`), or ``None`` if not cached.
+        '''
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as input_:
+                entry = json.loads(input_.read().decode('utf8'))
+            # Mark entry as most recently used.
+            os.utime(entry_path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        '''
+        Store entry, then evict least recently used entries if the cache is
+        full.
+
+        Parameters
+        ----------
+        key : str
+            Cache key (see :meth:`key`).
+        entry : dict
+            JSON-serializable entry.
+        '''
+        entry_path = self._entry_path(key)
+        entry_path.parent.makedirs_p()
+        # Write to temporary file first, so concurrent readers never see
+        # partial entries.
+        handle, temp_path = tempfile.mkstemp(dir=entry_path.parent,
+                                             suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(json.dumps(entry).encode('utf8'))
+            os.rename(temp_path, entry_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        '''
+        Returns
+        -------
+        list
+            Path, size and last access time of each cached entry, least
+            recently used first.
+        '''
+        entries = []
+        if self.root.isdir():
+            for entry_path in self.root.walkfiles('*.json'):
+                try:
+                    stat = entry_path.stat()
+                except OSError:
+                    continue
+                entries.append((entry_path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    @property
+    def size(self):
+        return sum(size for entry_path, size, mtime in self.entries())
+
+    def evict(self):
+        '''
+        Remove least recently used entries until the total size of entries
+        is at most :attr:`max_bytes`.
+
+        Returns
+        -------
+        int
+            Number of entries removed.
+        '''
+        with self._lock:
+            entries = self.entries()
+            size = sum(entry[1] for entry in entries)
+            removed = 0
+            for entry_path, entry_size, mtime in entries:
+                if size <= self.max_bytes:
+                    break
+                try:
+                    entry_path.remove()
+                except OSError:
+                    continue
+                size -= entry_size
+                removed += 1
+            if removed:
+                logger.debug('Evicted %d execution cache entries.', removed)
+            return removed
+
+    def clear(self):
+        '''
+        Remove all cached entries.
+        '''
+        with self._lock:
+            for entry_path, size, mtime in self.entries():
+                try:
+                    entry_path.remove()
+                except OSError:
+                    pass
@@ -0,0 +1,189 @@
+# coding: utf-8
+'''
+Per-cell execution profiles of notebooks executed headlessly (see
+:meth:`jupyter_helpers.notebook.Session.execute`), and comparison of profiles
+of two runs.
+
+The profile of each code cell is stored in the cell metadata of the executed
+notebook, e.g.::
+
+    "metadata": {"jupyter_helpers": {"profile": {"duration_s": 1.2,
+                                                 "cpu_s": 1.1,
+                                                 "peak_rss_bytes": 104857600}}}
+
+where ``duration_s`` is the wall time from the execute request until all
+outputs were received, ``cpu_s`` the CPU time (user and system) of the kernel
+process spent executing the cell, and ``peak_rss_bytes`` the peak resident
+set size of the kernel process after executing the cell.  CPU time and peak
+RSS are only measured in Python kernels.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import namedtuple
+
+#: Cell metadata key of profile (within ``jupyter_helpers`` metadata).
+METADATA_KEY = 'profile'
+
+#: Expressions evaluated in Python kernels after executing each cell.
+USER_EXPRESSIONS = {'cpu_s': 'sum(__import__("os").times()[:2])',
+                    'peak_rss_bytes':
+                    '__import__("resource").getrusage(__import__("resource")'
+                    '.RUSAGE_SELF).ru_maxrss * (1 if __import__("sys")'
+                    '.platform == "darwin" else 1024)'}
+
+#: Profile of a code cell.
+CellProfile = namedtuple('CellProfile', 'cell source duration_s cpu_s '
+                         'peak_rss_bytes')
+
+#: Comparison of profiles of a code cell in two runs.
+CellComparison = namedtuple('CellComparison', 'cell source before after '
+                            'regressions')
+
+
+def parse_user_expressions(user_expressions):
+    '''
+    Parameters
+    ----------
+    user_expressions : dict
+        Evaluated :data:`USER_EXPRESSIONS` (see ``execute_reply`` message).
+
+    Returns
+    -------
+    dict
+        Value of each expression (``None`` if evaluation failed, e.g., in
+        kernels of other languages).
+    '''
+    values = {}
+    for name in USER_EXPRESSIONS:
+        result = user_expressions.get(name, {})
+        try:
+            values[name] = float(result['data']['text/plain'])
+        except (KeyError, TypeError, ValueError):
+            values[name] = None
+    return values
+
+
+def _cell_profile(i, cell):
+    profile = cell.get('metadata', {}).get('jupyter_helpers', {})\
+        .get(METADATA_KEY, {})
+    source = cell.get('source', '')
+    if isinstance(source, list):
+        source = ''.join(source)
+    return CellProfile(i, source, profile.get('duration_s'),
+                       profile.get('cpu_s'), profile.get('peak_rss_bytes'))
+
+
+def read(notebook):
+    '''
+    Parameters
+    ----------
+    notebook : str or nbformat.NotebookNode
+        Executed notebook (or path to it).
+
+    Returns
+    -------
+    list
+        :data:`CellProfile` of each code cell (with ``None`` values if the
+        cell was not profiled).
+    '''
+    if not isinstance(notebook, dict):
+        import nbformat
+
+        notebook = nbformat.read(notebook, as_version=4)
+    return [_cell_profile(i, cell) for i, cell in enumerate(notebook['cells'])
+            if cell['cell_type'] == 'code']
+
+
+def compare(before, after, threshold=.25, min_duration_s=.1,
+            min_rss_bytes=16 << 20):
+    '''
+    Compare profiles of two runs of a notebook.
+
+    Code cells are matched by position (among code cells).
+
+    Parameters
+    ----------
+    before, after : str, nbformat.NotebookNode or list
+        Executed notebooks (or paths to them), or lists of
+        :data:`CellProfile` (see :func:`read`).
+    threshold : float, optional
+        Relative increase of wall time, CPU time or peak RSS considered a
+        regression.
+    min_duration_s : float, optional
+        Minimum absolute increase of wall or CPU time considered a
+        regression.
+    min_rss_bytes : int, optional
+        Minimum absolute increase of peak RSS considered a regression.
+
+    Returns
+    -------
+    list
+        :data:`CellComparison` of each code cell, where ``regressions`` lists
+        the regressed measures (e.g., ``['duration_s']``).
+    '''
+    before = before if isinstance(before, list) else read(before)
+    after = after if isinstance(after, list) else read(after)
+    minimums = {'duration_s': min_duration_s, 'cpu_s': min_duration_s,
+                'peak_rss_bytes': min_rss_bytes}
+    comparisons = []
+    for i in range(max(len(before), len(after))):
+        before_i = before[i] if i < len(before) else None
+        after_i = after[i] if i < len(after) else None
+        regressions = []
+        if before_i is not None and after_i is not None:
+            for measure in ('duration_s', 'cpu_s', 'peak_rss_bytes'):
+                value_before = getattr(before_i, measure)
+                value_after = getattr(after_i, measure)
+                if value_before is None or value_after is None:
+                    continue
+                if (value_after - value_before >= minimums[measure] and
+                        value_after > value_before * (1 + threshold)):
+                    regressions.append(measure)
+        cell = after_i or before_i
+        comparisons.append(CellComparison(cell.cell, cell.source, before_i,
+                                          after_i, regressions))
+    return comparisons
+
+
+def _format_measure(profile, measure):
+    value = None if profile is None else getattr(profile, measure)
+    if value is None:
+        return '%10s' % '-'
+    elif measure == 'peak_rss_bytes':
+        return '%7.1f MB' % (value / float(1 << 20))
+    return '%8.2f s' % value
+
+
+def format_comparison(comparisons):
+    '''
+    Parameters
+    ----------
+    comparisons : list
+        List of :data:`CellComparison` records (see :func:`compare`).
+
+    Returns
+    -------
+    str
+        Comparison formatted as a text table, with regressed cells marked by
+        ``!``.
+    '''
+    measures = ('duration_s', 'cpu_s', 'peak_rss_bytes')
+    lines = ['  %4s %21s %21s %21s  %s' % ('cell', 'wall (before/after)',
+                                           'cpu (before/after)',
+                                           'peak rss (before/after)',
+                                           'source')]
+    for comparison in comparisons:
+        source = comparison.source.strip().splitlines()
+        lines.append('%s %4d %s  %s' %
+                     ('!' if comparison.regressions else ' ', comparison.cell,
+                      ' '.join('%s %s' % (_format_measure(comparison.before,
+                                                          measure),
+                                          _format_measure(comparison.after,
+                                                          measure))
+                               for measure in measures),
+                      source[0][:40] if source else ''))
+    regressed = [c for c in comparisons if c.regressions]
+    lines.append('%d of %d cells regressed.' % (len(regressed),
+                                                len(comparisons)))
+    return '\n'.join(lines)
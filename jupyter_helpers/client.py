@@ -0,0 +1,345 @@
+# coding: utf-8
+'''
+Client for the REST API of a notebook server, using a pool of keep-alive
+connections.
+
+See the `notebook server REST API`_.
+
+.. _notebook server REST API: https://petstore.swagger.io/?url=https://raw.githubusercontent.com/jupyter/notebook/master/notebook/services/api/api.yaml
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+
+try:
+    from urllib import quote
+except ImportError:
+    # Python 3.
+    from urllib.parse import quote
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+
+
+#: Response status codes of requests which are retried (e.g., while the
+#: notebook server is starting behind a proxy).
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+def _api_path(path_):
+    path_ = path_.replace('\\', '/').strip('/')
+    if not isinstance(path_, bytes):
+        # `quote` does not support non-ASCII `unicode` on Python 2.
+        path_ = path_.encode('utf8')
+    return quote(path_, safe='/')
+
+
+class _Endpoint(object):
+    def __init__(self, client):
+        self.client = client
+
+
+class Contents(_Endpoint):
+    '''
+    Files, directories and notebooks, by path relative to the notebook
+    directory (``/api/contents``).
+    '''
+    def get(self, path_='', content=True, type=None, format=None):
+        '''
+        Returns
+        -------
+        dict
+            Contents model, e.g., with ``content`` set to the notebook (as a
+            ``dict``) for a notebook, or to a list of contents models (without
+            content) for a directory.
+        '''
+        params = {'content': int(content)}
+        if type is not None:
+            params['type'] = type
+        if format is not None:
+            params['format'] = format
+        return self.client.get('contents/' + _api_path(path_), params=params)
+
+    def list(self, path_=''):
+        '''
+        Returns
+        -------
+        list
+            Contents models (without content) in directory.
+        '''
+        return self.get(path_, type='directory')['content']
+
+    def save(self, path_, model):
+        '''
+        Create or replace file, directory or notebook.
+
+        Parameters
+        ----------
+        path_ : str
+            Path relative to notebook directory.
+        model : dict
+            Contents model with ``type``, ``content`` and (for files)
+            ``format`` keys, e.g., ``{'type': 'notebook', 'content':
+            notebook}``.
+        '''
+        return self.client.put('contents/' + _api_path(path_), json=model)
+
+    def new_untitled(self, path_='', type='notebook', ext=None):
+        '''
+        Create new untitled file, directory or notebook in directory.
+        '''
+        model = {'type': type}
+        if ext is not None:
+            model['ext'] = ext
+        return self.client.post('contents/' + _api_path(path_), json=model)
+
+    def copy(self, from_path, path_=''):
+        '''
+        Copy file or notebook to directory (named, e.g., ``a-Copy1.ipynb``).
+        '''
+        return self.client.post('contents/' + _api_path(path_),
+                                json={'copy_from': from_path})
+
+    def rename(self, path_, new_path):
+        return self.client.patch('contents/' + _api_path(path_),
+                                 json={'path': new_path})
+
+    def delete(self, path_):
+        self.client.delete('contents/' + _api_path(path_))
+
+
+class Kernels(_Endpoint):
+    '''
+    Running kernels (``/api/kernels``).
+    '''
+    def list(self):
+        return self.client.get('kernels')
+
+    def get(self, kernel_id):
+        return self.client.get('kernels/' + kernel_id)
+
+    def start(self, name=None):
+        '''
+        Parameters
+        ----------
+        name : str, optional
+            Kernel spec name (default: default kernel of notebook server).
+
+        Returns
+        -------
+        dict
+            Kernel model, with ``id`` and ``name`` keys.
+        '''
+        return self.client.post('kernels', json={'name': name}
+                                if name is not None else {})
+
+    def interrupt(self, kernel_id):
+        self.client.post('kernels/%s/interrupt' % kernel_id)
+
+    def restart(self, kernel_id):
+        return self.client.post('kernels/%s/restart' % kernel_id)
+
+    def shutdown(self, kernel_id):
+        self.client.delete('kernels/' + kernel_id)
+
+
+class KernelSpecs(_Endpoint):
+    '''
+    Installed kernel specs (``/api/kernelspecs``).
+    '''
+    def list(self):
+        '''
+        Returns
+        -------
+        dict
+            ``default`` kernel spec name and ``kernelspecs`` by name.
+        '''
+        return self.client.get('kernelspecs')
+
+    def get(self, name):
+        return self.client.get('kernelspecs/' + name)
+
+
+class Sessions(_Endpoint):
+    '''
+    Notebook sessions, i.e., kernels associated with notebook paths
+    (``/api/sessions``).
+    '''
+    def list(self):
+        return self.client.get('sessions')
+
+    def get(self, session_id):
+        return self.client.get('sessions/' + session_id)
+
+    def create(self, path_, kernel_name=None, type='notebook', name=''):
+        '''
+        Start kernel for notebook, or return existing session of notebook.
+
+        Returns
+        -------
+        dict
+            Session model, with ``id``, ``path`` and ``kernel`` keys.
+        '''
+        kernel = {'name': kernel_name} if kernel_name is not None else {}
+        return self.client.post('sessions', json={'path': path_, 'type': type,
+                                                  'name': name,
+                                                  'kernel': kernel})
+
+    def update(self, session_id, **fields):
+        '''
+        Modify session, e.g., ``update(session_id, path='b.ipynb')``.
+        '''
+        return self.client.patch('sessions/' + session_id, json=fields)
+
+    def delete(self, session_id):
+        '''
+        Delete session and shut down its kernel.
+        '''
+        self.client.delete('sessions/' + session_id)
+
+
+class Terminals(_Endpoint):
+    '''
+    Terminals (``/api/terminals``).
+    '''
+    def list(self):
+        return self.client.get('terminals')
+
+    def get(self, name):
+        return self.client.get('terminals/' + name)
+
+    def create(self):
+        return self.client.post('terminals')
+
+    def delete(self, name):
+        self.client.delete('terminals/' + name)
+
+
+class NotebookClient(object):
+    '''
+    Client for the REST API of a notebook server.
+
+    Requests share a pool of keep-alive connections, and are authenticated
+    with the notebook server token.  Requests failing to connect are retried
+    with exponential backoff, as are idempotent requests (e.g., ``GET``)
+    failing with a status code in :data:`RETRY_STATUS_CODES`.
+
+    API endpoints are wrapped by the :attr:`contents`, :attr:`kernels`,
+    :attr:`kernelspecs`, :attr:`sessions` and :attr:`terminals` attributes.
+
+    Parameters
+    ----------
+    address : str
+        Base URL of notebook server, e.g., ``http://localhost:8888/``.
+    token : str, optional
+        Notebook server token.
+    pool_size : int, optional
+        Maximum number of connections kept alive (i.e., requests made
+        concurrently without opening new connections).
+    retries : int, optional
+        Maximum number of times to retry a request.
+    backoff_factor : float, optional
+        Retry after ``backoff_factor * 2 ** (retry - 1)`` seconds.
+    timeout_s : float, optional
+        Time to wait for the server to respond to a request.
+
+    Example
+    -------
+
+        >>> client = session.client
+        >>> kernel = client.kernels.start('python2')
+        >>> client.contents.list()
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, address, token=None, pool_size=10, retries=3,
+                 backoff_factor=.1, timeout_s=30):
+        self.address = address.rstrip('/') + '/'
+        self.token = token
+        self.timeout_s = timeout_s
+        self.http = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=RETRY_STATUS_CODES,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        if token:
+            self.http.headers['Authorization'] = 'token %s' % token
+        self.contents = Contents(self)
+        self.kernels = Kernels(self)
+        self.kernelspecs = KernelSpecs(self)
+        self.sessions = Sessions(self)
+        self.terminals = Terminals(self)
+
+    def request(self, method, endpoint, **kwargs):
+        '''
+        Parameters
+        ----------
+        method : str
+            HTTP method, e.g., ``'GET'``.
+        endpoint : str
+            API endpoint, relative to ``<address>api/``.
+        **kwargs : dict
+            Additional arguments to pass along to ``requests.Session.request``.
+
+        Returns
+        -------
+        object
+            Decoded JSON response, or ``None`` if the response is empty.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the server responds with an error status code.
+        '''
+        kwargs.setdefault('timeout', self.timeout_s)
+        response = self.http.request(method, self.address + 'api/' +
+                                     endpoint, **kwargs)
+        response.raise_for_status()
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    def get(self, endpoint, **kwargs):
+        return self.request('GET', endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request('POST', endpoint, **kwargs)
+
+    def put(self, endpoint, **kwargs):
+        return self.request('PUT', endpoint, **kwargs)
+
+    def patch(self, endpoint, **kwargs):
+        return self.request('PATCH', endpoint, **kwargs)
+
+    def delete(self, endpoint, **kwargs):
+        return self.request('DELETE', endpoint, **kwargs)
+
+    def status(self):
+        '''
+        Returns
+        -------
+        dict
+            Server status, e.g., number of running kernels and time of last
+            activity.
+        '''
+        return self.get('status')
+
+    def version(self):
+        '''
+        Returns
+        -------
+        str
+            Notebook server version.
+        '''
+        return self.get('')['version']
+
+    def close(self):
+        '''
+        Close pooled connections.
+        '''
+        self.http.close()
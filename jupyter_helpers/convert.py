@@ -0,0 +1,305 @@
+# coding: utf-8
+'''
+Convert notebooks of a directory tree (e.g., to HTML for archiving) in a pool
+of worker processes, skipping notebooks which did not change since they were
+last converted.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+from threading import Lock
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from path_helpers import path
+
+#: Result of converting a notebook, where ``status`` is ``'converted'``,
+#: ``'skipped'`` (i.e., unchanged since last converted), ``'removed'`` (i.e.,
+#: notebook no longer exists) or ``'error'``.
+Conversion = namedtuple('Conversion', 'path output_path status duration_s '
+                        'error')
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    '''
+    Returns
+    -------
+    str
+        SHA1 hex digest of file contents.
+    '''
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as input_:
+        for chunk in iter(lambda: input_.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def convert_notebook(notebook_path, output_dir, format):
+    '''
+    Convert notebook with ``nbconvert`` (in the current process).
+
+    Parameters
+    ----------
+    notebook_path : str
+        Path to notebook.
+    output_dir : str
+        Directory to write output (and extracted outputs, e.g., images) to.
+    format : str
+        ``nbconvert`` exporter name, e.g., ``'html'`` or ``'pdf'``.
+
+    Returns
+    -------
+    path_helpers.path
+        Path of output file.
+    '''
+    from nbconvert.exporters import get_exporter
+    from nbconvert.writers import FilesWriter
+
+    exporter = get_exporter(format)()
+    body, resources = exporter.from_filename(notebook_path)
+    writer = FilesWriter(build_directory=output_dir)
+    return path(writer.write(body, resources,
+                             notebook_name=path(notebook_path).namebase))
+
+
+def _convert(args):
+    # Worker process function; errors are returned rather than raised, so a
+    # single failure does not abort the other conversions.
+    start = time.time()
+    try:
+        output_path = convert_notebook(*args)
+        error = None
+    except Exception as exception:
+        output_path = None
+        error = '%s: %s' % (type(exception).__name__, exception)
+    return output_path, time.time() - start, error
+
+
+class BatchConverter(object):
+    '''
+    Convert notebooks in a directory tree to an output tree (with the same
+    layout), in a pool of worker processes which each import ``nbconvert``
+    once.
+
+    A manifest (a hidden JSON file in the output directory) records the
+    content hash, size and modification time of each converted notebook.
+    Notebooks whose content is unchanged since they were last converted (and
+    whose output still exists) are skipped; contents are only hashed if the
+    size or modification time of a notebook changed.
+
+    Parameters
+    ----------
+    root : str
+        Root directory of notebook tree.
+    format : str, optional
+        ``nbconvert`` exporter name, e.g., ``'html'`` or ``'pdf'``.
+    output_dir : str, optional
+        Root directory of output tree (default: ``root``, i.e., outputs are
+        written next to notebooks).
+    workers : int, optional
+        Maximum number of worker processes (default: number of CPUs).
+
+    Example
+    -------
+
+        >>> converter = BatchConverter('notebooks', 'html', 'archive')
+        >>> converter.convert()
+        >>> session.watcher.subscribe(converter.update_paths)
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, root, format='html', output_dir=None, workers=None):
+        self.root = path(root).abspath()
+        self.format = format
+        self.output_dir = path(output_dir or root).abspath()
+        self.workers = workers or cpu_count()
+        self.manifest_path = self.output_dir.joinpath('.jupyter_helpers-'
+                                                      'convert-%s.json' %
+                                                      format)
+        self._lock = Lock()
+        try:
+            with open(self.manifest_path, 'rb') as input_:
+                self.manifest = json.loads(input_.read().decode('utf8'))
+        except (IOError, ValueError):
+            self.manifest = {}
+
+    def _save_manifest(self):
+        self.output_dir.makedirs_p()
+        handle, temp_path = tempfile.mkstemp(dir=self.output_dir,
+                                             prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(json.dumps(self.manifest, indent=1,
+                                        sort_keys=True).encode('utf8'))
+            os.rename(temp_path, self.manifest_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def _key(self, notebook_path):
+        key = self.root.relpathto(notebook_path)
+        if isinstance(key, bytes):
+            key = key.decode('utf8')
+        return key.replace('\\', '/')
+
+    def _digest(self, notebook_path, key, stat):
+        '''
+        Returns
+        -------
+        str or None
+            Content hash of notebook, or ``None`` if notebook is unchanged
+            since it was last converted.
+        '''
+        record = self.manifest.get(key)
+        if record is None or not path(record['output']).isfile():
+            return file_digest(notebook_path)
+        if (record['size'], record['mtime']) == (stat.st_size,
+                                                 stat.st_mtime):
+            return None
+        digest = file_digest(notebook_path)
+        if record['sha1'] == digest:
+            # E.g., notebook was saved without changes.
+            record['size'], record['mtime'] = stat.st_size, stat.st_mtime
+            return None
+        return digest
+
+    def convert(self, notebook_paths=None, force=False):
+        '''
+        Convert notebooks which changed since last converted.
+
+        Parameters
+        ----------
+        notebook_paths : list, optional
+            Notebooks to convert (default: all notebooks in tree, skipping
+            hidden files and directories).
+        force : bool, optional
+            If ``True``, convert notebooks even if unchanged.
+
+        Returns
+        -------
+        list
+            :data:`Conversion` of each notebook, sorted by path.
+        '''
+        if notebook_paths is None:
+            from .index import NotebookIndex
+
+            notebook_paths = NotebookIndex(self.root).paths()
+        with self._lock:
+            results = []
+            jobs = []
+            for notebook_path in sorted(path(p).abspath()
+                                        for p in notebook_paths):
+                key = self._key(notebook_path)
+                try:
+                    stat = notebook_path.stat()
+                    # Hash contents before converting, so changes made during
+                    # conversion are converted next time.
+                    digest = (file_digest(notebook_path) if force else
+                              self._digest(notebook_path, key, stat))
+                except (IOError, OSError) as exception:
+                    if exception.errno != errno.ENOENT:
+                        raise
+                    # Removed since listed (e.g., by the notebook index).
+                    self.manifest.pop(key, None)
+                    results.append(Conversion(notebook_path, None, 'removed',
+                                              0, None))
+                    continue
+                if digest is None:
+                    results.append(Conversion(notebook_path,
+                                              path(self.manifest[key]
+                                                   ['output']), 'skipped',
+                                              0, None))
+                    continue
+                output_dir = self.output_dir.joinpath(key).parent
+                jobs.append((notebook_path, key, stat, digest,
+                             (notebook_path, output_dir, self.format)))
+
+            args = [job[-1] for job in jobs]
+            if len(args) > 1 and self.workers > 1:
+                pool = Pool(min(self.workers, len(args)))
+                try:
+                    outputs = pool.map(_convert, args, chunksize=1)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                outputs = [_convert(args_i) for args_i in args]
+
+            for (notebook_path, key, stat, digest, args_i), \
+                    (output_path, duration_s, error) in zip(jobs, outputs):
+                if error is None:
+                    self.manifest[key] = {'sha1': digest,
+                                          'size': stat.st_size,
+                                          'mtime': stat.st_mtime,
+                                          'output': output_path}
+                else:
+                    self.manifest.pop(key, None)
+                results.append(Conversion(notebook_path, output_path,
+                                          'converted' if error is None else
+                                          'error', duration_s, error))
+            if results:
+                self._save_manifest()
+        return sorted(results, key=lambda result: result.path)
+
+    def invalidate(self, paths=None):
+        '''
+        Mark manifest records of changed notebooks as outdated, e.g., as a
+        subscriber of a :class:`jupyter_helpers.watch.DirectoryWatcher` of
+        :attr:`root`.
+
+        The contents of changed notebooks are hashed again on the next
+        conversion (even if their size and modification time appear
+        unchanged), and records of removed notebooks are dropped.
+
+        Parameters
+        ----------
+        paths : list, optional
+            Changed notebook paths, or directories containing notebooks
+            (default: all).
+        '''
+        with self._lock:
+            if paths is None:
+                keys = list(self.manifest)
+            else:
+                keys = []
+                for path_i in paths:
+                    key = self._key(path(path_i).abspath())
+                    keys.extend(k for k in self.manifest
+                                if key == '.' or k == key or
+                                k.startswith(key + '/'))
+            for key in keys:
+                if self.root.joinpath(key).isfile():
+                    self.manifest[key]['mtime'] = None
+                else:
+                    del self.manifest[key]
+
+    def update_paths(self, paths):
+        '''
+        Convert changed notebooks, e.g., as a subscriber of a
+        :class:`jupyter_helpers.watch.DirectoryWatcher` of :attr:`root`.
+
+        Parameters
+        ----------
+        paths : list or None
+            Changed paths.  If ``None`` (i.e., changes may have been missed),
+            all notebooks in tree are checked.
+
+        Returns
+        -------
+        list
+            :data:`Conversion` of each converted notebook.
+        '''
+        if paths is None:
+            return self.convert()
+        prefix = self.root.joinpath('')
+        notebook_paths = [p for p in (path(p_i).abspath() for p_i in paths)
+                          if p.ext == '.ipynb' and p.startswith(prefix) and
+                          p.isfile()]
+        return self.convert(notebook_paths) if notebook_paths else []
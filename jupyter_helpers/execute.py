@@ -0,0 +1,422 @@
+# coding: utf-8
+'''
+Execute code and notebooks in kernels of a running notebook server, over the
+kernel websocket (i.e., without launching ``nbconvert`` processes).
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from datetime import datetime
+import json
+import time
+import uuid
+
+from tornado import gen, ioloop, queues, websocket
+from tornado.httpclient import HTTPRequest
+from tornado.util import TimeoutError
+
+#: Kernel messaging protocol version of requests.
+PROTOCOL_VERSION = '5.3'
+
+
+class KernelConnection(object):
+    '''
+    Blocking connection to a kernel of a notebook server, over the kernel
+    websocket (``/api/kernels/<kernel_id>/channels``).
+
+    Each connection runs its own IO loop in the calling thread, i.e., a
+    connection must only be used from one thread at a time.
+
+    Parameters
+    ----------
+    client : jupyter_helpers.client.NotebookClient
+        Client of notebook server running kernel.
+    kernel_id : str
+        Kernel ID.
+    timeout_s : float, optional
+        Time to wait for kernel to connect and reply to ``kernel_info``
+        request.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, client, kernel_id, timeout_s=60):
+        self.client = client
+        self.kernel_id = kernel_id
+        self.session_id = uuid.uuid4().hex
+        self.io_loop = ioloop.IOLoop(make_current=False)
+        self._messages = None
+        self.ws = None
+        url = '%sapi/kernels/%s/channels?session_id=%s' % \
+            (client.address.replace('http', 'ws', 1), kernel_id,
+             self.session_id)
+        request = HTTPRequest(url, headers=dict(client.http.headers),
+                              connect_timeout=timeout_s)
+
+        @gen.coroutine
+        def connect():
+            # Queue must be created on the IO loop of the connection.
+            self._messages = queues.Queue()
+            self.ws = yield websocket.websocket_connect(
+                request, on_message_callback=self._messages.put_nowait)
+
+        try:
+            self.io_loop.run_sync(connect, timeout=timeout_s)
+            #: Kernel info (see ``kernel_info_reply`` message).
+            self.info = self.request('kernel_info_request', {},
+                                     timeout=timeout_s)['content']
+        except Exception:
+            self.close()
+            raise
+
+    def _message(self, msg_type, content, channel='shell'):
+        msg_id = uuid.uuid4().hex
+        return {'header': {'msg_id': msg_id, 'msg_type': msg_type,
+                           'username': 'jupyter_helpers',
+                           'session': self.session_id,
+                           'date': datetime.utcnow().isoformat() + 'Z',
+                           'version': PROTOCOL_VERSION},
+                'parent_header': {}, 'metadata': {}, 'content': content,
+                'channel': channel, 'buffers': []}
+
+    @gen.coroutine
+    def _replies(self, msg_id, on_message, deadline):
+        '''
+        Call ``on_message(message)`` for each message replying to request
+        until it returns ``True``.
+        '''
+        while True:
+            message = yield self._messages.get(timeout=deadline)
+            if message is None:
+                raise IOError('Connection to kernel `%s` was closed.' %
+                              self.kernel_id)
+            elif isinstance(message, bytes):
+                # Binary message (i.e., with buffers), not sent in reply to
+                # requests made here.
+                continue
+            message = json.loads(message)
+            if message.get('parent_header', {}).get('msg_id') != msg_id:
+                # E.g., output of a previous, interrupted request.
+                continue
+            if on_message(message):
+                return
+
+    def _run(self, msg_type, content, on_message, timeout):
+        message = self._message(msg_type, content)
+        deadline = (None if timeout is None else
+                    self.io_loop.time() + timeout)
+
+        @gen.coroutine
+        def run():
+            yield self.ws.write_message(json.dumps(message))
+            yield self._replies(message['header']['msg_id'], on_message,
+                                deadline)
+
+        self.io_loop.run_sync(run)
+
+    def request(self, msg_type, content, timeout=None):
+        '''
+        Send request on shell channel and wait for reply.
+
+        Returns
+        -------
+        dict
+            Reply message.
+
+        Raises
+        ------
+        tornado.util.TimeoutError
+            If no reply is received within timeout.
+        '''
+        replies = []
+
+        def on_message(message):
+            if message['channel'] == 'shell':
+                replies.append(message)
+                return True
+
+        self._run(msg_type, content, on_message, timeout)
+        return replies[0]
+
+    def execute(self, code, timeout=None, user_expressions=None,
+                silent=False, store_history=True, stop_on_error=True):
+        '''
+        Execute code and collect outputs.
+
+        Parameters
+        ----------
+        code : str
+            Code to execute.
+        timeout : float, optional
+            Time to wait for execution to finish.  If exceeded, the kernel is
+            interrupted.
+        user_expressions : dict, optional
+            Expressions to evaluate after executing code, by name.
+
+        Returns
+        -------
+        dict
+            Execution result, with keys:
+
+             - ``status``: ``'ok'``, ``'error'``, ``'aborted'`` (i.e.,
+               request was aborted since a previous request failed) or
+               ``'timeout'``.
+             - ``execution_count``
+             - ``outputs``: list of ``nbformat`` output nodes.
+             - ``ename``, ``evalue`` and ``traceback`` (for errors).
+             - ``user_expressions``: evaluated user expressions, by name.
+             - ``duration_s``: time from request until all outputs were
+               received.
+        '''
+        import nbformat
+
+        result = {'status': None, 'execution_count': None, 'outputs': [],
+                  'ename': None, 'evalue': None, 'traceback': None,
+                  'user_expressions': {}, 'duration_s': None}
+        state = {'idle': False, 'clear': False}
+        outputs = result['outputs']
+
+        def on_message(message):
+            msg_type = message['header']['msg_type']
+            content = message['content']
+            if message['channel'] == 'shell':
+                result['status'] = content['status']
+                result['execution_count'] = content.get('execution_count')
+                result['user_expressions'] = content.get('user_expressions',
+                                                         {})
+                if content['status'] == 'error':
+                    for key in ('ename', 'evalue', 'traceback'):
+                        result[key] = content.get(key)
+            elif msg_type == 'status':
+                state['idle'] = content['execution_state'] == 'idle'
+            elif msg_type == 'clear_output':
+                if content.get('wait'):
+                    state['clear'] = True
+                else:
+                    del outputs[:]
+            elif msg_type in ('stream', 'display_data', 'execute_result',
+                              'error'):
+                if state['clear']:
+                    del outputs[:]
+                    state['clear'] = False
+                if (msg_type == 'stream' and outputs and
+                        outputs[-1].output_type == 'stream' and
+                        outputs[-1].name == content['name']):
+                    # Merge consecutive stream outputs.
+                    outputs[-1].text += content['text']
+                else:
+                    outputs.append(nbformat.v4.output_from_msg(message))
+            return state['idle'] and result['status'] is not None
+
+        start = time.time()
+        try:
+            self._run('execute_request',
+                      {'code': code, 'silent': silent,
+                       'store_history': store_history,
+                       'user_expressions': user_expressions or {},
+                       'allow_stdin': False, 'stop_on_error': stop_on_error},
+                      on_message, timeout)
+        except TimeoutError:
+            self.client.kernels.interrupt(self.kernel_id)
+            result['status'] = 'timeout'
+        result['duration_s'] = time.time() - start
+        return result
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+            self.ws = None
+        self.io_loop.close(all_fds=True)
+
+
+def execute_notebook(client, notebook_path, timeout=None, kernel_name=None,
+                     allow_errors=False, save=True, pool=None, cache=None,
+                     inputs=(), profile=False):
+    '''
+    Execute code cells of notebook in a new kernel of a running notebook
+    server, and save outputs through the contents API.
+
+    The kernel is started through the sessions API, i.e., in the directory of
+    the notebook.  If the notebook already has a session (e.g., it is open in
+    a browser tab), its kernel is used and kept running.  Otherwise, the
+    kernel is shut down afterwards.
+
+    Parameters
+    ----------
+    client : jupyter_helpers.client.NotebookClient
+        Client of notebook server.
+    notebook_path : str
+        Notebook path, relative to notebook directory of server.
+    timeout : float, optional
+        Maximum time to execute each cell.
+    kernel_name : str, optional
+        Kernel spec name (default: kernel in notebook metadata, if set).
+    allow_errors : bool, optional
+        If ``True``, continue executing after a cell raises an error.
+    save : bool, optional
+        If ``True``, save notebook with outputs.
+    pool : jupyter_helpers.pool.KernelPool, optional
+        If specified, use idle kernel from pool, if available.
+    cache : jupyter_helpers.cache.ExecutionCache, optional
+        If specified, use outputs from cache instead of executing notebook if
+        the code, kernel spec and input files are unchanged since the notebook
+        was last executed successfully (i.e., without timeouts and, unless
+        ``allow_errors`` is set, without errors).  The cache is updated after
+        each successful execution.
+    inputs : list, optional
+        Paths of (local) files read by notebook, to include in cache key.
+    profile : bool, optional
+        If ``True``, measure CPU time and peak RSS of kernel for each cell,
+        and store profile of each cell in cell metadata (see
+        :mod:`jupyter_helpers.cellprofile`).
+
+    Returns
+    -------
+    list
+        Status of each code cell, as a ``dict`` with ``cell`` (index in
+        notebook), ``status`` (see :meth:`KernelConnection.execute`, or
+        ``'skipped'`` if not executed), ``execution_count``, ``duration_s``,
+        ``cpu_s`` and ``peak_rss_bytes`` (if profiled), ``ename`` and
+        ``evalue`` keys.
+    '''
+    import nbformat
+
+    from .cellprofile import (METADATA_KEY, USER_EXPRESSIONS,
+                              parse_user_expressions)
+
+    notebook_path = notebook_path.replace('\\', '/')
+    notebook = nbformat.from_dict(client.contents.get(notebook_path)
+                                  ['content'])
+    if kernel_name is None:
+        kernel_name = notebook.metadata.get('kernelspec', {}).get('name')
+    cache_key = None
+    if cache is not None:
+        kernelspecs = client.kernelspecs.list()
+        kernelspec = kernelspecs['kernelspecs']\
+            .get(kernel_name or kernelspecs['default'], {}).get('spec', {})
+        cache_key = cache.key(notebook, {k: v for k, v in kernelspec.items()
+                                         if k != 'display_name'}, inputs,
+                              allow_errors=allow_errors, profile=profile)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            statuses = _restore(notebook, entry)
+            if save:
+                client.contents.save(notebook_path, {'type': 'notebook',
+                                                     'content': notebook})
+            return statuses
+    existing = set(session['id'] for session in client.sessions.list())
+    if pool is not None:
+        session = pool.create_session(notebook_path, kernel_name)
+    else:
+        session = client.sessions.create(notebook_path, kernel_name)
+    try:
+        connection = KernelConnection(client, session['kernel']['id'])
+
+        def measure():
+            # Kernel resource usage, e.g., before executing first cell.
+            return parse_user_expressions(connection.execute(
+                '', silent=True, store_history=False,
+                user_expressions=USER_EXPRESSIONS,
+                timeout=timeout)['user_expressions'])
+
+        try:
+            statuses = []
+            stop = False
+            usage = measure() if profile else None
+            for i, cell in enumerate(notebook.cells):
+                if cell.cell_type != 'code':
+                    continue
+                status = {'cell': i, 'status': 'skipped',
+                          'execution_count': None, 'duration_s': None,
+                          'cpu_s': None, 'peak_rss_bytes': None,
+                          'ename': None, 'evalue': None}
+                statuses.append(status)
+                if stop:
+                    # Do not keep results of a previous run next to the
+                    # results of this run.
+                    cell.outputs = []
+                    cell.execution_count = None
+                    cell.metadata.get('jupyter_helpers', {})\
+                        .pop(METADATA_KEY, None)
+                    continue
+                if not cell.source.strip():
+                    status['status'] = 'ok'
+                    continue
+                result = connection.execute(cell.source, timeout=timeout,
+                                            user_expressions=USER_EXPRESSIONS
+                                            if profile else None)
+                cell.outputs = result['outputs']
+                cell.execution_count = result['execution_count']
+                for key in status:
+                    status[key] = result.get(key, status[key])
+                if result['status'] == 'timeout' or (result['status'] != 'ok'
+                                                     and not allow_errors):
+                    stop = True
+                if profile:
+                    # User expressions are only evaluated if the cell
+                    # succeeded.
+                    cell_usage = parse_user_expressions(result
+                                                        ['user_expressions'])
+                    if cell_usage['cpu_s'] is not None and \
+                            usage['cpu_s'] is not None:
+                        status['cpu_s'] = cell_usage['cpu_s'] - usage['cpu_s']
+                    status['peak_rss_bytes'] = cell_usage['peak_rss_bytes']
+                    cell.metadata.setdefault('jupyter_helpers', {})\
+                        [METADATA_KEY] = {key: status[key] for key in
+                                          ('duration_s', 'cpu_s',
+                                           'peak_rss_bytes')}
+                    if not stop:
+                        usage = (cell_usage if cell_usage['cpu_s'] is not None
+                                 else measure())
+        finally:
+            connection.close()
+    finally:
+        if session['id'] not in existing:
+            client.sessions.delete(session['id'])
+    if cache_key is not None and \
+            all(status['status'] == 'ok' or
+                (allow_errors and status['status'] == 'error')
+                for status in statuses):
+        cache.put(cache_key,
+                  {'cells': statuses,
+                   'outputs': [{'outputs': cell.outputs,
+                                'execution_count': cell.execution_count,
+                                'profile': cell.metadata
+                                .get('jupyter_helpers', {})
+                                .get(METADATA_KEY) if profile else None}
+                               for cell in notebook.cells
+                               if cell.cell_type == 'code']})
+    if save:
+        client.contents.save(notebook_path, {'type': 'notebook',
+                                             'content': notebook})
+    return statuses
+
+
+def _restore(notebook, entry):
+    '''
+    Copy cached outputs (see :func:`execute_notebook`) to code cells of
+    notebook.
+
+    Returns
+    -------
+    list
+        Cached status of each code cell.
+    '''
+    import nbformat
+
+    from .cellprofile import METADATA_KEY
+
+    code_cells = [(i, cell) for i, cell in enumerate(notebook.cells)
+                  if cell.cell_type == 'code']
+    statuses = []
+    for (i, cell), status, outputs in zip(code_cells, entry['cells'],
+                                          entry['outputs']):
+        cell.outputs = [nbformat.from_dict(output)
+                        for output in outputs['outputs']]
+        cell.execution_count = outputs['execution_count']
+        if outputs.get('profile') is not None:
+            cell.metadata.setdefault('jupyter_helpers', {})[METADATA_KEY] = \
+                outputs['profile']
+        # Other (e.g., markdown) cells may have been changed.
+        statuses.append(dict(status, cell=i))
+    return statuses
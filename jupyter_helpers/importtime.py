@@ -0,0 +1,179 @@
+# coding: utf-8
+'''
+Import time profiling of notebook server startup.
+
+On Python 3.7+, the interpreter reports import times itself (i.e., ``-X
+importtime`` or ``PYTHONPROFILEIMPORTTIME``).  On older versions, run a module
+with this module as a wrapper to report import times in the same format::
+
+    python -m jupyter_helpers.importtime notebook --no-browser
+
+Each report line is written to ``stderr`` in the format::
+
+    import time: self [us] | cumulative | imported package
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import namedtuple
+import re
+import runpy
+import sys
+import threading
+import time
+
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+
+#: Prefix of import time report lines.
+PREFIX = 'import time:'
+
+#: Import time of a single module, in microseconds.
+ImportTime = namedtuple('ImportTime', 'module self_us cumulative_us depth')
+
+CRE_IMPORTTIME = re.compile(r'^import time:\s+(?P<self_us>\d+)\s+\|'
+                            r'\s+(?P<cumulative_us>\d+)\s+\|'
+                            r'(?P<indent>\s+)(?P<module>\S+)\s*$')
+
+
+def _resolve(name, globals_, level):
+    '''
+    Return absolute name of module imported by ``__import__`` call (best
+    effort, for relative imports).
+    '''
+    if level == 0 or not globals_:
+        return name
+    package = globals_.get('__package__')
+    if not package:
+        package = globals_.get('__name__', '')
+        if '__path__' not in globals_:
+            package = package.rpartition('.')[0]
+    for i in range(max(level, 1) - 1):
+        package = package.rpartition('.')[0]
+    candidate = '.'.join([p for p in (package, name) if p])
+    return candidate if sys.modules.get(candidate) is not None else name
+
+
+def install(output=None):
+    '''
+    Wrap built-in ``__import__`` to report time spent loading each module.
+
+    Parameters
+    ----------
+    output : file, optional
+        File to write report lines to (default: ``sys.stderr``).
+    '''
+    output = sys.stderr if output is None else output
+    original_import = builtins.__import__
+    state = threading.local()
+
+    def timed_import(name, globals=None, locals=None, fromlist=None,
+                     level=-1 if sys.version_info[0] < 3 else 0):
+        stack = getattr(state, 'stack', None)
+        if stack is None:
+            stack = state.stack = []
+        module_count = len(sys.modules)
+        # Time spent in nested imports is accumulated in the last item.
+        stack.append(0)
+        start = time.time()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative_us = int((time.time() - start) * 1e6)
+            children_us = stack.pop()
+            if len(sys.modules) > module_count:
+                # At least one module was loaded by this import.
+                if stack:
+                    stack[-1] += cumulative_us
+                output.write('%s %9d | %10d | %s%s\n' %
+                             (PREFIX, cumulative_us - children_us,
+                              cumulative_us, '  ' * len(stack),
+                              _resolve(name, globals, level)))
+
+    builtins.__import__ = timed_import
+
+
+def parse(lines):
+    '''
+    Parse import time report lines.
+
+    Parameters
+    ----------
+    lines : list
+        Lines output by ``python -X importtime`` or :func:`install`.  Lines
+        which are not import time report lines are ignored.
+
+    Returns
+    -------
+    list
+        List of :data:`ImportTime` records, in order of output.
+    '''
+    records = []
+    for line in lines:
+        match = CRE_IMPORTTIME.match(line.rstrip())
+        if match:
+            records.append(ImportTime(match.group('module'),
+                                      int(match.group('self_us')),
+                                      int(match.group('cumulative_us')),
+                                      (len(match.group('indent')) - 1) // 2))
+    return records
+
+
+def report(lines, top=None):
+    '''
+    Parameters
+    ----------
+    lines : list
+        Import time report lines (see :func:`parse`).
+    top : int, optional
+        Maximum number of records to return.
+
+    Returns
+    -------
+    list
+        List of :data:`ImportTime` records, sorted by cumulative import time
+        (most expensive first).
+    '''
+    records = sorted(parse(lines), key=lambda r: r.cumulative_us,
+                     reverse=True)
+    return records[:top] if top is not None else records
+
+
+def format_report(records):
+    '''
+    Parameters
+    ----------
+    records : list
+        List of :data:`ImportTime` records (see :func:`report`).
+
+    Returns
+    -------
+    str
+        Report formatted as a text table.
+    '''
+    lines = ['%12s %12s  %s' % ('cumulative', 'self', 'module')]
+    lines += ['%9.1f ms %9.1f ms  %s' % (r.cumulative_us * 1e-3,
+                                         r.self_us * 1e-3, r.module)
+              for r in records]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    '''
+    Run module (first argument) as ``__main__`` with remaining arguments,
+    reporting import times to ``stderr``.
+    '''
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        raise SystemExit('usage: python -m jupyter_helpers.importtime <module>'
+                         ' [args...]')
+    sys.argv = argv[:]
+    install()
+    runpy.run_module(argv[0], run_name='__main__', alter_sys=True)
+
+
+if __name__ == '__main__':
+    main()
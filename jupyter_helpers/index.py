@@ -0,0 +1,393 @@
+# coding: utf-8
+'''
+Incremental index of notebook files in a directory tree.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from bisect import bisect_left
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from threading import RLock
+import io
+import json
+import os
+import re
+
+from path_helpers import path
+
+try:
+    from os import scandir
+except ImportError:
+    # Python < 3.5.
+    from scandir import scandir
+
+from .nbstream import Capture, NotebookStream
+
+
+#: Indexed notebook file.
+NotebookEntry = namedtuple('NotebookEntry', 'path size mtime kernel_name')
+
+#: Number of bytes at end of notebook file searched for kernel name.
+TAIL_SIZE = 1 << 16
+
+# Notebook metadata (e.g., kernelspec) follows the cells when keys are sorted,
+# as written by nbformat.
+CRE_KERNEL_NAME = re.compile(br'"kernelspec"\s*:\s*\{[^{}]*?"name"\s*:\s*'
+                             br'("(?:[^"\\]|\\.)*")')
+
+
+class _NullSink(object):
+    def write(self, text):
+        pass
+
+
+class _KernelNameCapture(Capture):
+    def __init__(self, stream, out):
+        super(_KernelNameCapture, self).__init__(out, 1 << 10, spill=False)
+        self.stream = stream
+
+    def finish(self):
+        if not self.overflowed:
+            self.stream.kernel_name = json.loads(self.text())
+
+
+class _KernelNameStream(NotebookStream):
+    def __init__(self, input_):
+        super(_KernelNameStream, self).__init__(input_, _NullSink())
+        self.kernel_name = None
+
+    def capture(self, path_, out):
+        if path_ == ('metadata', 'kernelspec', 'name'):
+            return _KernelNameCapture(self, out)
+        return super(_KernelNameStream, self).capture(path_, out)
+
+
+def kernel_name(notebook_path, size=None):
+    '''
+    Parameters
+    ----------
+    notebook_path : str
+        Notebook file path.
+    size : int, optional
+        Size of notebook file, if known.
+
+    Returns
+    -------
+    str or None
+        Name of kernel in notebook metadata, or ``None`` if not set.
+
+        The end of the notebook file is searched first, which is where the
+        notebook metadata is written by ``nbformat``.  Otherwise, the whole
+        notebook file is streamed (see :mod:`jupyter_helpers.nbstream`), but
+        never loaded into memory.
+    '''
+    if size is None:
+        size = os.path.getsize(notebook_path)
+    with open(notebook_path, 'rb') as input_:
+        input_.seek(max(size - TAIL_SIZE, 0))
+        match = CRE_KERNEL_NAME.search(input_.read())
+    if match:
+        return json.loads(match.group(1).decode('utf8'))
+    try:
+        with io.open(notebook_path, 'r', encoding='utf8', newline='') as input_:
+            stream = _KernelNameStream(input_)
+            stream.run()
+        return stream.kernel_name
+    except ValueError:
+        # Not a valid notebook file.
+        return None
+
+
+def _scan(directory):
+    '''
+    Returns
+    -------
+    mtime : float
+        Modification time of directory.
+    entries : list
+        :data:`NotebookEntry` of each notebook file in directory.
+    subdirectories : list
+        Paths of (non-hidden) subdirectories.
+    '''
+    mtime = os.stat(directory).st_mtime
+    entries = []
+    subdirectories = []
+    for entry in scandir(directory):
+        if entry.name.startswith('.'):
+            # Skip hidden files and directories (e.g., checkpoints).
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(path(entry.path))
+            elif entry.name.endswith('.ipynb') and entry.is_file():
+                stat = entry.stat()
+                entries.append(NotebookEntry(path(entry.path), stat.st_size,
+                                             stat.st_mtime,
+                                             kernel_name(entry.path,
+                                                         stat.st_size)))
+        except (IOError, OSError):
+            # File was removed during scan.
+            continue
+    return mtime, entries, subdirectories
+
+
+class NotebookIndex(object):
+    '''
+    Index of notebook (i.e., ``.ipynb``) files in a directory tree.
+
+    The tree is walked once, scanning directories concurrently, which mostly
+    hides latency on network file systems.  Afterwards, the index is updated
+    incrementally, either by checking modification times (see
+    :meth:`refresh`) or from a list of changed paths (see
+    :meth:`update_paths`).
+
+    Hidden files and directories (i.e., names starting with ``.``) are
+    skipped.
+
+    Look up a notebook by path in constant time (e.g., ``index[path]``), list
+    notebooks in a subdirectory in logarithmic time (see :meth:`under`), and
+    list notebooks using a kernel without scanning the index (see
+    :meth:`by_kernel`).
+
+    Parameters
+    ----------
+    root : str
+        Root directory of tree.
+    workers : int, optional
+        Maximum number of directories to scan concurrently.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, root, workers=8):
+        self.root = path(root).abspath()
+        self.workers = workers
+        self._entries = {}
+        # Modification time of each scanned directory.
+        self._directories = {}
+        self._kernels = {}
+        self._sorted = None
+        self._lock = RLock()
+        self.build()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.paths())
+
+    def __contains__(self, notebook_path):
+        return path(notebook_path).abspath() in self._entries
+
+    def __getitem__(self, notebook_path):
+        return self._entries[path(notebook_path).abspath()]
+
+    def get(self, notebook_path, default=None):
+        return self._entries.get(path(notebook_path).abspath(), default)
+
+    def paths(self):
+        '''
+        Returns
+        -------
+        list
+            Sorted paths of indexed notebooks.
+        '''
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self._entries)
+            return self._sorted
+
+    def under(self, directory):
+        '''
+        Parameters
+        ----------
+        directory : str
+            Directory in tree.
+
+        Returns
+        -------
+        list
+            :data:`NotebookEntry` of each notebook in directory tree, sorted by
+            path.
+        '''
+        prefix = path(directory).abspath().joinpath('')
+        paths = self.paths()
+        entries = []
+        for i in range(bisect_left(paths, prefix), len(paths)):
+            if not paths[i].startswith(prefix):
+                break
+            entries.append(self._entries[paths[i]])
+        return entries
+
+    def by_kernel(self, kernel_name):
+        '''
+        Returns
+        -------
+        list
+            :data:`NotebookEntry` of each notebook using kernel, sorted by path.
+        '''
+        with self._lock:
+            return [self._entries[p]
+                    for p in sorted(self._kernels.get(kernel_name, ()))]
+
+    def _add(self, entry):
+        self._remove(entry.path)
+        self._entries[entry.path] = entry
+        self._kernels.setdefault(entry.kernel_name, set()).add(entry.path)
+        self._sorted = None
+
+    def _remove(self, notebook_path):
+        entry = self._entries.pop(notebook_path, None)
+        if entry is not None:
+            self._kernels[entry.kernel_name].discard(notebook_path)
+            self._sorted = None
+
+    def _remove_tree(self, directory):
+        prefix = directory.joinpath('')
+        for directory_i in [d for d in self._directories
+                            if d == directory or d.startswith(prefix)]:
+            del self._directories[directory_i]
+        for entry in self.under(directory):
+            self._remove(entry.path)
+
+    def _walk(self, directories):
+        '''
+        Scan directories and their subdirectories concurrently.
+        '''
+        pool = ThreadPool(self.workers)
+        try:
+            while directories:
+                results = pool.map(_scan_or_none, directories)
+                subdirectories = []
+                with self._lock:
+                    for directory, result in zip(directories, results):
+                        if result is None:
+                            # Directory was removed.
+                            self._remove_tree(directory)
+                            continue
+                        mtime, entries, subdirectories_i = result
+                        if directory in self._directories:
+                            # Directory was scanned before; drop notebooks and
+                            # subdirectories which are no longer in it.
+                            found = set(entry.path for entry in entries)
+                            for entry in self.under(directory):
+                                if (entry.path.parent == directory and
+                                        entry.path not in found):
+                                    self._remove(entry.path)
+                            for directory_i in [d for d in self._directories
+                                                if d.parent == directory and
+                                                d not in subdirectories_i]:
+                                self._remove_tree(directory_i)
+                        self._directories[directory] = mtime
+                        for entry in entries:
+                            self._add(entry)
+                        subdirectories.extend(d for d in subdirectories_i
+                                              if d not in self._directories)
+                directories = subdirectories
+        finally:
+            pool.close()
+            pool.join()
+
+    def build(self):
+        '''
+        Index directory tree from scratch.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._directories.clear()
+            self._kernels.clear()
+            self._sorted = None
+        self._walk([self.root])
+
+    def refresh(self):
+        '''
+        Update index by checking modification times.
+
+        Directories which changed (i.e., files added, removed or renamed) are
+        scanned again.  Indexed notebooks which changed are read again.
+        '''
+        with self._lock:
+            directories = list(self._directories.items())
+            entries = list(self._entries.values())
+        pool = ThreadPool(self.workers)
+        try:
+            directory_mtimes = pool.map(_mtime_or_none,
+                                        [d for d, mtime in directories])
+            changed = [d for (d, mtime), mtime_i in zip(directories,
+                                                        directory_mtimes)
+                       if mtime_i != mtime]
+            stats = pool.map(_stat_or_none, [e.path for e in entries])
+        finally:
+            pool.close()
+            pool.join()
+        modified = [entry.path for entry, stat in zip(entries, stats)
+                    if stat is not None and
+                    (stat.st_size, stat.st_mtime) != (entry.size, entry.mtime)]
+        self._walk(changed)
+        self.update_paths(modified)
+
+    def update_paths(self, paths):
+        '''
+        Update index for changed paths, e.g., as reported by a file system
+        watcher.
+
+        Parameters
+        ----------
+        paths : list or None
+            Paths of files or directories in tree which were created, modified
+            or removed.  If ``None`` (e.g., changes may have been missed), check
+            modification times of whole tree instead (see :meth:`refresh`).
+        '''
+        if paths is None:
+            self.refresh()
+            return
+        directories = []
+        for path_i in paths:
+            path_i = path(path_i).abspath()
+            if not (path_i == self.root or
+                    path_i.startswith(self.root.joinpath(''))):
+                continue
+            if path_i.isdir():
+                directories.append(path_i)
+            elif path_i.endswith('.ipynb') and path_i.isfile():
+                if path_i.parent not in self._directories:
+                    # Notebook in directory which is not indexed (e.g.,
+                    # hidden).
+                    continue
+                try:
+                    stat = path_i.stat()
+                    entry = NotebookEntry(path_i, stat.st_size, stat.st_mtime,
+                                          kernel_name(path_i, stat.st_size))
+                except (IOError, OSError):
+                    continue
+                with self._lock:
+                    self._add(entry)
+            else:
+                with self._lock:
+                    self._remove(path_i)
+                    self._remove_tree(path_i)
+        directories = [d for d in directories
+                       if d.parent in self._directories or d == self.root]
+        self._walk(directories)
+
+
+def _scan_or_none(directory):
+    try:
+        return _scan(directory)
+    except (IOError, OSError):
+        return None
+
+
+def _mtime_or_none(directory):
+    try:
+        return os.stat(directory).st_mtime
+    except (IOError, OSError):
+        return None
+
+
+def _stat_or_none(file_path):
+    try:
+        return os.stat(file_path)
+    except (IOError, OSError):
+        return None
@@ -0,0 +1,178 @@
+# coding: utf-8
+'''
+Jupyter notebook server running inside the current Python interpreter.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from threading import Event, Thread
+import logging
+import os
+import time
+import traceback
+
+from notebook.notebookapp import NotebookApp
+from tornado import ioloop
+
+from .notebook import NotebookStartupError, Session, classify_startup_error
+
+
+class ThreadedNotebookApp(NotebookApp):
+    '''
+    Notebook application which may be started from a thread other than the
+    main thread.
+
+    Note that the class name must not start with an underscore, since it is
+    used as a config section name.
+    '''
+    def init_signal(self):
+        # Signal handlers may only be installed from the main thread, and the
+        # host application owns process signals anyway.
+        pass
+
+
+class _LineHandler(logging.Handler):
+    # Collect formatted log records as output lines (e.g., to classify
+    # startup errors).
+    def __init__(self, lines):
+        super(_LineHandler, self).__init__()
+        self.lines = lines
+
+    def emit(self, record):
+        self.lines.append(self.format(record) + '\n')
+
+
+class InProcessSession(Session):
+    '''
+    This class provides the same API as :class:`Session`, but runs the
+    notebook server in the current interpreter on a dedicated thread with its
+    own IO loop.
+
+    This avoids the cost of creating a new process and re-importing the
+    notebook server modules, e.g., when embedding a notebook server in a GUI
+    application.
+
+    Arguments are the same as for :class:`Session`, except that ``zygote``,
+    ``importtime``, ``profile`` and ``kernel_zygote`` are not supported.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, *args, **kwargs):
+        super(InProcessSession, self).__init__(*args, **kwargs)
+        self.app = None
+        self.io_loop = None
+        self._error = None
+
+    def start(self, *args, **kwargs):
+        '''
+        Launch Jupyter notebook server in background thread.
+
+        Arguments are appended to the notebook server command line arguments.
+
+        Keyword arguments are not supported, since no process is created.
+
+        Relaunch on a fresh port (up to :attr:`retries` times) on port
+        conflicts.
+
+        Raises
+        ------
+        ValueError
+            If keyword arguments or options which require a new process
+            (``zygote``, ``importtime``, ``profile`` or ``kernel_zygote``) are
+            specified.
+        '''
+        if kwargs:
+            raise ValueError('Keyword arguments are not supported by in-process'
+                             ' sessions: %s' % ', '.join(sorted(kwargs)))
+        if self.zygote is not None:
+            raise ValueError('Zygotes are not supported by in-process '
+                             'sessions, since no process is launched.')
+        if self.importtime:
+            raise ValueError('Import time profiling is not supported by '
+                             'in-process sessions, since the notebook server '
+                             'modules are imported already.')
+        if self.profile is not None:
+            raise ValueError('Launch profiles are not supported by in-process '
+                             'sessions, since they modify the environment.')
+        if self.kernel_zygote is not None:
+            raise ValueError('Kernel zygotes are not supported by in-process '
+                             'sessions, since they modify the environment.')
+        super(InProcessSession, self).start(*args)
+
+    def _start(self, *args):
+        launch_time = time.time()
+        argv = list(self.args + tuple(args))
+        ready = Event()
+        self._error = None
+        self.stderr_lines = []
+        # Collect server log output during startup.
+        handler = _LineHandler(self.stderr_lines)
+        loggers = []
+
+        def run():
+            try:
+                try:
+                    # Tornado >= 5 on Python 3 runs on an `asyncio` loop,
+                    # which must be created explicitly in a new thread.
+                    import asyncio
+                except ImportError:
+                    pass
+                else:
+                    asyncio.set_event_loop(asyncio.new_event_loop())
+                self.io_loop = ioloop.IOLoop()
+                self.io_loop.make_current()
+                app = ThreadedNotebookApp()
+                loggers.append(app.log)
+                app.log.addHandler(handler)
+                app.initialize(argv)
+                self.app = app
+                self.io_loop.add_callback(ready.set)
+                app.start()
+            except BaseException:
+                self._error = traceback.format_exc()
+            finally:
+                ready.set()
+                if self.io_loop is not None:
+                    self.io_loop.close(all_fds=True)
+
+        self.thread = Thread(target=run)
+        self.thread.daemon = self.daemon
+        self.thread.start()
+
+        try:
+            if not ready.wait(self.timeout_s):
+                raise RuntimeError('Timed out waiting for notebook server to '
+                                   'launch.')
+        finally:
+            for log in loggers:
+                log.removeHandler(handler)
+        if self._error is not None or not self.thread.is_alive():
+            self.thread.join()
+            lines = (self.stderr_lines +
+                     (self._error or '').splitlines(True))
+            raise NotebookStartupError(classify_startup_error(lines) or
+                                       'exited', lines)
+
+        self.address = self.app.connection_url
+        self.port = self.app.port
+        self.token = self.app.token
+        self._notebook_dir = os.path.abspath(self.app.notebook_dir)
+        self.startup_duration_s = time.time() - launch_time
+
+    def stop(self):
+        '''
+        Stop the notebook server and shut down its kernels, if running.
+        '''
+        if self.daemon and self.app is not None:
+            self._stop_kernel_pool()
+            if self.thread.is_alive():
+                self.app.stop()
+                self.thread.join(self.timeout_s)
+            self.app = None
+            self.io_loop = None
+            self.thread = None
+        self.stop_watcher()
+        self.close_search_indexes()
+        self.close_client()
+        self._stop_mirror()
@@ -0,0 +1,391 @@
+# coding: utf-8
+'''
+Zygote process for launching IPython kernels by forking a parent process
+which has already imported the kernel modules and a configurable list of
+other modules (e.g., ``numpy``, ``pandas`` and ``matplotlib``).
+
+Forked kernels skip those imports, and share the memory pages of the imported
+modules with the zygote process (copy-on-write).
+
+A :class:`KernelZygote` is exposed to notebook servers as a kernel spec (see
+:meth:`KernelZygote.env`).  The kernel spec runs a small launcher process,
+which asks the zygote to fork a kernel for its connection file, forwards
+signals (e.g., interrupts) to the forked kernel, and exits when the kernel
+exits.  The forked kernel exits when the launcher is killed.
+
+Only supported on POSIX platforms (requires :func:`os.fork`).
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+
+#: Modules always imported by the zygote process before forking kernels.
+KERNEL_MODULES = ('ipykernel.kernelapp', 'IPython.core.interactiveshell')
+
+#: Interval to check whether kernel (or launcher) process is still running at.
+POLL_INTERVAL_S = .25
+
+
+class KernelZygote(object):
+    '''
+    Handle to a background process which forks IPython kernels.
+
+    Parameters
+    ----------
+    modules : list, optional
+        Names of modules to import in zygote process before forking kernels,
+        in addition to :data:`KERNEL_MODULES`.  Modules which fail to import
+        are skipped (see :attr:`failed_modules`).
+    kernel_name : str, optional
+        Name of kernel spec of forked kernels (default: name of native IPython
+        kernel, e.g., ``python2``, i.e., forked kernels replace the native
+        kernel).
+    display_name : str, optional
+        Display name of kernel spec.
+
+    Example
+    -------
+
+        >>> zygote = KernelZygote(['numpy', 'pandas', 'matplotlib.pyplot'])
+        >>> session = Session(kernel_zygote=zygote)
+
+    See also
+    --------
+    Session, SessionManager
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, modules=(), kernel_name=None, display_name=None):
+        self.modules = tuple(modules)
+        if kernel_name is None:
+            kernel_name = 'python%d' % sys.version_info[0]
+        self.kernel_name = kernel_name
+        self.display_name = display_name or ('Python %d (preloaded)' %
+                                             sys.version_info[0])
+        self.process = None
+        #: Temporary data directory containing kernel spec and socket.
+        self.data_dir = None
+        #: Modules which failed to import in zygote process.
+        self.failed_modules = []
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        '''
+        Launch zygote process, wait until the modules have been imported, and
+        write kernel spec.
+        '''
+        import shutil
+        import tempfile
+        from subprocess import Popen, PIPE
+
+        from .notebook import package_env
+
+        if not hasattr(os, 'fork'):
+            raise OSError('Forking kernels is only supported on POSIX '
+                          'platforms.')
+        with self._lock:
+            if self.is_alive():
+                return
+            self.stop()
+            data_dir = tempfile.mkdtemp(prefix='jupyter-kernel-zygote-')
+            try:
+                socket_path = os.path.join(data_dir, 'zygote.sock')
+                python_exe = os.environ.get('PYTHONEXEPATH', sys.executable)
+                args = ((python_exe, '-m', 'jupyter_helpers.kernel_zygote',
+                         'serve', socket_path) + KERNEL_MODULES +
+                        self.modules)
+                process = Popen(args, stdin=PIPE, stdout=PIPE, close_fds=True,
+                                env=package_env())
+                response = process.stdout.readline()
+                if not response.startswith(b'ready'):
+                    process.stdin.close()
+                    process.wait()
+                    raise RuntimeError('Kernel zygote process failed to start:'
+                                       ' %r' % response)
+                self.failed_modules = json.loads(response[len(b'ready'):]
+                                                 .decode('utf8'))
+
+                package_parent = \
+                    os.path.dirname(os.path.dirname(os.path
+                                                    .abspath(__file__)))
+                kernel_dir = os.path.join(data_dir, 'kernels',
+                                          self.kernel_name)
+                os.makedirs(kernel_dir)
+                spec = {'argv': [python_exe, '-c', 'import sys; '
+                                 'sys.path.insert(0, %r); '
+                                 'from jupyter_helpers.kernel_zygote import '
+                                 'launch; launch(sys.argv[1:])' %
+                                 package_parent, socket_path,
+                                 '{connection_file}'],
+                        'display_name': self.display_name,
+                        'language': 'python'}
+                with open(os.path.join(kernel_dir, 'kernel.json'), 'w') as \
+                        output:
+                    json.dump(spec, output, indent=1)
+            except Exception:
+                shutil.rmtree(data_dir, ignore_errors=True)
+                raise
+            self.process = process
+            self.data_dir = data_dir
+
+    def env(self, env=None):
+        '''
+        Parameters
+        ----------
+        env : dict, optional
+            Base environment (defaults to current environment).
+
+        Returns
+        -------
+        dict
+            Copy of environment for notebook server with kernel spec of
+            zygote first in ``JUPYTER_PATH`` (the zygote process is started,
+            if necessary).
+        '''
+        self.start()
+        env = dict(os.environ if env is None else env)
+        env['JUPYTER_PATH'] = os.pathsep.join([self.data_dir] +
+                                              [p for p in
+                                               [env.get('JUPYTER_PATH')]
+                                               if p])
+        return env
+
+    def stop(self):
+        '''
+        Stop zygote process and remove kernel spec (kernels forked from it
+        keep running until shut down by their notebook server).
+        '''
+        import shutil
+
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.stdin.close()
+                self.process.wait()
+            self.process = None
+        if self.data_dir is not None:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+            self.data_dir = None
+
+    def __del__(self):
+        try:
+            self.stop()
+        except Exception:
+            pass
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def _watch_launcher(pid):
+    # Launcher is not the parent of the kernel, so its exit (e.g., when killed
+    # by the kernel manager) must be detected by polling.
+    while _is_running(pid):
+        time.sleep(POLL_INTERVAL_S)
+    os._exit(1)
+
+
+def _fork_kernel(request, close_fds=()):
+    '''
+    Fork an IPython kernel according to a request from a launcher.
+
+    Parameters
+    ----------
+    request : dict
+        Kernel launch request.
+    close_fds : list, optional
+        File descriptors of zygote process to close in kernel process.
+
+    Returns
+    -------
+    int
+        Process ID of forked kernel.
+    '''
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Forked kernel process.
+    code = 1
+    try:
+        for fd in close_fds:
+            os.close(fd)
+        os.setsid()
+        # Kernels must be able to wait for their own subprocesses.
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        for fd, output_path in ((1, request['stdout']),
+                                (2, request['stderr'])):
+            output = os.open(output_path, os.O_WRONLY)
+            os.dup2(output, fd)
+            os.close(output)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = ['ipykernel_launcher'] + request['args']
+
+        # Do not share random state with other forked kernels.
+        import random
+
+        random.seed()
+        if 'numpy' in sys.modules:
+            sys.modules['numpy'].random.seed()
+
+        watcher = threading.Thread(target=_watch_launcher,
+                                   args=(request['launcher_pid'], ))
+        watcher.daemon = True
+        watcher.start()
+
+        from ipykernel.kernelapp import IPKernelApp
+
+        IPKernelApp.launch_instance(argv=request['args'])
+        code = 0
+    except SystemExit as exception:
+        if exception.code is None:
+            code = 0
+        elif isinstance(exception.code, int):
+            code = exception.code
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve(socket_path, modules):
+    '''
+    Zygote process main loop.
+
+    Import the specified modules, then fork a kernel for each JSON request
+    line received on the socket, replying with the process ID of the forked
+    kernel.  Exits when ``stdin`` is closed.
+    '''
+    import importlib
+    import gc
+
+    failed = []
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            failed.append(module_name)
+    if hasattr(gc, 'freeze'):
+        # Python >= 3.7: keep garbage collector from touching (i.e., copying)
+        # pages of objects allocated so far in forked kernels.
+        gc.collect()
+        gc.freeze()
+    # Forked kernels are reaped automatically.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen(16)
+    sys.stdout.write('ready%s\n' % json.dumps(failed))
+    sys.stdout.flush()
+    try:
+        while True:
+            try:
+                ready, _, _ = select.select([listener, sys.stdin], [], [])
+            except select.error:
+                # Interrupted by `SIGCHLD`.
+                continue
+            if sys.stdin in ready and not sys.stdin.readline():
+                # Handle was stopped (or its process exited).
+                break
+            if listener in ready:
+                connection, _ = listener.accept()
+                try:
+                    request = json.loads(connection.makefile('r').readline())
+                    try:
+                        response = {'pid':
+                                    _fork_kernel(request,
+                                                 [listener.fileno(),
+                                                  connection.fileno()])}
+                    except Exception as exception:
+                        response = {'error': str(exception)}
+                    connection.sendall(json.dumps(response).encode('utf8') +
+                                       b'\n')
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    connection.close()
+    finally:
+        listener.close()
+
+
+def launch(args):
+    '''
+    Kernel launcher main function, run by the kernel manager of the notebook
+    server with the arguments ``<socket path> <connection file>``.
+
+    Ask zygote to fork a kernel, forward signals to it, and exit when it
+    exits.  The kernel is terminated if the notebook server exits (as
+    ``ipykernel`` does for kernels launched directly).
+    '''
+    socket_path, connection_file = args
+    stdio = ['/proc/%d/fd/%d' % (os.getpid(), fd) for fd in (1, 2)]
+    if not all(os.path.exists(path_i) for path_i in stdio):
+        stdio = [os.devnull] * 2
+    request = {'args': ['-f', connection_file], 'cwd': os.getcwd(),
+               'env': dict(os.environ), 'stdout': stdio[0],
+               'stderr': stdio[1], 'launcher_pid': os.getpid()}
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode('utf8') + b'\n')
+        response = json.loads(connection.makefile('r').readline())
+    finally:
+        connection.close()
+    if 'error' in response:
+        sys.stderr.write('Kernel zygote failed to fork kernel: %s\n' %
+                         response['error'])
+        sys.exit(1)
+    pid = response['pid']
+
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP,
+                   signal.SIGQUIT, signal.SIGUSR1, signal.SIGUSR2):
+        signal.signal(signum, forward)
+    parent_pid = int(os.environ.get('JPY_PARENT_PID') or 0)
+    while _is_running(pid):
+        if parent_pid and not _is_running(parent_pid):
+            forward(signal.SIGTERM, None)
+            break
+        time.sleep(POLL_INTERVAL_S)
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == 'serve':
+        serve(sys.argv[2], sys.argv[3:])
+    else:
+        launch(sys.argv[2:])
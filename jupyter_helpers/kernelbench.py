@@ -0,0 +1,317 @@
+# coding: utf-8
+'''
+Benchmark round-trip latency and throughput of kernels of a running notebook
+server, e.g., for capacity planning.
+
+Concurrent clients send ``execute``, ``complete`` and ``inspect`` requests
+over kernel websockets (see :class:`jupyter_helpers.execute.KernelConnection`)
+and time each request until its reply (and, for ``execute`` requests, until
+the kernel is idle again)::
+
+    python -m jupyter_helpers.kernelbench http://localhost:8888/ \\
+        --token <token> --kernels 4 --clients 2 --duration 30
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import namedtuple
+from threading import Thread
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+#: Default fraction of each type of request.
+DEFAULT_MIX = {'execute': .6, 'complete': .2, 'inspect': .2}
+
+#: Latency statistics of requests of one type (latencies in seconds).
+LatencyStats = namedtuple('LatencyStats', 'name count errors throughput '
+                          'mean_s p50_s p90_s p99_s max_s')
+
+
+def percentile(values, p):
+    '''
+    Parameters
+    ----------
+    values : list
+        Sorted values.
+    p : float
+        Percentile (between 0 and 100).
+
+    Returns
+    -------
+    float or None
+        Percentile of values (linearly interpolated between closest ranks),
+        or ``None`` if there are no values.
+    '''
+    if not values:
+        return None
+    rank = (len(values) - 1) * p / 100.
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize(name, latencies, errors, duration_s):
+    '''
+    Parameters
+    ----------
+    name : str
+        Type of requests.
+    latencies : list
+        Latency of each successful request, in seconds.
+    errors : int
+        Number of failed requests.
+    duration_s : float
+        Duration of benchmark.
+
+    Returns
+    -------
+    LatencyStats
+    '''
+    latencies = sorted(latencies)
+    count = len(latencies) + errors
+    return LatencyStats(name, count, errors,
+                        len(latencies) / duration_s if duration_s else None,
+                        sum(latencies) / len(latencies) if latencies else None,
+                        percentile(latencies, 50), percentile(latencies, 90),
+                        percentile(latencies, 99),
+                        latencies[-1] if latencies else None)
+
+
+def aggregate(results, names, duration_s):
+    '''
+    Parameters
+    ----------
+    results : list
+        ``(latencies, errors)`` of each client, where ``latencies`` maps each
+        type of request to the latencies of successful requests (in seconds)
+        and ``errors`` maps each type of request to the number of failed
+        requests.
+    names : list
+        Types of requests.
+    duration_s : float
+        Duration of benchmark.
+
+    Returns
+    -------
+    list
+        :data:`LatencyStats` of each type of request (requests of all clients
+        combined), followed by statistics of all requests (named ``all``).
+    '''
+    latencies = dict((name, sum((r[0][name] for r in results), []))
+                     for name in names)
+    errors = dict((name, sum(r[1][name] for r in results)) for name in names)
+    stats = [summarize(name, latencies[name], errors[name], duration_s)
+             for name in names]
+    stats.append(summarize('all', sum(latencies.values(), []),
+                           sum(errors.values()), duration_s))
+    return stats
+
+
+def format_report(stats):
+    '''
+    Parameters
+    ----------
+    stats : list
+        List of :data:`LatencyStats` records.
+
+    Returns
+    -------
+    str
+        Statistics formatted as a text table (latencies in milliseconds).
+    '''
+    def ms(value):
+        return '%9s' % '-' if value is None else '%9.2f' % (value * 1e3)
+
+    lines = ['%-12s %8s %7s %7s %9s %9s %9s %9s %9s %9s' %
+             ('request', 'count', 'errors', 'error%', 'req/s', 'mean', 'p50',
+              'p90', 'p99', 'max')]
+    for s in stats:
+        lines.append('%-12s %8d %7d %7.1f %9s %s %s %s %s %s' %
+                     (s.name, s.count, s.errors,
+                      100. * s.errors / s.count if s.count else 0,
+                      '-' if s.throughput is None else
+                      '%.1f' % s.throughput, ms(s.mean_s), ms(s.p50_s),
+                      ms(s.p90_s), ms(s.p99_s), ms(s.max_s)))
+    return '\n'.join(lines)
+
+
+def _send(connection, msg_type, code, timeout):
+    '''
+    Send request to kernel and wait for reply.
+
+    Returns
+    -------
+    bool
+        ``True`` if kernel replied with ``ok`` status.
+    '''
+    if msg_type == 'execute':
+        result = connection.execute(code, timeout=timeout,
+                                    store_history=False)
+        return result['status'] == 'ok'
+    content = {'code': code, 'cursor_pos': len(code)}
+    if msg_type == 'inspect':
+        content['detail_level'] = 0
+    reply = connection.request('%s_request' % msg_type, content,
+                               timeout=timeout)
+    return reply['content']['status'] == 'ok'
+
+
+def benchmark_kernels(client, kernels=1, clients=1, duration_s=10,
+                      mix=None, code='pass', complete_code='import o',
+                      inspect_code='len', kernel_name=None, kernel_ids=None,
+                      timeout_s=30):
+    '''
+    Benchmark kernels of a notebook server.
+
+    Parameters
+    ----------
+    client : jupyter_helpers.client.NotebookClient
+        Client of notebook server (e.g., :attr:`Session.client`).
+    kernels : int, optional
+        Number of kernels to start for benchmark (shut down afterwards).
+    clients : int, optional
+        Number of concurrent clients (each with its own websocket
+        connection) per kernel.
+    duration_s : float, optional
+        Time to send requests for.
+    mix : dict, optional
+        Relative frequency of ``execute``, ``complete`` and ``inspect``
+        requests (default: :data:`DEFAULT_MIX`).
+    code : str, optional
+        Code to execute.
+    complete_code, inspect_code : str, optional
+        Code to request completions for and to inspect (at the end of the
+        code).
+    kernel_name : str, optional
+        Kernel spec name of kernels to start (default: default kernel spec of
+        server).
+    kernel_ids : list, optional
+        IDs of running kernels to benchmark instead of starting kernels
+        (these are not shut down).
+    timeout_s : float, optional
+        Time to wait for each reply (requests timing out count as errors).
+
+    Returns
+    -------
+    list
+        :data:`LatencyStats` of each type of request, followed by statistics
+        of all requests (named ``all``).
+    '''
+    from .execute import KernelConnection
+
+    mix = DEFAULT_MIX if mix is None else mix
+    names = sorted(name for name, weight in mix.items() if weight > 0)
+    weights = [mix[name] for name in names]
+    codes = {'execute': code, 'complete': complete_code,
+             'inspect': inspect_code}
+
+    started = []
+    connections = []
+    try:
+        if kernel_ids is None:
+            for i in range(kernels):
+                started.append(client.kernels.start(kernel_name)['id'])
+            kernel_ids = started
+        for kernel_id in kernel_ids:
+            for i in range(clients):
+                connections.append(KernelConnection(client, kernel_id,
+                                                    timeout_s=timeout_s))
+        # Latencies and error counts by request type, of each client.
+        results = [(dict((name, []) for name in names),
+                    dict((name, 0) for name in names))
+                   for connection in connections]
+        deadline = time.time() + duration_s
+
+        def run(connection, latencies, errors, seed):
+            generator = random.Random(seed)
+            while time.time() < deadline:
+                msg_type = _choose(generator, names, weights)
+                start = time.time()
+                try:
+                    ok = _send(connection, msg_type, codes[msg_type],
+                               timeout_s)
+                except Exception:
+                    logger.debug('Error sending `%s` request.', msg_type,
+                                 exc_info=True)
+                    ok = False
+                if ok:
+                    latencies[msg_type].append(time.time() - start)
+                else:
+                    errors[msg_type] += 1
+
+        start = time.time()
+        threads = [Thread(target=run, args=(connection, ) + results[i] + (i, ))
+                   for i, connection in enumerate(connections)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed_s = time.time() - start
+    finally:
+        for connection in connections:
+            connection.close()
+        for kernel_id in started:
+            try:
+                client.kernels.shutdown(kernel_id)
+            except Exception:
+                logger.debug('Error shutting down kernel `%s`.', kernel_id,
+                             exc_info=True)
+    return aggregate(results, names, elapsed_s)
+
+
+def _choose(generator, names, weights):
+    value = generator.random() * sum(weights)
+    for name, weight in zip(names, weights):
+        value -= weight
+        if value < 0:
+            return name
+    return names[-1]
+
+
+def main(argv=None):
+    import argparse
+
+    from .client import NotebookClient
+
+    parser = argparse.ArgumentParser(description='Benchmark kernels of a '
+                                     'running notebook server.')
+    parser.add_argument('address', help='Notebook server address, e.g., '
+                        'http://localhost:8888/')
+    parser.add_argument('--token', help='Notebook server token.')
+    parser.add_argument('--kernels', type=int, default=1,
+                        help='Number of kernels (default: %(default)s).')
+    parser.add_argument('--clients', type=int, default=1,
+                        help='Number of concurrent clients per kernel '
+                        '(default: %(default)s).')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Duration in seconds (default: %(default)s).')
+    parser.add_argument('--kernel-name', help='Kernel spec name.')
+    parser.add_argument('--code', default='pass', help='Code to execute '
+                        '(default: %(default)s).')
+    for name in sorted(DEFAULT_MIX):
+        parser.add_argument('--%s' % name, type=float,
+                            default=DEFAULT_MIX[name], help='Relative '
+                            'frequency of %s requests (default: '
+                            '%%(default)s).' % name)
+    args = parser.parse_args(argv)
+
+    client = NotebookClient(args.address, args.token)
+    try:
+        stats = benchmark_kernels(client, kernels=args.kernels,
+                                  clients=args.clients,
+                                  duration_s=args.duration,
+                                  mix=dict((name, getattr(args, name))
+                                           for name in DEFAULT_MIX),
+                                  code=args.code,
+                                  kernel_name=args.kernel_name)
+    finally:
+        client.close()
+    print(format_report(stats))
+
+
+if __name__ == '__main__':
+    main()
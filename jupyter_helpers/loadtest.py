@@ -0,0 +1,204 @@
+# coding: utf-8
+'''
+HTTP load test of a running notebook server, simulating many browser clients
+listing, opening and saving notebooks.
+
+Each simulated client has its own connection pool (see
+:class:`jupyter_helpers.client.NotebookClient`) and sends requests of the
+following types, in a configurable mix:
+
+ - ``list``: list notebook directory (contents API).
+ - ``read``: read notebook (contents API).
+ - ``save``: save notebook (contents API), to a scratch directory which is
+   removed afterwards.
+ - ``tree``: fetch file browser page (``/tree``).
+ - ``static``: fetch static asset (see :data:`STATIC_ASSETS`).
+
+For example::
+
+    python -m jupyter_helpers.loadtest http://localhost:8888/ \\
+        --token <token> --clients 50 --duration 60
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from threading import Thread
+import logging
+import posixpath
+import random
+import time
+import uuid
+
+from .kernelbench import _choose, aggregate, format_report
+
+logger = logging.getLogger(__name__)
+
+#: Default fraction of each type of request.
+DEFAULT_MIX = {'list': .3, 'read': .3, 'save': .1, 'tree': .1, 'static': .2}
+
+#: Static assets fetched by ``static`` requests (paths relative to server
+#: address).
+STATIC_ASSETS = ('static/style/style.min.css',
+                 'static/components/requirejs/require.js',
+                 'static/tree/js/main.min.js',
+                 'static/base/images/logo.png')
+
+
+def _scratch_notebook(cells):
+    import nbformat
+
+    return nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(
+        'x = %d\nprint(x)' % i, outputs=[nbformat.v4.new_output(
+            'stream', text='%d\n' % i)]) for i in range(cells)])
+
+
+def _send(client, request_type, generator, notebooks, scratch_path):
+    if request_type == 'list':
+        client.contents.list(generator.choice(notebooks['directories']))
+    elif request_type == 'read':
+        client.contents.get(generator.choice(notebooks['paths']))
+    elif request_type == 'save':
+        client.contents.save(scratch_path, {'type': 'notebook',
+                                            'content': notebooks['scratch']})
+    else:
+        url = (client.address + 'tree/' if request_type == 'tree' else
+               client.address + generator.choice(STATIC_ASSETS))
+        response = client.http.get(url, timeout=client.timeout_s)
+        response.raise_for_status()
+
+
+def load_test(address, token=None, clients=10, duration_s=10, mix=None,
+              directory='', cells=20, timeout_s=30):
+    '''
+    Run load test against a notebook server.
+
+    Parameters
+    ----------
+    address : str
+        Base URL of notebook server.
+    token : str, optional
+        Notebook server token.
+    clients : int, optional
+        Number of concurrent clients.
+    duration_s : float, optional
+        Time to send requests for.
+    mix : dict, optional
+        Relative frequency of each type of request (default:
+        :data:`DEFAULT_MIX`).
+    directory : str, optional
+        Directory (relative to notebook directory) to list and read notebooks
+        in.  If it contains no notebooks, the scratch notebooks are read.
+    cells : int, optional
+        Number of cells of saved (scratch) notebooks.
+    timeout_s : float, optional
+        Time to wait for each response (requests timing out count as
+        errors).
+
+    Returns
+    -------
+    list
+        :data:`jupyter_helpers.kernelbench.LatencyStats` of each type of
+        request, followed by statistics of all requests (named ``all``).
+    '''
+    from .client import NotebookClient
+
+    mix = DEFAULT_MIX if mix is None else mix
+    names = sorted(name for name, weight in mix.items() if weight > 0)
+    weights = [mix[name] for name in names]
+
+    client = NotebookClient(address, token, timeout_s=timeout_s)
+    scratch_dir = posixpath.join(directory.strip('/'),
+                                 'loadtest-%s' % uuid.uuid4().hex[:8])
+    scratch_paths = ['%s/client-%d.ipynb' % (scratch_dir, i)
+                     for i in range(clients)]
+    clients_ = []
+    try:
+        notebooks = {'scratch': _scratch_notebook(cells)}
+        client.contents.save(scratch_dir, {'type': 'directory'})
+        for scratch_path in scratch_paths:
+            client.contents.save(scratch_path,
+                                 {'type': 'notebook',
+                                  'content': notebooks['scratch']})
+        listing = client.contents.list(directory)
+        notebooks['paths'] = ([model['path'] for model in listing
+                               if model['type'] == 'notebook'] or
+                              scratch_paths)
+        notebooks['directories'] = [directory, scratch_dir]
+
+        clients_ = [NotebookClient(address, token, timeout_s=timeout_s,
+                                   retries=0) for i in range(clients)]
+        # Latencies and error counts by request type, of each client.
+        results = [(dict((name, []) for name in names),
+                    dict((name, 0) for name in names))
+                   for client_i in clients_]
+        deadline = time.time() + duration_s
+
+        def run(client_i, latencies, errors, seed):
+            generator = random.Random(seed)
+            while time.time() < deadline:
+                request_type = _choose(generator, names, weights)
+                start = time.time()
+                try:
+                    _send(client_i, request_type, generator, notebooks,
+                          scratch_paths[seed])
+                except Exception:
+                    logger.debug('Error sending `%s` request.', request_type,
+                                 exc_info=True)
+                    errors[request_type] += 1
+                else:
+                    latencies[request_type].append(time.time() - start)
+
+        start = time.time()
+        threads = [Thread(target=run, args=(client_i, ) + results[i] + (i, ))
+                   for i, client_i in enumerate(clients_)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed_s = time.time() - start
+    finally:
+        for client_i in clients_:
+            client_i.close()
+        # Directories must be empty to be deleted.
+        for path_i in scratch_paths + [scratch_dir]:
+            try:
+                client.contents.delete(path_i)
+            except Exception:
+                logger.debug('Error deleting `%s`.', path_i, exc_info=True)
+        client.close()
+    return aggregate(results, names, elapsed_s)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load test a running '
+                                     'notebook server.')
+    parser.add_argument('address', help='Notebook server address, e.g., '
+                        'http://localhost:8888/')
+    parser.add_argument('--token', help='Notebook server token.')
+    parser.add_argument('--clients', type=int, default=10,
+                        help='Number of concurrent clients (default: '
+                        '%(default)s).')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Duration in seconds (default: %(default)s).')
+    parser.add_argument('--directory', default='', help='Directory to list '
+                        'and read notebooks in.')
+    for name in sorted(DEFAULT_MIX):
+        parser.add_argument('--%s' % name, type=float,
+                            default=DEFAULT_MIX[name], help='Relative '
+                            'frequency of %s requests (default: '
+                            '%%(default)s).' % name)
+    args = parser.parse_args(argv)
+
+    stats = load_test(args.address, args.token, clients=args.clients,
+                      duration_s=args.duration,
+                      mix=dict((name, getattr(args, name))
+                               for name in DEFAULT_MIX),
+                      directory=args.directory)
+    print(format_report(stats))
+
+
+if __name__ == '__main__':
+    main()
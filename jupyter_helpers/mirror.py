@@ -0,0 +1,283 @@
+# coding: utf-8
+'''
+Mirror a directory tree in memory (i.e., on a ``tmpfs`` file system), and
+synchronize changes back to the original directory.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from threading import Event, Lock, Thread
+import errno
+import logging
+import os
+import shutil
+import tempfile
+
+from path_helpers import path
+
+from .templates import copy_file
+
+
+logger = logging.getLogger(__name__)
+
+#: Memory-backed directories to create mirrors in, in order of preference.
+TMPFS_ROOTS = ('/dev/shm', '/run/shm')
+
+
+def default_mirror_root():
+    '''
+    Returns
+    -------
+    path_helpers.path
+        First existing and writable directory in :data:`TMPFS_ROOTS`, or the
+        system temporary directory if there is none (e.g., on Windows).
+    '''
+    for root in TMPFS_ROOTS:
+        if os.path.isdir(root) and os.access(root, os.W_OK):
+            return path(root)
+    return path(tempfile.gettempdir())
+
+
+def free_bytes(directory):
+    '''
+    Returns
+    -------
+    int or None
+        Bytes available to unprivileged users on file system of directory, or
+        ``None`` if unknown.
+    '''
+    if not hasattr(os, 'statvfs'):
+        return None
+    stat = os.statvfs(directory)
+    return stat.f_bavail * stat.f_frsize
+
+
+def _tree(root):
+    '''
+    Returns
+    -------
+    files : dict
+        ``os.stat`` result of each regular file in tree, keyed by path relative
+        to root.
+    links : dict
+        Target of each symbolic link in tree, keyed by path relative to root.
+    directories : set
+        Paths of directories in tree, relative to root.
+    '''
+    files = {}
+    links = {}
+    directories = set()
+    for directory, dirnames, filenames in os.walk(root):
+        relative = os.path.relpath(directory, root)
+        relative = '' if relative == os.curdir else relative
+        subdirectories = set(dirnames)
+        dirnames[:] = []
+        for name in sorted(subdirectories) + filenames:
+            full_path = os.path.join(directory, name)
+            relpath = os.path.join(relative, name)
+            try:
+                if os.path.islink(full_path):
+                    links[relpath] = os.readlink(full_path)
+                elif name in subdirectories:
+                    directories.add(relpath)
+                    dirnames.append(name)
+                else:
+                    files[relpath] = os.stat(full_path)
+            except OSError:
+                # Removed during walk.
+                continue
+    return files, links, directories
+
+
+def _signature(stat):
+    return stat.st_size, stat.st_mtime
+
+
+class DirectoryMirror(object):
+    '''
+    Copy of a directory tree in memory, which is synchronized back to the
+    source directory on demand (see :meth:`sync`) and, optionally, in the
+    background.
+
+    Files created or modified in the mirror since the last synchronization are
+    copied to the source directory (each replaced atomically, keeping the
+    modification time of the mirror).  Files removed from the mirror are
+    removed from the source directory.  Changes made to the source directory
+    while it is mirrored are not picked up (see :meth:`pull`), and are
+    overwritten by changes to the same files in the mirror.
+
+    Symbolic links are copied as links when the mirror is created, but are not
+    synchronized.
+
+    Parameters
+    ----------
+    source : str
+        Directory to mirror.
+    root : str, optional
+        Directory to create mirror in (default: :func:`default_mirror_root`).
+    sync_interval_s : float, optional
+        If set, synchronize changes back to the source directory at this
+        interval, in a background thread.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, source, root=None, sync_interval_s=None):
+        self.source = path(source).abspath()
+        self.root = path(root) if root is not None else default_mirror_root()
+        self.sync_interval_s = sync_interval_s
+        #: Mirror directory (``None`` until :meth:`start` is called).
+        self.path = None
+        self.thread = None
+        # Size and modification time of each mirrored file as of last
+        # synchronization, keyed by relative path.
+        self._files = {}
+        self._directories = set()
+        self._lock = Lock()
+        self._stopped = Event()
+
+    def start(self):
+        '''
+        Copy source directory tree to new mirror directory.
+
+        Raises
+        ------
+        IOError
+            If the source directory does not fit in the mirror root file
+            system.
+        '''
+        if self.path is not None:
+            return
+        files, links, directories = _tree(self.source)
+        size = sum(stat.st_size for stat in files.values())
+        available = free_bytes(self.root)
+        if available is not None and size > available:
+            raise IOError(errno.ENOSPC, 'Not enough space in `%s` to mirror '
+                          '`%s` (%d bytes required, %d bytes available).' %
+                          (self.root, self.source, size, available))
+
+        mirror_path = path(tempfile.mkdtemp(prefix='jupyter-helpers-mirror-',
+                                            dir=self.root))
+        try:
+            for directory in sorted(directories):
+                mirror_path.joinpath(directory).makedirs_p()
+            for relpath, target in links.items():
+                os.symlink(target, mirror_path.joinpath(relpath))
+            with self._lock:
+                self._files.clear()
+                for relpath in files:
+                    destination = mirror_path.joinpath(relpath)
+                    shutil.copy2(self.source.joinpath(relpath), destination)
+                    self._files[relpath] = _signature(destination.stat())
+                self._directories = directories
+        except Exception:
+            shutil.rmtree(mirror_path, ignore_errors=True)
+            raise
+        self.path = mirror_path
+        if self.sync_interval_s:
+            self._stopped.clear()
+            self.thread = Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def pull(self, paths):
+        '''
+        Copy files from source directory into mirror, e.g., files written to
+        the source directory after the mirror was created.
+
+        Parameters
+        ----------
+        paths : list
+            Paths of files in source directory (absolute, or relative to
+            source directory).
+        '''
+        with self._lock:
+            for path_i in paths:
+                relpath = self.source.relpathto(self.source.joinpath(path_i))
+                destination = self.path.joinpath(relpath)
+                destination.parent.makedirs_p()
+                copy_file(self.source.joinpath(relpath), destination,
+                          strategy='copy')
+                shutil.copystat(self.source.joinpath(relpath), destination)
+                self._files[relpath] = _signature(destination.stat())
+                directory = os.path.dirname(relpath)
+                while directory:
+                    self._directories.add(directory)
+                    directory = os.path.dirname(directory)
+
+    def sync(self):
+        '''
+        Synchronize changes in mirror back to source directory.
+
+        Returns
+        -------
+        copied : int
+            Number of files copied to source directory.
+        removed : int
+            Number of files removed from source directory.
+        '''
+        if self.path is None:
+            return 0, 0
+        with self._lock:
+            files, links, directories = _tree(self.path)
+            for directory in sorted(directories - self._directories):
+                self.source.joinpath(directory).makedirs_p()
+            copied = 0
+            for relpath, stat in sorted(files.items()):
+                signature = _signature(stat)
+                if self._files.get(relpath) == signature:
+                    continue
+                source = self.path.joinpath(relpath)
+                destination = self.source.joinpath(relpath)
+                try:
+                    copy_file(source, destination, strategy='copy')
+                    shutil.copystat(source, destination)
+                except (IOError, OSError):
+                    if source.exists():
+                        raise
+                    # Removed from mirror in the meantime.
+                    continue
+                # Record size and modification time as listed, so a file
+                # modified while copying is copied again next time.
+                self._files[relpath] = signature
+                copied += 1
+            removed = 0
+            for relpath in sorted(set(self._files) - set(files)):
+                del self._files[relpath]
+                try:
+                    os.remove(self.source.joinpath(relpath))
+                    removed += 1
+                except OSError:
+                    pass
+            for directory in sorted(self._directories - directories,
+                                    reverse=True):
+                try:
+                    os.rmdir(self.source.joinpath(directory))
+                except OSError:
+                    # Not empty, e.g., files not mirrored.
+                    pass
+            self._directories = directories
+        return copied, removed
+
+    def stop(self):
+        '''
+        Stop background synchronization, synchronize changes one last time,
+        and remove mirror directory.
+        '''
+        if self.path is None:
+            return
+        if self.thread is not None:
+            self._stopped.set()
+            self.thread.join()
+            self.thread = None
+        self.sync()
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path = None
+
+    def _run(self):
+        while not self._stopped.wait(self.sync_interval_s):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception('Error synchronizing `%s` to `%s`.',
+                                 self.path, self.source)
@@ -0,0 +1,878 @@
+# coding: utf-8
+'''
+Streaming rewrites of notebook JSON files.
+
+Notebooks are copied from input to output chunk by chunk, so large values
+(e.g., base64 encoded output images) are never held in memory as a whole.
+Only values at paths selected by a :class:`NotebookStream` subclass (e.g.,
+individual cells) are captured in memory, and only up to a size limit.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import OrderedDict
+import ast
+import base64
+import io
+import json
+import os
+import re
+import uuid
+
+try:
+    from urllib import quote
+except ImportError:
+    from urllib.parse import quote
+
+
+#: Number of characters read from input at a time.
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_STRING_CHARS = re.compile(r'[^"\\]*')
+_SCALAR = re.compile(r'[^ \t\r\n,\]}]*')
+
+
+class _Reader(object):
+    def __init__(self, input_, chunk_size):
+        self.input = input_
+        self.chunk_size = chunk_size
+        self.buffer = u''
+        self.pos = 0
+
+    def _fill(self):
+        chunk = self.input.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while self.pos >= len(self.buffer):
+            if not self._fill():
+                raise ValueError('Unexpected end of notebook JSON.')
+        return self.buffer[self.pos]
+
+    def take(self):
+        c = self.peek()
+        self.pos += 1
+        return c
+
+    def copy(self, cre, out):
+        '''
+        Write run of characters matching regular expression to output,
+        possibly spanning several chunks.
+        '''
+        while True:
+            end = cre.match(self.buffer, self.pos).end()
+            if end > self.pos:
+                out.write(self.buffer[self.pos:end])
+            self.pos = end
+            if end < len(self.buffer) or not self._fill():
+                return
+
+    def match(self, cre):
+        sink = TextSink()
+        self.copy(cre, sink)
+        return sink.text()
+
+
+class TextSink(object):
+    '''
+    Output which collects written text in memory.
+    '''
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text):
+        self._parts.append(text)
+
+    def text(self):
+        return u''.join(self._parts)
+
+
+class _Prefixed(object):
+    '''
+    Output which writes a prefix before the first text written to it.
+    '''
+    def __init__(self, out, prefix):
+        self.out = out
+        self.prefix = prefix
+        self.written = False
+
+    def write(self, text):
+        if not self.written:
+            self.out.write(self.prefix)
+            self.written = True
+        self.out.write(text)
+
+
+class Capture(object):
+    '''
+    Output which collects the raw JSON text of a single value, up to a size
+    limit.
+
+    Parameters
+    ----------
+    out : file-like
+        Output to write value to.
+    limit : int
+        Maximum number of characters to hold in memory.
+    spill : bool, optional
+        If ``True``, once the limit is exceeded, write the collected text and
+        the rest of the value to the output unchanged.  Otherwise, discard the
+        rest of the value.
+
+    Attributes
+    ----------
+    size : int
+        Number of characters written to capture so far.
+    '''
+    def __init__(self, out, limit, spill=True):
+        self.out = out
+        self.limit = limit
+        self.spill = spill
+        self.overflowed = False
+        self.size = 0
+        self._parts = []
+
+    def write(self, text):
+        self.size += len(text)
+        if self.overflowed:
+            self.overflow(text)
+            return
+        self._parts.append(text)
+        if self.size > self.limit:
+            self.overflowed = True
+            if self.spill:
+                self.on_spill()
+            parts, self._parts = self._parts, None
+            for part in parts:
+                self.overflow(part)
+
+    def overflow(self, text):
+        '''
+        Called with text beyond the limit (including the text collected up to
+        the limit).
+
+        By default, write text to output if ``spill`` is ``True``, otherwise
+        discard it.
+        '''
+        if self.spill:
+            self.out.write(text)
+
+    def text(self):
+        '''
+        Returns
+        -------
+        unicode
+            Captured JSON text (only available if limit was not exceeded).
+        '''
+        return u''.join(self._parts)
+
+    def on_spill(self):
+        '''
+        Called before collected text is written to output when limit is
+        exceeded (if ``spill`` is ``True``).
+        '''
+        pass
+
+    def finish(self):
+        '''
+        Called after the complete value has been written to the capture.
+
+        By default, write captured value to output unchanged.
+
+        If nothing at all is written to the output, e.g., by overriding this
+        method, the value is dropped from its enclosing object, along with its
+        key.  Array items must not be dropped.
+        '''
+        if not self.overflowed:
+            self.out.write(self.text())
+
+
+class NotebookStream(object):
+    '''
+    Streaming copy of notebook JSON from input to output.
+
+    Subclasses select values to capture by overriding :meth:`capture` and may
+    append array items in :meth:`end_array`.  Subclasses should call the
+    superclass implementation of both methods for values they do not handle,
+    so that stream classes may be combined through multiple inheritance.
+
+    Parameters
+    ----------
+    input_ : file-like
+        Notebook JSON input (text, i.e., ``unicode``).
+    output : file-like
+        Notebook JSON output (text, i.e., ``unicode``).
+    chunk_size : int, optional
+        Number of characters to read from input at a time.
+
+    Attributes
+    ----------
+    separator : unicode
+        Whitespace preceding the array item most recently started (i.e.,
+        following the opening ``[`` or the last item separator ``,``), e.g.,
+        to indent inserted array items consistently.  Only valid in
+        :meth:`capture`, since nested arrays update it.
+    '''
+    def __init__(self, input_, output, chunk_size=CHUNK_SIZE):
+        self.reader = _Reader(input_, chunk_size)
+        self.output = output
+        self.separator = u' '
+
+    def capture(self, path, out):
+        '''
+        Parameters
+        ----------
+        path : tuple
+            Path of value within notebook, e.g., ``('cells', 0, 'outputs')``.
+        out : file-like
+            Output value must be written to.
+
+        Returns
+        -------
+        Capture or None
+            Output to write value to instead of ``out``, or ``None`` to write
+            value to ``out`` unchanged.
+        '''
+        return None
+
+    def end_array(self, path, out):
+        '''
+        Called after last item of array at path has been written to output
+        (items written here must be preceded by a ``,``, unless the array is
+        empty).
+        '''
+        pass
+
+    def run(self):
+        reader = self.reader
+        self.output.write(reader.match(_WHITESPACE))
+        self._value(self.output, ())
+        self.output.write(reader.match(_WHITESPACE))
+
+    def _value(self, out, path, prefix=u''):
+        '''
+        Copy value, preceded by ``prefix`` (e.g., key of object member) unless
+        the value is dropped by its capture.
+
+        Returns
+        -------
+        bool
+            ``False`` if value was dropped.
+        '''
+        member = _Prefixed(out, prefix) if prefix else out
+        capture = self.capture(path, member)
+        if capture is None:
+            out.write(prefix)
+            target = out
+        else:
+            target = capture
+        c = self.reader.peek()
+        if c == u'{':
+            self._object(target, path)
+        elif c == u'[':
+            self._array(target, path)
+        elif c == u'"':
+            self._string(target)
+        else:
+            target.write(self.reader.match(_SCALAR))
+        if capture is not None:
+            capture.finish()
+            return not prefix or member.written
+        return True
+
+    def _string(self, out):
+        reader = self.reader
+        out.write(reader.take())
+        while True:
+            reader.copy(_STRING_CHARS, out)
+            c = reader.take()
+            out.write(c)
+            if c == u'"':
+                return
+            # Escaped character.
+            out.write(reader.take())
+
+    def _expect(self, expected, out):
+        c = self.reader.take()
+        if c not in expected:
+            raise ValueError('Invalid notebook JSON: expected one of %r, '
+                             'found %r.' % (expected, c))
+        out.write(c)
+        return c
+
+    def _object(self, out, path):
+        reader = self.reader
+        self._expect(u'{', out)
+        # Text to write before the next member which is not dropped.
+        separator = reader.match(_WHITESPACE)
+        written = False
+        while reader.peek() != u'}':
+            key = TextSink()
+            self._string(key)
+            name = json.loads(key.text())
+            key.write(reader.match(_WHITESPACE))
+            self._expect(u':', key)
+            key.write(reader.match(_WHITESPACE))
+            kept = self._value(out, path + (name, ), separator + key.text())
+            whitespace = reader.match(_WHITESPACE)
+            if kept:
+                written = True
+            if reader.peek() == u'}':
+                if written:
+                    out.write(whitespace)
+                break
+            self._expect(u',', TextSink())
+            if kept:
+                separator = whitespace + u',' + reader.match(_WHITESPACE)
+            else:
+                reader.match(_WHITESPACE)
+        out.write(reader.take())
+
+    def _array(self, out, path):
+        reader = self.reader
+        self._expect(u'[', out)
+        self.separator = reader.match(_WHITESPACE)
+        out.write(self.separator)
+        if reader.peek() == u']':
+            self.end_array(path, out)
+            out.write(reader.take())
+            return
+        index = 0
+        while True:
+            self._value(out, path + (index, ))
+            index += 1
+            whitespace = reader.match(_WHITESPACE)
+            if reader.peek() == u']':
+                self.end_array(path, out)
+                out.write(whitespace)
+                out.write(reader.take())
+                return
+            out.write(whitespace)
+            self._expect(u',', out)
+            self.separator = reader.match(_WHITESPACE)
+            out.write(self.separator)
+
+
+def _dumps(value, indent):
+    '''
+    Serialize value in the format used by ``nbformat`` (sorted keys, one space
+    indent), nested at the specified indentation.
+    '''
+    if indent is None:
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    text = json.dumps(value, indent=1, sort_keys=True, ensure_ascii=False,
+                      separators=(',', ': '))
+    return text.replace(u'\n', u'\n' + indent)
+
+
+def _indent(raw):
+    '''
+    Returns
+    -------
+    unicode or None
+        Indentation of closing line of raw JSON value, or ``None`` if value
+        is not indented.
+    '''
+    if u'\n' not in raw:
+        return None
+    return raw[raw.rindex(u'\n') + 1:-1]
+
+
+def _plain(value):
+    # Convert value to built-in types, whose `repr` is a Python literal (e.g.,
+    # `path('/tmp/x')` -> `'/tmp/x'`).
+    if value is None or isinstance(value, bool):
+        return value
+    elif isinstance(value, bytes):
+        return b''.join([value])
+    elif isinstance(value, type(u'')):
+        return u''.join([value])
+    elif isinstance(value, float):
+        return float(value)
+    elif isinstance(value, int):
+        return int(value)
+    elif isinstance(value, tuple):
+        return tuple(_plain(v) for v in value)
+    elif isinstance(value, list):
+        return [_plain(v) for v in value]
+    elif isinstance(value, dict):
+        return dict((_plain(k), _plain(v)) for k, v in value.items())
+    return value
+
+
+def parameters_source(parameters):
+    '''
+    Parameters
+    ----------
+    parameters : dict
+        Parameter values, by name.  Values are converted to built-in types
+        (e.g., ``str`` subclasses to ``str``) before being formatted.
+
+    Returns
+    -------
+    list
+        Python source lines assigning parameter values, in ``nbformat`` cell
+        ``source`` format (empty if there are no parameters).
+
+    Raises
+    ------
+    ValueError
+        If a parameter name is not an identifier, or a value can not be
+        represented as a Python literal (e.g., ``float('nan')`` or an
+        arbitrary object).
+    '''
+    names = (parameters.keys() if isinstance(parameters, OrderedDict)
+             else sorted(parameters))
+    lines = []
+    for name in names:
+        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+            raise ValueError('Invalid parameter name: `%s`' % name)
+        literal = repr(_plain(parameters[name]))
+        try:
+            ast.literal_eval(literal)
+        except (SyntaxError, ValueError):
+            raise ValueError('Value of parameter `%s` can not be represented '
+                             'as a Python literal: %s' % (name, literal))
+        lines.append(u'%s = %s\n' % (name, literal))
+    if lines:
+        lines[-1] = lines[-1].rstrip(u'\n')
+    return lines
+
+
+class _CellCapture(Capture):
+    def __init__(self, injector, out):
+        super(_CellCapture, self).__init__(out, injector.max_cell_chars)
+        self.injector = injector
+        # Whitespace preceding cell.
+        self.separator = injector.separator
+
+    def on_spill(self):
+        # A large cell is neither a parameters cell nor a previously injected
+        # parameters cell.
+        self.injector.write_pending(self.out, self.separator)
+
+    def finish(self):
+        if self.overflowed:
+            return
+        injector = self.injector
+        raw = self.text()
+        tags = json.loads(raw).get('metadata', {}).get('tags', [])
+        if injector.pending and 'injected-parameters' in tags:
+            # Replace parameters injected previously.
+            self.out.write(injector.injected_cell(_indent(raw)))
+            injector.pending = False
+            return
+        injector.write_pending(self.out, self.separator)
+        self.out.write(raw)
+        if 'parameters' in tags and not injector.injected:
+            injector.pending = True
+            injector.indent = _indent(raw)
+            injector.has_id = 'id' in json.loads(raw)
+
+
+class ParameterInjector(NotebookStream):
+    '''
+    Streaming rewrite of notebook which injects parameter values.
+
+    Following the convention of `papermill`_, a code cell tagged
+    ``injected-parameters`` which assigns the parameter values is inserted
+    after the cell tagged ``parameters`` (or replaces an
+    ``injected-parameters`` cell directly following it).
+
+    Only cells up to ``max_cell_chars`` characters are held in memory; larger
+    cells are copied through unchanged.
+
+    Parameters
+    ----------
+    input_ : file-like
+        Notebook JSON input (text, i.e., ``unicode``).
+    output : file-like
+        Notebook JSON output (text, i.e., ``unicode``).
+    parameters : dict
+        Parameter values, by name.  If ``None``, notebook is copied unchanged.
+    max_cell_chars : int, optional
+        Maximum size of a cell which may be tagged ``parameters``.
+
+    Raises
+    ------
+    ValueError
+        If a parameter value can not be represented as a Python literal (see
+        :func:`parameters_source`).
+
+    .. _papermill: https://papermill.readthedocs.io
+    '''
+    def __init__(self, input_, output, parameters, max_cell_chars=1 << 20,
+                 **kwargs):
+        super(ParameterInjector, self).__init__(input_, output, **kwargs)
+        self.parameters = parameters
+        # Format parameters up front, so invalid values are reported before
+        # any output is written.
+        self.source = (None if parameters is None else
+                       parameters_source(parameters))
+        self.max_cell_chars = max_cell_chars
+        self.pending = False
+        self.injected = False
+        self.indent = None
+        self.has_id = False
+
+    def injected_cell(self, indent):
+        '''
+        Returns
+        -------
+        unicode
+            JSON text of cell assigning parameter values.
+        '''
+        self.injected = True
+        cell = {'cell_type': 'code', 'execution_count': None,
+                'metadata': {'tags': ['injected-parameters']}, 'outputs': [],
+                'source': self.source}
+        if self.has_id:
+            # Cell ids are required as of nbformat 4.5.
+            cell['id'] = uuid.uuid4().hex[:8]
+        return _dumps(cell, indent)
+
+    def write_pending(self, out, separator):
+        '''
+        Write injected cell (followed by an item separator), if the previous
+        cell was the parameters cell.
+        '''
+        if self.pending:
+            out.write(self.injected_cell(self.indent) + u',' + separator)
+            self.pending = False
+
+    def capture(self, path, out):
+        if (self.parameters is not None and len(path) == 2 and
+                path[0] == 'cells'):
+            return _CellCapture(self, out)
+        return super(ParameterInjector, self).capture(path, out)
+
+    def end_array(self, path, out):
+        if path == ('cells', ) and self.pending:
+            separator = (u' ' if self.indent is None else u'\n' + self.indent)
+            out.write(u',' + separator + self.injected_cell(self.indent))
+            self.pending = False
+        super(ParameterInjector, self).end_array(path, out)
+
+    def run(self):
+        super(ParameterInjector, self).run()
+        if self.parameters is not None and not self.injected:
+            raise ValueError('Notebook has no cell tagged `parameters`.')
+
+
+class _Replacement(Capture):
+    '''
+    Capture which discards value and writes replacement text instead.
+    '''
+    def __init__(self, out, replacement):
+        super(_Replacement, self).__init__(out, 0, spill=False)
+        self.replacement = replacement
+
+    def finish(self):
+        self.out.write(self.replacement)
+
+
+class _OutputCapture(Capture):
+    def __init__(self, stripper, out, indent):
+        super(_OutputCapture, self).__init__(out, stripper.max_output_chars,
+                                             spill=False)
+        self.stripper = stripper
+        self.indent = indent
+
+    def finish(self):
+        if not self.overflowed:
+            self.out.write(self.text())
+            return
+        stripper = self.stripper
+        stripper.stats['outputs_removed'] += 1
+        stripper.stats['output_chars_removed'] += self.size
+        output = {'name': 'stdout', 'output_type': 'stream',
+                  'text': [u'[Output removed: %d characters]' % self.size]}
+        self.out.write(_dumps(output, self.indent))
+
+
+class _Base64File(object):
+    '''
+    Output which decodes a JSON string of base64 encoded data to a file, as
+    written in pieces.
+    '''
+    def __init__(self, path_):
+        self.path = path_
+        self.file = open(path_, 'wb')
+        self.size = 0
+        self._escape = False
+        self._data = u''
+
+    def write(self, text):
+        chars = []
+        for c in text:
+            if self._escape:
+                # Only `\/` is a base64 character (e.g., `\n` is not).
+                if c == u'/':
+                    chars.append(c)
+                self._escape = False
+            elif c == u'\\':
+                self._escape = True
+            elif c != u'"':
+                chars.append(c)
+        data = self._data + u''.join(chars)
+        end = len(data) // 4 * 4
+        self._write(data[:end])
+        self._data = data[end:]
+
+    def _write(self, data):
+        if data:
+            decoded = base64.b64decode(data.encode('ascii'))
+            self.file.write(decoded)
+            self.size += len(decoded)
+
+    def close(self):
+        self._write(self._data)
+        self.file.close()
+
+
+class _AttachmentCapture(Capture):
+    def __init__(self, stripper, out, cell, name):
+        super(_AttachmentCapture, self).__init__(out,
+                                                 stripper.max_attachment_chars,
+                                                 spill=False)
+        self.stripper = stripper
+        self.cell = cell
+        self.name = name
+        self.side_file = None
+
+    def overflow(self, text):
+        if self.side_file is None:
+            stripper = self.stripper
+            if not os.path.isdir(stripper.attachments_dir):
+                os.makedirs(stripper.attachments_dir)
+            filename = u'%d-%s' % (self.cell, os.path.basename(self.name))
+            self.side_file = \
+                _Base64File(os.path.join(stripper.attachments_dir, filename))
+        self.side_file.write(text)
+
+    def finish(self):
+        if not self.overflowed:
+            self.out.write(self.text())
+            return
+        # Drop attachment data from notebook.
+        self.side_file.close()
+        stripper = self.stripper
+        filename = os.path.basename(self.side_file.path)
+        stripper.offloaded.setdefault(self.cell, {})[self.name] = \
+            u'%s/%s' % (stripper.attachments_url, quote(filename.encode('utf8')))
+        stripper.stats['attachments'].append(self.side_file.path)
+        stripper.stats['attachment_chars_removed'] += self.size
+
+
+class _BundleCapture(Capture):
+    '''
+    Capture of attachment MIME bundle, which is dropped if all of its data
+    was offloaded.
+    '''
+    def finish(self):
+        if self.overflowed or json.loads(self.text()):
+            super(_BundleCapture, self).finish()
+
+
+class _SourceCapture(Capture):
+    def __init__(self, stripper, out, cell):
+        super(_SourceCapture, self).__init__(out, stripper.max_cell_chars)
+        self.stripper = stripper
+        self.cell = cell
+
+    def finish(self):
+        offloaded = self.stripper.offloaded.get(self.cell)
+        if self.overflowed or not offloaded:
+            super(_SourceCapture, self).finish()
+            return
+        cre_reference = re.compile(u'attachment:(%s)(?![\\w.-])' %
+                                   u'|'.join(map(re.escape, offloaded)))
+
+        def rewrite(line):
+            return cre_reference.sub(lambda m: offloaded[m.group(1)], line)
+
+        raw = self.text()
+        source = json.loads(raw)
+        if isinstance(source, list):
+            source = [rewrite(line) for line in source]
+        else:
+            source = rewrite(source)
+        self.out.write(_dumps(source, _indent(raw)))
+
+
+class OutputStripper(NotebookStream):
+    '''
+    Streaming rewrite of notebook which strips or truncates cell outputs and
+    moves large cell attachments (e.g., images pasted into Markdown cells) to
+    side files.
+
+    Offloaded attachments are decoded to files named ``<cell index>-<name>``
+    in ``attachments_dir``, and references to them in the cell source (i.e.,
+    ``attachment:<name>``) are replaced by relative URLs of the files.
+
+    Parameters
+    ----------
+    input_ : file-like
+        Notebook JSON input (text, i.e., ``unicode``).
+    output : file-like
+        Notebook JSON output (text, i.e., ``unicode``).
+    max_output_chars : int, optional
+        If ``0``, remove all outputs (and execution counts).  Otherwise,
+        replace each output larger than this (as JSON text) by a short notice.
+        By default, outputs are kept.
+    max_attachment_chars : int, optional
+        Move attachments larger than this (as JSON text) to side files.  By
+        default, attachments are kept.
+    attachments_dir : str, optional
+        Directory to write offloaded attachments to (required if
+        ``max_attachment_chars`` is specified).
+    attachments_url : str, optional
+        URL of ``attachments_dir`` relative to the notebook (default:
+        directory name).
+    max_cell_chars : int, optional
+        Maximum size of cell source in which attachment references are
+        rewritten.
+
+    Attributes
+    ----------
+    stats : dict
+        Summary of removed content, with the keys ``outputs_removed``,
+        ``output_chars_removed``, ``attachments`` (paths of side files) and
+        ``attachment_chars_removed``.
+    '''
+    def __init__(self, input_, output, max_output_chars=None,
+                 max_attachment_chars=None, attachments_dir=None,
+                 attachments_url=None, max_cell_chars=1 << 20, **kwargs):
+        super(OutputStripper, self).__init__(input_, output, **kwargs)
+        if max_attachment_chars is not None and attachments_dir is None:
+            raise ValueError('`attachments_dir` is required to move '
+                             'attachments to side files.')
+        self.max_output_chars = max_output_chars
+        self.max_attachment_chars = max_attachment_chars
+        self.attachments_dir = attachments_dir
+        if attachments_url is None and attachments_dir is not None:
+            attachments_url = quote(os.path.basename(attachments_dir)
+                                    .encode('utf8'))
+        self.attachments_url = attachments_url
+        self.max_cell_chars = max_cell_chars
+        # Offloaded attachment URLs, by name and cell index.
+        self.offloaded = {}
+        # Cells for which source has been written already.
+        self._sources = set()
+        self.stats = {'outputs_removed': 0, 'output_chars_removed': 0,
+                      'attachments': [], 'attachment_chars_removed': 0}
+
+    def capture(self, path, out):
+        depth = len(path)
+        if depth < 3 or path[0] != 'cells':
+            pass
+        elif self.max_output_chars is not None and path[2] == 'outputs':
+            if depth == 3 and self.max_output_chars == 0:
+                # Discard all outputs.
+                return _Replacement(out, u'[]')
+            elif depth == 4:
+                # Indentation of output.
+                indent = (self.separator.rpartition(u'\n')[2]
+                          if u'\n' in self.separator else None)
+                return _OutputCapture(self, out, indent)
+        elif (depth == 3 and path[2] == 'execution_count' and
+              self.max_output_chars == 0):
+            return _Replacement(out, u'null')
+        elif self.max_attachment_chars is not None and path[2] == 'source':
+            if depth == 3:
+                self._sources.add(path[1])
+                return _SourceCapture(self, out, path[1])
+        elif (self.max_attachment_chars is not None and
+              path[2] == 'attachments' and path[1] not in self._sources):
+            # Attachments may only be offloaded if the cell source has not been
+            # written yet (i.e., if keys are sorted, as written by nbformat).
+            if depth == 4:
+                return _BundleCapture(out, self.max_attachment_chars)
+            elif (depth == 5 and path[3] not in self.offloaded.get(path[1],
+                                                                    {})):
+                return _AttachmentCapture(self, out, path[1], path[3])
+        return super(OutputStripper, self).capture(path, out)
+
+
+class TemplateRewriter(ParameterInjector, OutputStripper):
+    '''
+    Streaming rewrite of notebook which injects parameter values (see
+    :class:`ParameterInjector`), and strips outputs and moves attachments to
+    side files (see :class:`OutputStripper`), in a single pass.
+
+    Parameters
+    ----------
+    input_ : file-like
+        Notebook JSON input (text, i.e., ``unicode``).
+    output : file-like
+        Notebook JSON output (text, i.e., ``unicode``).
+    parameters : dict, optional
+        Parameter values, by name.
+    **kwargs : dict
+        Additional arguments to pass along to :class:`OutputStripper`.
+    '''
+    def __init__(self, input_, output, parameters=None, **kwargs):
+        super(TemplateRewriter, self).__init__(input_, output, parameters,
+                                               **kwargs)
+
+
+def inject_parameters(input_path, output_path, parameters, **kwargs):
+    '''
+    Write copy of notebook with parameter values injected (see
+    :class:`ParameterInjector`).
+
+    Parameters
+    ----------
+    input_path : str
+        Input notebook path.
+    output_path : str
+        Output notebook path.
+    parameters : dict
+        Parameter values, by name.
+    **kwargs : dict
+        Additional arguments to pass along to :class:`ParameterInjector`.
+
+    Raises
+    ------
+    ValueError
+        If notebook has no cell tagged ``parameters``.
+    '''
+    rewrite_notebook(input_path, output_path, parameters=parameters, **kwargs)
+
+
+def rewrite_notebook(input_path, output_path, data=None, **kwargs):
+    '''
+    Write rewritten copy of notebook (see :class:`TemplateRewriter`).
+
+    Parameters
+    ----------
+    input_path : str
+        Input notebook path.
+    output_path : str
+        Output notebook path.
+    data : bytes, optional
+        Contents of input notebook (e.g., from a
+        :class:`jupyter_helpers.templates.TemplateCache`).  If specified,
+        streamed from memory instead of reading the input file.
+    **kwargs : dict
+        Arguments to pass along to :class:`TemplateRewriter`.
+
+    Returns
+    -------
+    dict
+        Summary of removed content (see :attr:`OutputStripper.stats`).
+    '''
+    if data is None:
+        input_ = io.open(input_path, 'rb')
+    else:
+        input_ = io.BytesIO(data)
+    with io.TextIOWrapper(input_, encoding='utf8', newline='') as input_:
+        with io.open(output_path, 'w', encoding='utf8', newline='') as output:
+            rewriter = TemplateRewriter(input_, output, **kwargs)
+            rewriter.run()
+    return rewriter.stats
@@ -1,11 +1,13 @@
 # coding: utf-8
 from Queue import Queue, Empty
 from collections import OrderedDict
+from functools import partial
 from subprocess import Popen, PIPE
 from threading import Thread
 import os
 import psutil
 import re
+import socket
 import sys
 import time
 import webbrowser
@@ -39,12 +41,129 @@ def kill_process_tree(pid, including_parent=True):
         parent.wait(5)
 
 
+#: Patterns in notebook server output which indicate that the server failed to
+#: start, keyed by failure reason (in order of precedence).
+STARTUP_ERRORS = OrderedDict([('port_in_use', r'no available port could be '
+                               r'found|Address already in use'),
+                              ('permission_denied', r'Permission denied|'
+                               r'Running as root is not recommended'),
+                              ('missing_kernel', r'No such kernel|'
+                               r'NoSuchKernel'),
+                              ('bad_config', r'Bad config encountered|'
+                               r'Unrecognized (flag|alias)|'
+                               r'No such notebook dir|TraitError'),
+                              ('error', r'Traceback \(most recent call '
+                               r'last\)')])
+
+#: Patterns in notebook server output which are always followed by the server
+#: exiting.  Other patterns of :data:`STARTUP_ERRORS` (e.g., tracebacks) are
+#: also output for non-fatal errors (e.g., a server extension failing to load),
+#: so they are only used to classify failures once the server has exited.
+FATAL_STARTUP_ERRORS = (r'no available port could be found',
+                        r'Running as root is not recommended',
+                        r'Unrecognized (flag|alias)')
+
+
+class NotebookStartupError(IOError):
+    '''
+    Raised when a notebook server fails to start.
+
+    Attributes
+    ----------
+    reason : str
+        Failure reason, i.e., a key of :data:`STARTUP_ERRORS`, or ``'exited'``
+        if the server process exited without a recognized error.
+    lines : list
+        Notebook server output lines.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, reason, lines):
+        super(NotebookStartupError, self).__init__(''.join(lines))
+        self.reason = reason
+        self.lines = lines
+
+
+def classify_startup_error(lines):
+    '''
+    Parameters
+    ----------
+    lines : list
+        Notebook server output lines.
+
+    Returns
+    -------
+    str or None
+        Failure reason of first matching pattern in :data:`STARTUP_ERRORS`, or
+        ``None`` if no pattern matches.
+
+
+    .. versionadded:: 0.12
+    '''
+    for reason, pattern in STARTUP_ERRORS.iteritems():
+        cre_error = re.compile(pattern)
+        if any(cre_error.search(line) for line in lines):
+            return reason
+    return None
+
+
+def free_port(host='localhost'):
+    '''
+    Returns
+    -------
+    int
+        Port number which was available at the time of the call.
+
+
+    .. versionadded:: 0.12
+    '''
+    sock = socket.socket()
+    try:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+def package_env(env=None):
+    '''
+    Return environment for a Python subprocess which must be able to import
+    this package (e.g., to run one of its modules with ``python -m``).
+
+    Parameters
+    ----------
+    env : dict, optional
+        Base environment (defaults to current environment).
+
+    Returns
+    -------
+    dict
+        Copy of environment with parent directory of this package prepended to
+        ``PYTHONPATH``.
+
+
+    .. versionadded:: 0.12
+    '''
+    env = dict(os.environ if env is None else env)
+    package_parent = os.path.dirname(os.path.dirname(os.path
+                                                     .abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([package_parent] +
+                                        [p for p in [env.get('PYTHONPATH')]
+                                         if p])
+    return env
+
+
 class Session(object):
     '''
     This class provides an API for launching a Jupyter notebook process
     (non-blocking).
     '''
-    def __init__(self, daemon=False, create_dir=False, timeout_s=20, **kwargs):
+    def __init__(self, daemon=False, create_dir=False, timeout_s=20,
+                 zygote=None, profile=None, importtime=False, retries=0,
+                 watch=False, mirror=False, sync_interval_s=30,
+                 kernel_pool=None, kernel_zygote=None, execution_cache=None,
+                 **kwargs):
         '''
         Arguments
         ---------
@@ -54,16 +173,98 @@ class Session(object):
             Create the notebook directory, if necessary.
         timeout_s : int or float, optional
             Time to wait for notebook process to initialize (in seconds).
+        zygote : jupyter_helpers.zygote.NotebookZygote, optional
+            If specified, fork notebook server from zygote process instead of
+            launching a new Python interpreter.
+        profile : str or jupyter_helpers.profiles.LeanProfile, optional
+            Launch profile.  If ``'lean'``, skip config discovery and only
+            load allow-listed extensions (see
+            :class:`jupyter_helpers.profiles.LeanProfile`).
+        importtime : bool, optional
+            If ``True``, report time spent importing each module during
+            startup (see :attr:`import_report`).  Implies launching a new
+            Python interpreter, i.e., ``zygote`` is ignored.
+        retries : int, optional
+            Number of times to relaunch the notebook server on a fresh port if
+            it fails to start due to a port conflict.
+        watch : bool, optional
+            If ``True``, watch the notebook directory tree for changes (see
+            :attr:`watcher`) to keep the notebook index (see
+            :attr:`notebook_index`) and other subscribed caches up to date.
+            Only supported on Linux.
+        mirror : bool or str, optional
+            If ``True``, copy the notebook directory tree to a memory-backed
+            directory (e.g., ``/dev/shm``) and serve notebooks from there, so
+            notebooks doing many small reads and writes in their working
+            directory are not slowed down by slow (e.g., network) storage.
+            A directory to create the mirror in may also be specified.
+
+            Changes are synchronized back to the original directory (see
+            :attr:`source_dir`) every ``sync_interval_s`` seconds and when the
+            session is stopped (see :class:`jupyter_helpers.mirror.DirectoryMirror`).
+        sync_interval_s : float, optional
+            Interval to synchronize mirror to original directory at (if
+            ``mirror`` is set).  If ``None``, only synchronize when stopped (or
+            when :meth:`sync` is called).
+        kernel_pool : int or dict, optional
+            Number of idle kernels to keep started for the default kernel
+            spec, or keyword arguments of
+            :class:`jupyter_helpers.pool.KernelPool` (e.g., ``{'size': 2,
+            'kernel_names': ['python2'], 'preload': 'import numpy'}``).
+            Idle kernels are used by :meth:`open` and :meth:`execute` (see
+            :attr:`kernel_pool`).
+        kernel_zygote : jupyter_helpers.kernel_zygote.KernelZygote, optional
+            If specified, fork kernels (of the kernel spec of the zygote) from
+            zygote process, which has modules (e.g., ``numpy``) pre-imported.
+        execution_cache : bool, int or jupyter_helpers.cache.ExecutionCache, optional
+            If ``True``, reuse outputs of notebooks executed by
+            :meth:`execute` from a cache in the Jupyter data directory when
+            the code, kernel spec and input files of a notebook are unchanged.
+            The maximum size of the cache (in bytes), or an
+            :class:`ExecutionCache` instance may also be specified.
 
         See also
         --------
         SessionManager.get_session
+
+
+        .. versionchanged:: 0.12
+            Add ``zygote``, ``profile``, ``importtime``, ``retries``,
+            ``watch``, ``mirror``, ``sync_interval_s``, ``kernel_pool``,
+            ``kernel_zygote`` and ``execution_cache`` arguments.
         '''
+        from .profiles import get_profile
+
         self.daemon = daemon
         if create_dir and 'notebook_dir' in kwargs:
             path(kwargs['notebook_dir']).makedirs_p()
         self.timeout_s = timeout_s
+        self.zygote = zygote
+        self.kernel_zygote = kernel_zygote
+        self.profile = get_profile(profile)
+        self.importtime = importtime
+        self.retries = retries
+        self.watch = watch
         self.kwargs = kwargs
+        #: Mirror of notebook directory (see ``mirror`` argument), while
+        #: running.
+        self.mirror = None
+        self._mirror_root = mirror
+        self.sync_interval_s = sync_interval_s
+        if isinstance(kernel_pool, int):
+            kernel_pool = {'size': kernel_pool} if kernel_pool > 0 else None
+        self._kernel_pool_kwargs = kernel_pool
+        #: Pool of idle kernels (see ``kernel_pool`` argument), while
+        #: running.
+        self.kernel_pool = None
+        if execution_cache is True or (isinstance(execution_cache, int) and
+                                       execution_cache > 0):
+            from .cache import ExecutionCache
+
+            execution_cache = (ExecutionCache() if execution_cache is True
+                               else ExecutionCache(max_bytes=execution_cache))
+        #: Cache of execution results (see ``execution_cache`` argument).
+        self.execution_cache = execution_cache or None
         self.process = None
         self.thread = None
         self.stderr_lines = []
@@ -71,11 +272,22 @@ class Session(object):
         self.token = None
         self.address = None
         self._notebook_dir = None
+        self.startup_duration_s = None
+        self.importtime_lines = []
+        self.import_report = None
+        self._notebook_index = None
+        self._search_indexes = {}
+        self._converters = {}
+        self._watcher = None
+        self._client = None
 
     @property
     def args(self):
         args = ()
-        for k, v in self.kwargs.iteritems():
+        kwargs = self.kwargs
+        if self.mirror is not None:
+            kwargs = OrderedDict(kwargs, notebook_dir=self.mirror.path)
+        for k, v in kwargs.iteritems():
             cli_k = k.replace('_', '-')
             if v is None:
                 args += ('--%s' % cli_k, )
@@ -107,15 +319,110 @@ class Session(object):
 
             Note that the text "The ... Notebook is running at:" is no longer
             output on the same line as the server URL.
+
+        .. versionchanged:: 0.12
+            If :attr:`zygote` is set, fork notebook server from zygote process.
+            In this case, only the ``cwd`` and ``env`` keyword arguments are
+            used.
+
+            Apply launch :attr:`profile`, if set.
+
+            Record time taken to launch server in :attr:`startup_duration_s`.
+
+            If :attr:`importtime` is set, collect import time report lines
+            from ``stderr`` in :attr:`importtime_lines` (excluded from
+            :attr:`stderr_lines`) and store modules sorted by cumulative import
+            time in :attr:`import_report` (see
+            :func:`jupyter_helpers.importtime.report`).
+
+            Fail as soon as the notebook server exits or outputs a known fatal
+            error (see :data:`FATAL_STARTUP_ERRORS`), raising
+            :class:`NotebookStartupError`.  Relaunch on a fresh
+            port (up to :attr:`retries` times) on port conflicts.
+
+            Serve notebooks from a mirror of the notebook directory, if
+            ``mirror`` was set.
         '''
+        self._start_mirror(kwargs.get('cwd'))
+        try:
+            for i in range(self.retries + 1):
+                try:
+                    self._start(*args, **kwargs.copy())
+                    break
+                except NotebookStartupError as exception:
+                    if exception.reason != 'port_in_use' or i == self.retries:
+                        raise
+                    self.kwargs['port'] = free_port()
+        except Exception:
+            self._stop_mirror()
+            raise
+        self._start_kernel_pool()
+
+    def _start_mirror(self, cwd=None):
+        if not self._mirror_root or self.mirror is not None:
+            return
+        from .mirror import DirectoryMirror
+
+        source = self.kwargs.get('notebook_dir') or cwd or os.getcwd()
+        self.mirror = DirectoryMirror(source, root=None
+                                      if self._mirror_root is True
+                                      else self._mirror_root,
+                                      sync_interval_s=self.sync_interval_s)
+        self.mirror.start()
+
+    def _start_kernel_pool(self):
+        if self._kernel_pool_kwargs is None or self.kernel_pool is not None:
+            return
+        from .pool import KernelPool
+
+        self.kernel_pool = KernelPool(self.client,
+                                      **dict(dict(root_dir=self.notebook_dir),
+                                             **self._kernel_pool_kwargs))
+        self.kernel_pool.start()
+
+    def _stop_kernel_pool(self):
+        if self.kernel_pool is not None:
+            self.kernel_pool.stop()
+            self.kernel_pool = None
+
+    def _stop_mirror(self):
+        if self.mirror is None:
+            return
+        if self.is_alive():
+            # Notebook server is still running (e.g., not a daemon), so keep
+            # mirror.
+            self.mirror.sync()
+        else:
+            self.mirror.stop()
+            self.mirror = None
+
+    def _start(self, *args, **kwargs):
         if 'stderr' in kwargs:
             raise ValueError('`stderr` must not be specified, since it must be'
                              ' monitored to determine which port the notebook '
                              'server is running on.')
 
-        args_ = (os.environ.get('PYTHONEXEPATH', sys.executable),
-                 '-m', 'jupyter', 'notebook') + self.args
+        if self.profile is not None:
+            kwargs['env'] = self.profile.env(kwargs.get('env'))
+        if self.kernel_zygote is not None:
+            kwargs['env'] = self.kernel_zygote.env(kwargs.get('env'))
+        python_exe = os.environ.get('PYTHONEXEPATH', sys.executable)
+        if not self.importtime:
+            args_ = (python_exe, '-m', 'jupyter', 'notebook') + self.args
+        elif sys.version_info >= (3, 7):
+            # Interpreter reports import times (also inherited by the
+            # `jupyter-notebook` process launched by `jupyter`).
+            kwargs['env'] = dict(kwargs.get('env') or os.environ,
+                                 PYTHONPROFILEIMPORTTIME='1')
+            args_ = (python_exe, '-m', 'jupyter', 'notebook') + self.args
+        else:
+            # `jupyter` would replace the process with `jupyter-notebook`, so
+            # run notebook module directly within the import time wrapper.
+            kwargs['env'] = package_env(kwargs.get('env'))
+            args_ = (python_exe, '-m', 'jupyter_helpers.importtime',
+                     'notebook') + self.args
         args_ = args_ + tuple(args)
+        launch_time = time.time()
 
         # Launch notebook as a subprocess and read stderr in a new thread.
         # See: https://stackoverflow.com/questions/375427/non-blocking-read-on-a-subprocess-pipe-in-python
@@ -127,9 +434,16 @@ class Session(object):
                 queue.put(line)
             out.close()
 
-        self.process = Popen(args_, stderr=PIPE, bufsize=1, close_fds=ON_POSIX, **kwargs)
+        if self.zygote is not None and not self.importtime:
+            self.process, stderr = self.zygote.spawn(self.args + tuple(args),
+                                                     cwd=kwargs.get('cwd'),
+                                                     env=kwargs.get('env'))
+        else:
+            self.process = Popen(args_, stderr=PIPE, bufsize=1,
+                                 close_fds=ON_POSIX, **kwargs)
+            stderr = self.process.stderr
         q = Queue()
-        self.thread = Thread(target=enqueue_output, args=(self.process.stderr, q))
+        self.thread = Thread(target=enqueue_output, args=(stderr, q))
         self.thread.daemon = self.daemon # thread dies with the program
         self.thread.start()
         self._notebook_dir = os.getcwd()
@@ -138,23 +452,37 @@ class Session(object):
         cre_address = re.compile(r'(?P<address>https?://.*?:'
                                  r'(?P<port>\d+)/)\?token=(?P<token>[a-z0-9]+)\r?$')
         cre_notebook_dir = re.compile(r'Serving notebooks from local '
-                                      r'directory:\s+(?P<notebook_dir>[^\r]*)\r?$')
+                                      r'directory:\s+'
+                                      r'(?P<notebook_dir>[^\r\n]*)\r?$')
+        cre_fatal = re.compile('|'.join(FATAL_STARTUP_ERRORS))
         match = None
         self.stderr_lines = []
+        self.importtime_lines = []
         start_time = time.time()
+        fatal_time = None
 
-        while self.is_alive() and match is None:
-            # read line without blocking
+        while match is None:
             try:
-                stderr_line = q.get_nowait()
+                stderr_line = q.get(timeout=.05)
             except Empty:
-                pass
+                if not self.is_alive() and q.empty():
+                    # Output stream was closed, i.e., process has exited.
+                    break
             else: # got line
-                self.stderr_lines.append(stderr_line)
-                match = cre_address.search(stderr_line)
-                dir_match = cre_notebook_dir.search(stderr_line)
-                if dir_match:
-                    self._notebook_dir = dir_match.group('notebook_dir')
+                if stderr_line.startswith('import time:'):
+                    self.importtime_lines.append(stderr_line)
+                else:
+                    self.stderr_lines.append(stderr_line)
+                    match = cre_address.search(stderr_line)
+                    dir_match = cre_notebook_dir.search(stderr_line)
+                    if dir_match:
+                        self._notebook_dir = dir_match.group('notebook_dir')
+                    if fatal_time is None and cre_fatal.search(stderr_line):
+                        fatal_time = time.time()
+            if fatal_time is not None and time.time() - fatal_time > .25:
+                # Allow a moment for the rest of the error to be output, even
+                # if the process does not exit.
+                break
             if time.time() - start_time > self.timeout_s:
                 # Timeout has been exceeded.
                 raise RuntimeError('Timed out waiting for notebook process to '
@@ -165,9 +493,20 @@ class Session(object):
             self.address = match.group('address')
             self.port = int(match.group('port'))
             self.token = match.group('token')
+            self.startup_duration_s = time.time() - launch_time
+            if self.importtime:
+                from .importtime import report
+
+                self.import_report = report(self.importtime_lines)
         else:
-            self.stop()
-            raise IOError(''.join(self.stderr_lines))
+            if self.process is not None and self.process.poll() is None:
+                # Server failed to start, so do not leave it running.
+                kill_process_tree(self.process.pid)
+            self.process = None
+            self.thread = None
+            raise NotebookStartupError(classify_startup_error(self
+                                                              .stderr_lines)
+                                       or 'exited', self.stderr_lines)
 
     @property
     def notebook_dir(self):
@@ -176,6 +515,394 @@ class Session(object):
                              'server running?')
         return path(self._notebook_dir)
 
+    @property
+    def client(self):
+        '''
+        Client for the REST API of the notebook server, authenticated with
+        :attr:`token` (created on first access).
+
+        Requests made through the client (e.g., ``session.client.kernels
+        .list()``) reuse a pool of keep-alive connections.
+
+        Returns
+        -------
+        jupyter_helpers.client.NotebookClient
+
+
+        .. versionadded:: 0.12
+        '''
+        if self.address is None:
+            raise ValueError('Notebook server address not set.  Is the '
+                             'notebook server running?')
+        if (self._client is None or self._client.address != self.address or
+                self._client.token != self.token):
+            from .client import NotebookClient
+
+            self.close_client()
+            self._client = NotebookClient(self.address, self.token)
+        return self._client
+
+    def execute(self, notebook_path, timeout=None, kernel_name=None,
+                allow_errors=False, inputs=None, cache=True, profile=False):
+        '''
+        Execute notebook in a kernel of the running notebook server, and save
+        outputs (see :func:`jupyter_helpers.execute.execute_notebook`).
+
+        Parameters
+        ----------
+        notebook_path : str
+            Notebook path, relative to notebook directory.
+        timeout : float, optional
+            Maximum time to execute each cell (in seconds).  If exceeded,
+            the kernel is interrupted and execution stops.
+        kernel_name : str, optional
+            Kernel spec name (default: kernel in notebook metadata).
+        allow_errors : bool, optional
+            If ``True``, continue executing after a cell raises an error.
+        inputs : list, optional
+            Paths of files read by notebook (relative to the directory of the
+            notebook), which invalidate cached outputs when changed.
+        cache : bool, optional
+            If ``False``, execute notebook even if outputs are cached (see
+            :attr:`execution_cache`).
+        profile : bool, optional
+            If ``True``, record wall time, kernel CPU time and peak RSS of
+            each cell in the cell metadata of the executed notebook (see
+            :mod:`jupyter_helpers.cellprofile`, e.g., to compare runs).
+
+        Returns
+        -------
+        list
+            Status of each code cell.
+
+
+        .. versionadded:: 0.12
+        '''
+        from .execute import execute_notebook
+
+        notebook_file = self.resource_filename(notebook_path)
+        notebook_path = self.notebook_dir.relpathto(notebook_file)
+        inputs = [notebook_file.parent.joinpath(p) for p in inputs or []]
+        return execute_notebook(self.client, notebook_path, timeout=timeout,
+                                kernel_name=kernel_name,
+                                allow_errors=allow_errors,
+                                pool=self.kernel_pool,
+                                cache=self.execution_cache if cache else None,
+                                inputs=inputs, profile=profile)
+
+    def benchmark_kernels(self, kernels=1, clients=1, duration_s=10,
+                          **kwargs):
+        '''
+        Benchmark round-trip latency and throughput of ``execute``,
+        ``complete`` and ``inspect`` requests to kernels of the running
+        notebook server.
+
+        Parameters
+        ----------
+        kernels : int, optional
+            Number of kernels to start for benchmark.
+        clients : int, optional
+            Number of concurrent clients per kernel.
+        duration_s : float, optional
+            Time to send requests for.
+        **kwargs : dict
+            Additional arguments to pass along to
+            :func:`jupyter_helpers.kernelbench.benchmark_kernels` (e.g.,
+            ``mix`` of request types).
+
+        Returns
+        -------
+        list
+            Latency statistics of each type of request (see
+            :func:`jupyter_helpers.kernelbench.format_report`).
+
+
+        .. versionadded:: 0.12
+        '''
+        from .kernelbench import benchmark_kernels
+
+        return benchmark_kernels(self.client, kernels=kernels,
+                                 clients=clients, duration_s=duration_s,
+                                 **kwargs)
+
+    def load_test(self, clients=10, duration_s=10, **kwargs):
+        '''
+        Load test the running notebook server with concurrent clients
+        listing, reading and saving notebooks and fetching pages and static
+        assets.
+
+        Parameters
+        ----------
+        clients : int, optional
+            Number of concurrent clients.
+        duration_s : float, optional
+            Time to send requests for.
+        **kwargs : dict
+            Additional arguments to pass along to
+            :func:`jupyter_helpers.loadtest.load_test` (e.g., ``mix`` of
+            request types).
+
+        Returns
+        -------
+        list
+            Latency statistics of each type of request (see
+            :func:`jupyter_helpers.kernelbench.format_report`).
+
+
+        .. versionadded:: 0.12
+        '''
+        from .loadtest import load_test
+
+        if self.address is None:
+            raise ValueError('Notebook server address not set.  Is the '
+                             'notebook server running?')
+        return load_test(self.address, self.token, clients=clients,
+                         duration_s=duration_s, **kwargs)
+
+    def close_client(self):
+        '''
+        Close connections of REST API client, if created.
+
+        .. versionadded:: 0.12
+        '''
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @property
+    def source_dir(self):
+        '''
+        Original notebook directory, i.e., the directory mirrored to
+        :attr:`notebook_dir` if ``mirror`` is set, otherwise
+        :attr:`notebook_dir`.
+
+        .. versionadded:: 0.12
+        '''
+        if self.mirror is not None:
+            return self.mirror.source
+        return self.notebook_dir
+
+    def sync(self):
+        '''
+        Synchronize changes in mirrored notebook directory back to original
+        directory now (see ``mirror`` argument).
+
+        Returns
+        -------
+        tuple
+            Number of files copied and removed (see
+            :meth:`jupyter_helpers.mirror.DirectoryMirror.sync`), or ``(0,
+            0)`` if the notebook directory is not mirrored.
+
+
+        .. versionadded:: 0.12
+        '''
+        if self.mirror is None:
+            return 0, 0
+        return self.mirror.sync()
+
+    @property
+    def notebook_index(self):
+        '''
+        Index of notebooks in notebook directory tree (built on first access).
+
+        Returns
+        -------
+        jupyter_helpers.index.NotebookIndex
+
+
+        .. versionadded:: 0.12
+        '''
+        if (self._notebook_index is None or
+                self._notebook_index.root != self.notebook_dir.abspath()):
+            from .index import NotebookIndex
+
+            self._notebook_index = NotebookIndex(self.notebook_dir)
+            if self.watch:
+                self.watcher.subscribe(self._notebook_index.update_paths)
+        return self._notebook_index
+
+    def get_search_index(self, outputs=False):
+        '''
+        Parameters
+        ----------
+        outputs : bool, optional
+            If ``True``, return index which includes cell outputs.
+
+        Returns
+        -------
+        jupyter_helpers.search.SearchIndex
+            Full-text search index of notebooks in notebook directory tree
+            (opened on first call; stored in the Jupyter data directory).
+
+
+        .. versionadded:: 0.12
+        '''
+        notebook_dir = self.notebook_dir.abspath()
+        index = self._search_indexes.get(outputs)
+        if index is None or index.root != notebook_dir:
+            from .search import SearchIndex
+
+            index = SearchIndex(notebook_dir, outputs=outputs)
+            self._search_indexes[outputs] = index
+        return index
+
+    def search(self, query, outputs=False, limit=None, refresh=None):
+        '''
+        Find notebooks in notebook directory tree containing all words in
+        query (see :meth:`jupyter_helpers.search.SearchIndex.search`).
+
+        The search index is updated first from the notebook index (see
+        :attr:`notebook_index`), i.e., only notebooks which changed since the
+        last search are read.
+
+        Parameters
+        ----------
+        query : str
+            Words to search for, e.g., ``'sample_id load*'``.
+        outputs : bool, optional
+            If ``True``, also search cell outputs.
+        limit : int, optional
+            Maximum number of results.
+        refresh : bool, optional
+            If ``True``, check modification times of all notebooks before
+            searching (see :meth:`jupyter_helpers.index.NotebookIndex.refresh`).
+            Defaults to ``True``, unless the notebook directory is watched for
+            changes (see ``watch`` argument).
+
+        Returns
+        -------
+        list
+            Full paths of matching notebooks (e.g., as returned by
+            :meth:`resource_filename`), most relevant first.
+
+
+        .. versionadded:: 0.12
+        '''
+        if refresh is None:
+            refresh = not self.watch
+        created = self._notebook_index is None
+        notebook_index = self.notebook_index
+        if refresh and not created:
+            notebook_index.refresh()
+        search_index = self.get_search_index(outputs)
+        search_index.update(notebook_index.under(notebook_index.root))
+        return search_index.search(query, outputs=outputs, limit=limit)
+
+    def convert_all(self, format='html', output_dir=None, workers=None,
+                    force=False, refresh=None, watch=False):
+        '''
+        Convert all notebooks in notebook directory tree with ``nbconvert``,
+        in a pool of worker processes, skipping notebooks whose content did
+        not change since they were last converted (see
+        :class:`jupyter_helpers.convert.BatchConverter`).
+
+        Parameters
+        ----------
+        format : str, optional
+            ``nbconvert`` exporter name, e.g., ``'html'`` or ``'pdf'``.
+        output_dir : str, optional
+            Root directory of output tree (default: notebook directory, i.e.,
+            outputs are written next to notebooks).
+        workers : int, optional
+            Maximum number of worker processes (default: number of CPUs).
+        force : bool, optional
+            If ``True``, convert notebooks even if unchanged.
+        refresh : bool, optional
+            If ``True``, check modification times of all notebooks first (see
+            :meth:`search`).
+        watch : bool, optional
+            If ``True``, also convert notebooks as soon as they change, while
+            the notebook directory is watched (see :attr:`watcher`).
+            Otherwise, changes reported by the watcher only mark notebooks
+            to be checked by the next conversion (see
+            :meth:`jupyter_helpers.convert.BatchConverter.invalidate`).
+
+        Returns
+        -------
+        list
+            :data:`jupyter_helpers.convert.Conversion` of each notebook,
+            with ``status`` and ``duration_s`` of conversion.
+
+
+        .. versionadded:: 0.12
+        '''
+        if refresh is None:
+            refresh = not self.watch
+        created = self._notebook_index is None
+        notebook_index = self.notebook_index
+        if refresh and not created:
+            notebook_index.refresh()
+        output_dir = path(output_dir or self.notebook_dir).abspath()
+        converter = self._converters.get((format, output_dir))
+        if converter is None or converter.root != notebook_index.root:
+            from .convert import BatchConverter
+
+            converter = BatchConverter(notebook_index.root, format,
+                                       output_dir)
+            self._converters[(format, output_dir)] = converter
+            if self.watcher is not None:
+                self.watcher.subscribe(converter.invalidate)
+        converter.workers = workers or converter.workers
+        results = converter.convert([entry.path for entry in
+                                     notebook_index.under(notebook_index
+                                                          .root)],
+                                    force=force)
+        if watch:
+            if self.watcher is None:
+                raise ValueError('Notebook directory is not watched (see '
+                                 '`watch` argument).')
+            self.watcher.subscribe(converter.update_paths)
+        return results
+
+    @property
+    def watcher(self):
+        '''
+        Watcher of notebook directory tree (started on first access), or
+        ``None`` if session was not created with ``watch=True``.
+
+        Subscribe to be notified of changed paths, e.g.::
+
+            session.watcher.subscribe(notebook_index.update_paths)
+
+        Returns
+        -------
+        jupyter_helpers.watch.DirectoryWatcher
+
+
+        .. versionadded:: 0.12
+        '''
+        if not self.watch:
+            return None
+        if (self._watcher is None or
+                self._watcher.root != self.notebook_dir.abspath()):
+            from .watch import DirectoryWatcher
+
+            self.stop_watcher()
+            self._watcher = DirectoryWatcher(self.notebook_dir)
+            self._watcher.start()
+        return self._watcher
+
+    def stop_watcher(self):
+        '''
+        Stop watching notebook directory tree, if watching.
+
+        .. versionadded:: 0.12
+        '''
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def close_search_indexes(self):
+        '''
+        Close search index databases opened by :meth:`get_search_index`.
+
+        .. versionadded:: 0.12
+        '''
+        for index in self._search_indexes.values():
+            index.close()
+        self._search_indexes.clear()
+
     def resource_filename(self, filename):
         '''
         Return full path to resource within notebook directory based on the
@@ -224,6 +951,11 @@ class Session(object):
         ----------
         filename : str
             Notebook file path relative to notebook directory.
+
+
+        .. versionchanged:: 0.12
+            Create notebook session with idle kernel from :attr:`kernel_pool`
+            (if set) before opening notebook.
         '''
         if filename is None:
             address = self.address + 'tree'
@@ -233,6 +965,14 @@ class Session(object):
                 raise IOError('Notebook path not found: %s' % notebook_path)
             else:
                 address = '%snotebooks/%s' % (self.address, filename)
+                if (self.kernel_pool is not None and
+                        notebook_path.endswith('.ipynb')):
+                    import nbformat
+
+                    metadata = nbformat.read(notebook_path,
+                                             as_version=4).metadata
+                    self.kernel_pool.create_session(filename, metadata.get(
+                        'kernelspec', {}).get('name'))
         webbrowser.open_new_tab(address + '?token=' + self.token)
 
     def stop(self):
@@ -243,11 +983,23 @@ class Session(object):
         .. versionchanged:: 0.11
             Use :func:`kill_process_tree` to ensure notebook server process and
             _all child processes_ are stopped.
+
+        .. versionchanged:: 0.12
+            Synchronize mirrored notebook directory back to original directory,
+            and remove mirror once notebook server is stopped.
+
+            Shut down idle kernels of :attr:`kernel_pool`.
         '''
         if self.daemon and self.process is not None:
+            # Shut down idle kernels while the server is still running.
+            self._stop_kernel_pool()
             kill_process_tree(self.process.pid)
             self.process = None
             self.thread = None
+        self.stop_watcher()
+        self.close_search_indexes()
+        self.close_client()
+        self._stop_mirror()
 
     def __del__(self):
         try:
@@ -256,17 +1008,91 @@ class Session(object):
             print exception
 
 
+def _invalidate_templates(template_cache, root, paths):
+    # Subscriber of notebook directory watcher.  If changes may have been
+    # missed, drop all templates in the watched directory.
+    template_cache.invalidate([root] if paths is None else paths)
+
+
 class SessionManager(object):
-    def __init__(self, daemon=True):
+    def __init__(self, daemon=True, zygote=False, in_process=False,
+                 profile=None, template_cache_bytes=64 << 20, watch=False,
+                 kernel_zygote=False):
         '''
         Parameters
         ----------
         daemon : bool, optional
             If ``True``, kill notebook processes when ``Session`` object is
             deleted.
+        zygote : bool or jupyter_helpers.zygote.NotebookZygote, optional
+            If ``True``, fork new notebook servers from a zygote process
+            (launched on first use) which has the notebook server modules
+            pre-imported.  A :class:`NotebookZygote` instance may also be
+            specified directly.
+        in_process : bool, optional
+            If ``True``, run notebook servers in the current interpreter (see
+            :class:`jupyter_helpers.inprocess.InProcessSession`).
+        profile : str or jupyter_helpers.profiles.LeanProfile, optional
+            Default launch profile for new sessions (see :class:`Session`).
+        template_cache_bytes : int, optional
+            Maximum total size of templates kept in memory by
+            :meth:`launch_from_template` (see
+            :class:`jupyter_helpers.templates.TemplateCache`).  Set to 0 to
+            disable the template cache.
+        watch : bool, optional
+            If ``True``, watch the notebook directory of each new session for
+            changes (see :attr:`Session.watcher`), and drop templates within
+            watched directories from the template cache as they change.
+        kernel_zygote : bool, list or jupyter_helpers.kernel_zygote.KernelZygote, optional
+            If ``True``, fork kernels of new sessions from a zygote process
+            (launched on first use), which has the kernel modules
+            pre-imported.  A list of additional modules to pre-import (e.g.,
+            ``['numpy', 'pandas']``), or a :class:`KernelZygote` instance may
+            also be specified.  Not supported for in-process sessions.
+
+
+        .. versionchanged:: 0.12
+            Add ``zygote``, ``in_process``, ``profile``,
+            ``template_cache_bytes``, ``watch`` and ``kernel_zygote``
+            arguments.
         '''
+        from .templates import TemplateCache
+
         self.sessions = OrderedDict()
         self.daemon = daemon
+        if zygote is True:
+            from .zygote import NotebookZygote
+
+            zygote = NotebookZygote()
+        self.zygote = zygote or None
+        if kernel_zygote is True or isinstance(kernel_zygote, (list, tuple)):
+            from .kernel_zygote import KernelZygote
+
+            kernel_zygote = KernelZygote(() if kernel_zygote is True
+                                         else kernel_zygote)
+        self.kernel_zygote = kernel_zygote or None
+        self.in_process = in_process
+        self.profile = profile
+        self.watch = watch
+        self.template_cache = (TemplateCache(template_cache_bytes)
+                               if template_cache_bytes > 0 else None)
+        # Instantiation reports of the most recent template launch.
+        self.template_reports = []
+        self._notary = None
+
+    @property
+    def notary(self):
+        '''
+        Notary used to sign notebooks written from templates (created on first
+        access, see :func:`jupyter_helpers.trust.get_notary`).
+
+        .. versionadded:: 0.12
+        '''
+        if self._notary is None:
+            from .trust import get_notary
+
+            self._notary = get_notary()
+        return self._notary
 
     def open(self, filepath=None, **kwargs):
         '''
@@ -293,7 +1119,10 @@ class SessionManager(object):
 
     def launch_from_template(self, template_path, notebook_dir=None,
                              overwrite=False, output_name=None,
-                             create_dir=False, no_browser=False, **kwargs):
+                             create_dir=False, no_browser=False,
+                             copy_strategy='auto', parameters=None,
+                             max_output_chars=None, max_attachment_chars=None,
+                             sign=False, **kwargs):
         '''
         Launch a copy of the specified `.ipynb` (template) file in a Jupyter
         notebook session for the specified notebook directory.
@@ -318,7 +1147,48 @@ class SessionManager(object):
             If ``True``, create notebook directory, if necessary.
         no_browser : bool, optional
             If ``True``, do not launch new browser tab.
+        copy_strategy : str, optional
+            Template copy strategy (see
+            :func:`jupyter_helpers.templates.copy_file`).  By default,
+            copy-on-write clone the template if supported by the file system,
+            otherwise stream copy.
+        parameters : dict, optional
+            Parameter values to inject into the copy, as a new cell following
+            the template cell tagged ``parameters`` (see
+            :func:`jupyter_helpers.templates.instantiate_template`).
+        max_output_chars : int, optional
+            If ``0``, strip all outputs from the copy.  Otherwise, replace
+            outputs larger than this by a short notice.
+        max_attachment_chars : int, optional
+            Move cell attachments larger than this to side files next to the
+            copy.
+
+            The size of the copy and of the removed content is reported in
+            :attr:`template_reports` (see
+            :func:`jupyter_helpers.templates.instantiate_template`).
+        sign : bool, optional
+            If ``True``, mark the copy as trusted in the signature database of
+            the notebook server, so its outputs are displayed without
+            sanitizing (e.g., JavaScript and HTML) and without user
+            confirmation.  Only use for trusted templates.
+
+        Returns
+        -------
+        Session
+            Handle to Jupyter notebook session for notebook directory.
+
+        See also
+        --------
+        launch_from_templates
+
+
+        .. versionchanged:: 0.12
+            Add ``copy_strategy``, ``parameters``, ``max_output_chars``,
+            ``max_attachment_chars`` and ``sign`` arguments.  Return notebook
+            session.
         '''
+        from .templates import instantiate_template
+
         template_path = template_path.abspath()
         if output_name is None:
             output_name = template_path.name
@@ -328,6 +1198,10 @@ class SessionManager(object):
         else:
             notebook_dir = path(notebook_dir).abspath()
 
+        # Notebooks may have been created or changed in the mirror of a
+        # running session, so check the up to date directory.
+        self._sync(notebook_dir)
+
         if template_path.parent.realpath() == notebook_dir.realpath():
             raise IOError('Notebook directory must not be the parent directory of '
                           'the template file.')
@@ -339,16 +1213,246 @@ class SessionManager(object):
                 raise IOError('Notebook already exists with same name.')
             # Create notebook directory if it doesn't exist.
             if create_dir:
-                notebook_dir.mkdirs_p()
-
-            template_path.copy(output_path)
+                notebook_dir.makedirs_p()
+
+            report = instantiate_template(template_path, output_path,
+                                          copy_strategy=copy_strategy,
+                                          cache=self.template_cache,
+                                          parameters=parameters,
+                                          max_output_chars=max_output_chars,
+                                          max_attachment_chars=
+                                          max_attachment_chars)
+            self.template_reports = [report]
+            if sign:
+                from .trust import sign_notebooks
+
+                sign_notebooks([output_path], notary=self.notary)
             notebook_path = output_path
 
         session = self.get_session(notebook_dir=notebook_dir, **kwargs)
+        self._pull(session, self.template_reports)
 
         if not no_browser:
             # Open Jupyter notebook in new browser tab.
             session.open(notebook_path.name)
+        return session
+
+    def launch_from_templates(self, entries, notebook_dir=None,
+                              overwrite=False, create_dir=False,
+                              no_browser=False, copy_strategy='auto',
+                              max_output_chars=None, max_attachment_chars=None,
+                              sign=False, workers=8, **kwargs):
+        '''
+        Launch copies of many `.ipynb` (template) files in a single Jupyter
+        notebook session for the specified notebook directory.
+
+        All output notebooks are written concurrently, each to a temporary
+        file which is then renamed into place, i.e., a notebook is either
+        written completely or not at all.
+
+        If no notebook directory is specified, use the current working directory.
+
+        Parameters
+        ----------
+        entries : list
+            Each entry is either a ``(template_path, output_name[,
+            parameters])`` tuple or a ``dict`` with a ``template_path`` key
+            and optional ``output_name`` (defaults to the name of the template
+            file) and ``parameters`` (see :meth:`launch_from_template`)
+            keys.
+        notebook_dir : str, optional
+            Directory to start Jupyter notebook session in.
+        overwrite : bool, optional
+            If ``True``, overwrite existing files in ``notebook_dir``, if
+            necessary.
+        create_dir : bool, optional
+            If ``True``, create notebook directory, if necessary.
+        no_browser : bool, optional
+            If ``True``, do not launch new browser tab.  Otherwise, open a
+            single tab listing the notebook directory (rather than one tab
+            per notebook).
+        copy_strategy : str, optional
+            Template copy strategy (see :meth:`launch_from_template`).
+        max_output_chars : int, optional
+            Strip or truncate outputs (see :meth:`launch_from_template`).
+        max_attachment_chars : int, optional
+            Move large attachments to side files (see
+            :meth:`launch_from_template`).
+        sign : bool, optional
+            If ``True``, mark all output notebooks as trusted (see
+            :meth:`launch_from_template`), in a single database transaction.
+        workers : int, optional
+            Maximum number of notebooks to write concurrently.
+        **kwargs : dict
+            Additional arguments to pass along to :meth:`get_session`.
+
+        Returns
+        -------
+        Session
+            Handle to Jupyter notebook session for notebook directory.
+
+
+        .. versionadded:: 0.12
+        '''
+        from multiprocessing.pool import ThreadPool
+        from .templates import instantiate_template
+
+        if notebook_dir is None:
+            notebook_dir = path(os.getcwd())
+        else:
+            notebook_dir = path(notebook_dir).abspath()
+
+        self._sync(notebook_dir)
+
+        # Validate all entries before writing any notebook.
+        jobs = OrderedDict()
+        for entry in entries:
+            if not isinstance(entry, dict):
+                entry = dict(zip(('template_path', 'output_name',
+                                  'parameters'), entry))
+            template_path = path(entry['template_path']).abspath()
+            if template_path.parent.realpath() == notebook_dir.realpath():
+                raise IOError('Notebook directory must not be the parent '
+                              'directory of the template file.')
+            output_path = notebook_dir.joinpath(entry.get('output_name') or
+                                                template_path.name)
+            if output_path in jobs:
+                raise ValueError('Duplicate output notebook: %s' % output_path)
+            if output_path.isfile() and not overwrite:
+                raise IOError('Notebook already exists with same name: %s' %
+                              output_path)
+            jobs[output_path] = template_path, entry.get('parameters')
+
+        if create_dir:
+            notebook_dir.makedirs_p()
+
+        def instantiate(job):
+            output_path, (template_path, parameters) = job
+            return instantiate_template(template_path, output_path,
+                                        copy_strategy=copy_strategy,
+                                        cache=self.template_cache,
+                                        parameters=parameters,
+                                        max_output_chars=max_output_chars,
+                                        max_attachment_chars=
+                                        max_attachment_chars)
+
+        self.template_reports = []
+        if jobs:
+            pool = ThreadPool(min(workers, len(jobs)))
+            try:
+                self.template_reports = pool.map(instantiate, jobs.items())
+            finally:
+                pool.close()
+                pool.join()
+            if sign:
+                from .trust import sign_notebooks
+
+                sign_notebooks(list(jobs), notary=self.notary)
+
+        session = self.get_session(notebook_dir=notebook_dir, **kwargs)
+        self._pull(session, self.template_reports)
+
+        if not no_browser:
+            # Open summary of notebook directory in new browser tab.
+            session.open()
+        return session
+
+    def run_pipeline(self, nodes, notebook_dir=None, workers=None,
+                     timeout=None, allow_errors=False, callback=None,
+                     profile=False, **kwargs):
+        '''
+        Write notebooks of a pipeline from templates into a notebook
+        directory, and execute them in dependency order in a single session,
+        running independent notebooks concurrently.
+
+        Parameters
+        ----------
+        nodes : list
+            Each node is a ``dict`` with a ``template_path`` key and optional
+            ``output_name``, ``parameters`` (see :meth:`launch_from_templates`),
+            ``name`` (defaults to the output name) and ``depends`` (names of
+            nodes which must succeed first) keys.
+        notebook_dir : str, optional
+            Directory to write notebooks to and start Jupyter notebook
+            session in.
+        workers : int, optional
+            Maximum number of notebooks to execute concurrently (default:
+            number of CPUs).
+        timeout : float, optional
+            Maximum time to execute each cell.
+        allow_errors : bool, optional
+            If ``True``, continue executing a notebook after a cell raises an
+            error.
+        callback : function, optional
+            Called with the name and result of a node whenever a node starts,
+            finishes or is skipped (see
+            :func:`jupyter_helpers.pipeline.run_pipeline`).
+        profile : bool, optional
+            If ``True``, record profile of each cell in the executed notebooks
+            (see :mod:`jupyter_helpers.cellprofile`).
+        **kwargs : dict
+            Additional arguments to pass along to
+            :meth:`launch_from_templates`.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Result of each node by name (see
+            :func:`jupyter_helpers.pipeline.run_pipeline`).
+
+        Raises
+        ------
+        jupyter_helpers.pipeline.PipelineError
+            If any notebook failed.  Nodes depending on a failed node are
+            skipped, but all other nodes are run first.
+
+
+        .. versionadded:: 0.12
+        '''
+        from .pipeline import run_pipeline, topological_order
+
+        pipeline = OrderedDict()
+        entries = []
+        for node in nodes:
+            template_path = path(node['template_path'])
+            output_name = node.get('output_name') or template_path.name
+            name = node.get('name') or output_name
+            if name in pipeline:
+                raise ValueError('Duplicate pipeline node: %s' % name)
+            pipeline[name] = output_name, list(node.get('depends', []))
+            entries.append({'template_path': template_path,
+                            'output_name': output_name,
+                            'parameters': node.get('parameters')})
+        # Validate dependencies before writing any notebook.
+        topological_order(OrderedDict((name, depends) for name, (_, depends)
+                                      in pipeline.items()))
+        kwargs.setdefault('no_browser', True)
+        session = self.launch_from_templates(entries, notebook_dir=
+                                             notebook_dir, **kwargs)
+        return run_pipeline(session, pipeline, workers=workers,
+                            timeout=timeout, allow_errors=allow_errors,
+                            callback=callback, profile=profile)
+
+    def _sync(self, notebook_dir):
+        '''
+        Synchronize mirror of running session for notebook directory (if any)
+        back to notebook directory, e.g., before checking whether notebooks
+        exist.
+        '''
+        session = self.sessions.get(notebook_dir)
+        if session is not None and session.is_alive():
+            session.sync()
+
+    def _pull(self, session, reports):
+        '''
+        Copy notebooks written from templates (and their side files) into
+        mirror of notebook directory, if the session serves a mirror.
+        '''
+        if session.mirror is None:
+            return
+        session.mirror.pull([p for report in reports
+                             for p in [report['output_path']] +
+                             report.get('attachments', [])])
 
     def get_session(self, notebook_dir=None, no_browser=True, **kwargs):
         '''
@@ -397,14 +1501,32 @@ class SessionManager(object):
                 kwargs['no_browser'] = None
             if notebook_dir is not None:
                 kwargs['notebook_dir'] = notebook_dir
-            session = Session(daemon=daemon, **kwargs)
+            kwargs.setdefault('profile', self.profile)
+            kwargs.setdefault('watch', self.watch)
+            if self.in_process:
+                from .inprocess import InProcessSession as session_class
+            else:
+                session_class = Session
+                kwargs.setdefault('zygote', self.zygote)
+                kwargs.setdefault('kernel_zygote', self.kernel_zygote)
+            session = session_class(daemon=daemon, **kwargs)
             session.start()
-            self.sessions[str(session.notebook_dir)] = session
+            if session.watch and self.template_cache is not None:
+                # Drop templates in the notebook directory (e.g., a
+                # `templates` subdirectory) from the cache as they change.
+                session.watcher.subscribe(partial(_invalidate_templates,
+                                                  self.template_cache,
+                                                  session.watcher.root))
+            self.sessions[str(session.source_dir)] = session
         return session
 
     def stop(self):
         for session in (self.sessions.values()):
             session.stop()
+        if self.zygote is not None:
+            self.zygote.stop()
+        if self.kernel_zygote is not None:
+            self.kernel_zygote.stop()
 
     def __del__(self):
         self.stop()
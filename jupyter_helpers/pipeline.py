@@ -0,0 +1,206 @@
+# coding: utf-8
+'''
+Run pipelines of notebooks, i.e., a dependency graph of notebooks, executing
+independent notebooks concurrently.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import OrderedDict
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+import logging
+import time
+
+try:
+    from Queue import Queue
+except ImportError:
+    # Python 3.
+    from queue import Queue
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(RuntimeError):
+    '''
+    Raised when notebooks of a pipeline fail.
+
+    Attributes
+    ----------
+    results : collections.OrderedDict
+        Result of each node (see :func:`run_pipeline`).
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, results):
+        failed = [name for name, result in results.items()
+                  if result['status'] == 'error']
+        super(PipelineError, self).__init__('Pipeline notebooks failed: %s' %
+                                            ', '.join(failed))
+        self.results = results
+
+
+def topological_order(dependencies):
+    '''
+    Parameters
+    ----------
+    dependencies : collections.OrderedDict
+        Names of nodes each node depends on, by node name.
+
+    Returns
+    -------
+    list
+        Node names, each after all nodes it depends on (otherwise in the
+        order of ``dependencies``).
+
+    Raises
+    ------
+    ValueError
+        If a node depends on an unknown node, or dependencies are cyclic.
+    '''
+    for name, depends in dependencies.items():
+        unknown = [d for d in depends if d not in dependencies]
+        if unknown:
+            raise ValueError('Node `%s` depends on unknown nodes: %s' %
+                             (name, ', '.join(unknown)))
+    order = []
+    done = set()
+    remaining = list(dependencies)
+    while remaining:
+        ready = [name for name in remaining
+                 if all(d in done for d in dependencies[name])]
+        if not ready:
+            raise ValueError('Cyclic dependencies between nodes: %s' %
+                             ', '.join(remaining))
+        order.extend(ready)
+        done.update(ready)
+        remaining = [name for name in remaining if name not in done]
+    return order
+
+
+def run_pipeline(session, nodes, workers=None, timeout=None,
+                 allow_errors=False, callback=None, profile=False):
+    '''
+    Execute notebooks of a session in dependency order, running up to
+    ``workers`` notebooks concurrently (each in its own kernel, see
+    :meth:`jupyter_helpers.notebook.Session.execute`).
+
+    Nodes which depend (directly or indirectly) on a failed node are
+    skipped; all other nodes are run.
+
+    Parameters
+    ----------
+    session : jupyter_helpers.notebook.Session
+        Running notebook session.
+    nodes : collections.OrderedDict
+        ``(notebook_path, depends)`` of each node by node name, where
+        ``notebook_path`` is relative to the notebook directory and
+        ``depends`` lists names of nodes which must succeed first.
+    workers : int, optional
+        Maximum number of notebooks to execute concurrently (default: number
+        of CPUs).
+    timeout : float, optional
+        Maximum time to execute each cell.
+    allow_errors : bool, optional
+        If ``True``, continue executing a notebook after a cell raises an
+        error (the notebook still succeeds).
+    callback : function, optional
+        Called (from the calling thread) with the name and the result of a
+        node whenever a node starts (with status ``'running'``), finishes or
+        is skipped.
+    profile : bool, optional
+        If ``True``, record profile of each cell in the executed notebooks
+        (see :mod:`jupyter_helpers.cellprofile`).
+
+    Returns
+    -------
+    collections.OrderedDict
+        Result of each node by name, as a ``dict`` with keys:
+
+         - ``status``: ``'ok'``, ``'error'`` or ``'skipped'``.
+         - ``notebook_path``
+         - ``cells``: status of each code cell (see
+           :func:`jupyter_helpers.execute.execute_notebook`).
+         - ``error``: description of failure, if any.
+         - ``duration_s``: time taken to execute notebook.
+
+    Raises
+    ------
+    PipelineError
+        If any notebook failed (after all other nodes are run).
+    ValueError
+        If dependencies are invalid (see :func:`topological_order`).
+    '''
+    order = topological_order(OrderedDict((name, depends)
+                                          for name, (notebook_path, depends)
+                                          in nodes.items()))
+    workers = workers or cpu_count()
+    results = OrderedDict((name, {'status': None,
+                                  'notebook_path': nodes[name][0],
+                                  'cells': [], 'error': None,
+                                  'duration_s': None}) for name in order)
+
+    def notify(name):
+        logger.info('Pipeline node `%s`: %s', name, results[name]['status'])
+        if callback is not None:
+            callback(name, results[name])
+
+    def execute(name):
+        result = results[name]
+        start = time.time()
+        try:
+            result['cells'] = session.execute(result['notebook_path'],
+                                              timeout=timeout,
+                                              allow_errors=allow_errors,
+                                              profile=profile)
+            failed = [cell for cell in result['cells']
+                      if cell['status'] not in ('ok', 'skipped') and
+                      not (allow_errors and cell['status'] == 'error')]
+            if failed:
+                result['error'] = ('Cell %d: %s' %
+                                   (failed[0]['cell'], failed[0]['ename'] or
+                                    failed[0]['status']) +
+                                   (': %s' % failed[0]['evalue']
+                                    if failed[0]['evalue'] else ''))
+        except Exception as exception:
+            logger.debug('Error executing `%s`.', name, exc_info=True)
+            result['error'] = '%s: %s' % (type(exception).__name__, exception)
+        result['duration_s'] = time.time() - start
+        return name
+
+    completed = Queue()
+    pool = ThreadPool(workers)
+    try:
+        waiting = list(order)
+        running = set()
+        while waiting or running:
+            for name in list(waiting):
+                depends = nodes[name][1]
+                if any(results[d]['status'] in ('error', 'skipped')
+                       for d in depends):
+                    waiting.remove(name)
+                    results[name]['status'] = 'skipped'
+                    results[name]['error'] = 'Dependency failed.'
+                    notify(name)
+                elif (len(running) < workers and
+                      all(results[d]['status'] == 'ok' for d in depends)):
+                    waiting.remove(name)
+                    running.add(name)
+                    results[name]['status'] = 'running'
+                    notify(name)
+                    pool.apply_async(execute, (name, ),
+                                     callback=completed.put)
+            if not running:
+                continue
+            name = completed.get()
+            running.remove(name)
+            results[name]['status'] = ('error' if results[name]['error']
+                                       else 'ok')
+            notify(name)
+    finally:
+        pool.close()
+        pool.join()
+    if any(result['status'] == 'error' for result in results.values()):
+        raise PipelineError(results)
+    return results
@@ -0,0 +1,272 @@
+# coding: utf-8
+'''
+Pool of idle, pre-started kernels of a notebook server.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import deque
+from threading import Condition, Thread
+import logging
+import os
+import posixpath
+
+logger = logging.getLogger(__name__)
+
+
+def _chdir_code(directory):
+    return 'import os as _os\n_os.chdir(%r)\ndel _os' % directory
+
+
+class KernelPool(object):
+    '''
+    Keep idle kernels of a notebook server started (and optionally preloaded,
+    e.g., with imports), and hand them out to new notebook sessions.
+
+    Kernels are started and preloaded in a background thread, which refills
+    the pool as kernels are handed out.
+
+    Parameters
+    ----------
+    client : jupyter_helpers.client.NotebookClient
+        Client of notebook server.
+    size : int, optional
+        Number of idle kernels to keep for each kernel spec.
+    kernel_names : list, optional
+        Names of kernel specs to keep kernels for (default: default kernel
+        spec of notebook server).
+    preload : str or dict, optional
+        Code to execute in each kernel before it is handed out, or code by
+        kernel spec name.
+    timeout_s : float, optional
+        Maximum time to execute preload code.
+    retry_interval_s : float, optional
+        Time to wait before starting another kernel for a kernel spec after
+        a kernel failed to start or preload.
+    root_dir : str, optional
+        Notebook directory of notebook server.  If set, the working directory
+        of Python kernels is changed to the directory of the notebook when
+        handed out (as for kernels started for a notebook session).
+
+    Example
+    -------
+
+        >>> pool = KernelPool(session.client, size=2,
+        ...                   preload='import numpy as np')
+        >>> pool.start()
+        >>> pool.create_session('analysis.ipynb')  # Uses an idle kernel.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, client, size=1, kernel_names=None, preload=None,
+                 timeout_s=120, retry_interval_s=10, root_dir=None):
+        self.client = client
+        self.root_dir = (None if root_dir is None
+                         else os.path.abspath(root_dir))
+        self.size = size
+        self.kernel_names = kernel_names
+        self.preload = preload
+        self.timeout_s = timeout_s
+        self.retry_interval_s = retry_interval_s
+        self.thread = None
+        # Idle kernels (and their language), by kernel spec name.
+        self._idle = {}
+        self._default_kernel_name = None
+        self._condition = Condition()
+        self._stopped = False
+
+    @property
+    def default_kernel_name(self):
+        if self._default_kernel_name is None:
+            self._default_kernel_name = \
+                self.client.kernelspecs.list()['default']
+        return self._default_kernel_name
+
+    def idle(self, kernel_name=None):
+        '''
+        Returns
+        -------
+        int
+            Number of idle kernels of kernel spec.
+        '''
+        with self._condition:
+            return len(self._idle.get(kernel_name or
+                                      self.default_kernel_name, ()))
+
+    def start(self):
+        '''
+        Start filling pool in background thread.
+        '''
+        if self.thread is not None and self.thread.is_alive():
+            return
+        if self.kernel_names is None:
+            self.kernel_names = [self.default_kernel_name]
+        self._stopped = False
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stop filling pool and shut down idle kernels.
+        '''
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self._condition:
+            kernels = [kernel_id for kernels in self._idle.values()
+                       for kernel_id, language in kernels]
+            self._idle.clear()
+        for kernel_id in kernels:
+            try:
+                self.client.kernels.shutdown(kernel_id)
+            except Exception:
+                # E.g., notebook server was stopped first.
+                logger.debug('Error shutting down kernel `%s`.', kernel_id,
+                             exc_info=True)
+
+    def take(self, kernel_name=None):
+        '''
+        Take idle kernel out of pool (which is then refilled).
+
+        Returns
+        -------
+        tuple or None
+            Kernel ID and language of idle kernel, or ``None`` if no kernel of
+            kernel spec is idle.
+        '''
+        kernel_name = kernel_name or self.default_kernel_name
+        while True:
+            with self._condition:
+                kernels = self._idle.get(kernel_name)
+                if not kernels:
+                    return None
+                kernel = kernels.popleft()
+                self._condition.notify_all()
+            try:
+                # Kernel may have died (or been culled) while idle.
+                self.client.kernels.get(kernel[0])
+            except Exception:
+                continue
+            return kernel
+
+    def create_session(self, notebook_path, kernel_name=None,
+                       type='notebook'):
+        '''
+        Create notebook session, using an idle kernel if available.
+
+        If the notebook already has a session, it is returned as is.
+
+        If :attr:`root_dir` is set, the working directory of Python kernels
+        is changed to the directory of the notebook (as for kernels started
+        for a session).  Kernels of other languages keep running in the
+        working directory of the notebook server.
+
+        Parameters
+        ----------
+        notebook_path : str
+            Notebook path, relative to notebook directory of server.
+        kernel_name : str, optional
+            Kernel spec name (default: default kernel spec of notebook
+            server).
+
+        Returns
+        -------
+        dict
+            Session model.
+        '''
+        notebook_path = notebook_path.replace('\\', '/')
+        for session in self.client.sessions.list():
+            if session['path'] == notebook_path:
+                return session
+        kernel = self.take(kernel_name)
+        if kernel is None:
+            return self.client.sessions.create(notebook_path, kernel_name,
+                                               type=type)
+        kernel_id, language = kernel
+        directory = posixpath.dirname(notebook_path)
+        if directory and language == 'python' and self.root_dir is not None:
+            from .execute import KernelConnection
+
+            connection = KernelConnection(self.client, kernel_id)
+            try:
+                connection.execute(_chdir_code(os.path.join(self.root_dir,
+                                                            directory)),
+                                   silent=True, timeout=self.timeout_s)
+            finally:
+                connection.close()
+        return self.client.post('sessions', json={'path': notebook_path,
+                                                  'type': type, 'name': '',
+                                                  'kernel': {'id':
+                                                             kernel_id}})
+
+    def _preload(self, kernel_name):
+        '''
+        Start kernel and execute preload code.
+
+        Returns
+        -------
+        tuple
+            Kernel ID and language.
+        '''
+        from .execute import KernelConnection
+
+        kernel_id = self.client.kernels.start(kernel_name)['id']
+        try:
+            connection = KernelConnection(self.client, kernel_id,
+                                          timeout_s=self.timeout_s)
+            try:
+                language = connection.info.get('language_info',
+                                               {}).get('name')
+                preload = self.preload
+                if isinstance(preload, dict):
+                    preload = preload.get(kernel_name)
+                if language == 'python' and self.root_dir is not None:
+                    preload = '\n'.join([_chdir_code(self.root_dir)] +
+                                        ([preload] if preload else []))
+                if preload:
+                    result = connection.execute(preload, silent=True,
+                                                timeout=self.timeout_s)
+                    if result['status'] != 'ok':
+                        raise RuntimeError('Preload failed in `%s` kernel: '
+                                           '%s' % (kernel_name, result
+                                                   ['evalue'] or
+                                                   result['status']))
+            finally:
+                connection.close()
+        except Exception:
+            self.client.kernels.shutdown(kernel_id)
+            raise
+        return kernel_id, language
+
+    def _missing(self):
+        return [kernel_name for kernel_name in self.kernel_names
+                if len(self._idle.get(kernel_name, ())) < self.size]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not (self._stopped or self._missing()):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                missing = self._missing()
+            for kernel_name in missing:
+                try:
+                    kernel = self._preload(kernel_name)
+                except Exception:
+                    logger.exception('Error starting `%s` kernel for pool.',
+                                     kernel_name)
+                    with self._condition:
+                        if not self._stopped:
+                            self._condition.wait(self.retry_interval_s)
+                    continue
+                with self._condition:
+                    # Idle kernels are shut down when stopped.
+                    self._idle.setdefault(kernel_name, deque()).append(kernel)
+                    if self._stopped:
+                        return
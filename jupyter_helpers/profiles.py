@@ -0,0 +1,298 @@
+# coding: utf-8
+'''
+Launch profiles for Jupyter notebook servers.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from path_helpers import path
+
+
+logger = logging.getLogger(__name__)
+
+#: Frontend config sections which may list notebook extensions to load.
+FRONTEND_SECTIONS = ('common', 'notebook', 'tree', 'edit', 'terminal')
+
+
+def _json_config(config):
+    '''
+    Convert traitlets config to JSON-serializable ``dict``, skipping values
+    which cannot be serialized (e.g., objects set in Python config files).
+    '''
+    result = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            result[key] = _json_config(value)
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            logger.warning('Config value `%s` cannot be stored in lean config '
+                           'and is skipped.', key)
+        else:
+            result[key] = value
+    return result
+
+
+def discover_config():
+    '''
+    Load merged notebook server and frontend config from all Jupyter config
+    directories (i.e., as listed by ``jupyter --paths``).
+
+    Returns
+    -------
+    server_config : dict
+        Notebook server config (``jupyter_notebook_config`` Python and JSON
+        files), where ``NotebookApp.nbserver_extensions`` also includes
+        extensions configured in ``jupyter_notebook_config.d`` directories.
+    frontend_config : dict
+        Frontend config, keyed by section name (e.g., ``'notebook'``).
+
+
+    .. versionadded:: 0.12
+    '''
+    from jupyter_core.paths import jupyter_config_path
+    from notebook.services.config import ConfigManager
+    from traitlets.config.loader import (Config, ConfigFileNotFound,
+                                         JSONFileConfigLoader,
+                                         PyFileConfigLoader)
+
+    config_path = jupyter_config_path()
+    config = Config()
+    # Config directories are listed in descending priority order.
+    for config_dir in config_path[::-1]:
+        for basename in ('jupyter_config', 'jupyter_notebook_config'):
+            for loader_class, ext in ((PyFileConfigLoader, '.py'),
+                                      (JSONFileConfigLoader, '.json')):
+                loader = loader_class(basename + ext, path=config_dir)
+                try:
+                    config.merge(loader.load_config())
+                except ConfigFileNotFound:
+                    pass
+    server_config = _json_config(config)
+
+    # Server extensions are merged by key across config directories, including
+    # files in `jupyter_notebook_config.d` directories (e.g., written when
+    # installing a package), the same way the notebook server loads them.
+    extensions = (ConfigManager(read_config_path=config_path)
+                  .get('jupyter_notebook_config').get('NotebookApp', {})
+                  .get('nbserver_extensions', {}))
+    notebook_app = server_config.get('NotebookApp', {})
+    for name, enabled in notebook_app.get('nbserver_extensions', {}).items():
+        # Not present means extension is only enabled in a Python config file.
+        extensions.setdefault(name, enabled)
+    if extensions:
+        server_config.setdefault('NotebookApp', {})['nbserver_extensions'] = \
+            extensions
+
+    frontend_config = ConfigManager()
+    return (server_config,
+            dict((section, frontend_config.get(section))
+                 for section in FRONTEND_SECTIONS))
+
+
+class LeanProfile(object):
+    '''
+    Launch profile which avoids config discovery and only loads allow-listed
+    extensions.
+
+    On first use, the config from all Jupyter config directories is merged
+    into a single isolated config directory, where every server and frontend
+    extension which is not allow-listed is disabled.  Notebook servers
+    launched with this profile use the isolated directory as their config
+    directory and skip the directories listed in ``JUPYTER_CONFIG_PATH``.
+    Server extensions enabled in the environment and system config
+    directories (which are always read by the server) are disabled by the
+    isolated config, since it takes precedence.
+
+    Parameters
+    ----------
+    nbserver_extensions : list, optional
+        Names of server extension modules to load.
+    nbextensions : list, optional
+        Require paths of frontend notebook extensions to load (e.g.,
+        ``'widgets/extension'``).
+    config_dir : str, optional
+        Directory to write isolated config to.  By default, a directory in the
+        system temporary directory is used, shared by all profiles with the
+        same resulting config.
+
+
+    .. versionadded:: 0.12
+    '''
+    name = 'lean'
+
+    def __init__(self, nbserver_extensions=None, nbextensions=None,
+                 config_dir=None):
+        self.nbserver_extensions = sorted(nbserver_extensions or [])
+        self.nbextensions = sorted(nbextensions or [])
+        self._config_dir = config_dir
+        self._configs = None
+
+    def configs(self):
+        '''
+        Returns
+        -------
+        dict
+            Mapping from path relative to isolated config directory to JSON
+            config (computed on first call).
+        '''
+        if self._configs is None:
+            server_config, frontend_config = discover_config()
+
+            notebook_app = server_config.setdefault('NotebookApp', {})
+            extensions = dict((name, False) for name in
+                              notebook_app.get('nbserver_extensions', {}))
+            extensions.update((name, True) for name in
+                              self.nbserver_extensions)
+            notebook_app['nbserver_extensions'] = extensions
+            # Deprecated list of extensions, which would bypass allow-list.
+            notebook_app.pop('server_extensions', None)
+
+            configs = {'jupyter_notebook_config.json': server_config}
+            for section, config in frontend_config.items():
+                load_extensions = dict((name, False) for name in
+                                       config.get('load_extensions', {}))
+                load_extensions.update((name, True) for name in
+                                       self.nbextensions
+                                       if section in ('notebook', 'common'))
+                if load_extensions:
+                    config['load_extensions'] = load_extensions
+                if config:
+                    configs[os.path.join('nbconfig', section + '.json')] = \
+                        config
+            self._configs = configs
+        return self._configs
+
+    @property
+    def config_dir(self):
+        '''
+        Isolated config directory, written on first access.
+
+        Returns
+        -------
+        path_helpers.path
+        '''
+        configs = self.configs()
+        if self._config_dir is None:
+            digest = hashlib.sha1(json.dumps(configs, sort_keys=True)
+                                  .encode('utf8')).hexdigest()[:12]
+            config_dir = path(tempfile.gettempdir()).joinpath('jupyter-helpers-'
+                                                              'lean-%s' %
+                                                              digest)
+        else:
+            config_dir = path(self._config_dir)
+        for relpath, config in configs.items():
+            config_path = config_dir.joinpath(relpath)
+            data = json.dumps(config, indent=2, sort_keys=True)
+            if config_path.isfile() and config_path.text() == data:
+                continue
+            config_path.parent.makedirs_p()
+            # Write atomically, since other processes may share the directory.
+            fd, temp_path = tempfile.mkstemp(dir=config_path.parent)
+            with os.fdopen(fd, 'w') as output:
+                output.write(data)
+            path(temp_path).rename(config_path)
+        return config_dir
+
+    def env(self, env=None):
+        '''
+        Parameters
+        ----------
+        env : dict, optional
+            Base environment (defaults to current environment).
+
+        Returns
+        -------
+        dict
+            Notebook server environment for profile.
+        '''
+        env = dict(os.environ if env is None else env)
+        env['JUPYTER_CONFIG_DIR'] = str(self.config_dir)
+        env.pop('JUPYTER_CONFIG_PATH', None)
+        return env
+
+
+def get_profile(profile):
+    '''
+    Parameters
+    ----------
+    profile : str or LeanProfile or None
+        Launch profile or profile name (``'lean'`` or ``'default'``).
+
+    Returns
+    -------
+    LeanProfile or None
+        Launch profile (``None`` for default profile).
+
+
+    .. versionadded:: 0.12
+    '''
+    if profile is None or profile == 'default':
+        return None
+    elif profile == 'lean':
+        return LeanProfile()
+    elif isinstance(profile, LeanProfile):
+        return profile
+    raise ValueError('Unknown launch profile: %r' % (profile, ))
+
+
+def compare_startup(profiles=('default', 'lean'), repeat=3, **kwargs):
+    '''
+    Measure notebook server startup time for each launch profile.
+
+    Parameters
+    ----------
+    profiles : list, optional
+        Launch profiles or profile names to compare.
+    repeat : int, optional
+        Number of launches per profile (at least 1).
+    **kwargs : dict
+        Additional arguments to pass along to ``Session`` constructor.
+
+    Returns
+    -------
+    list
+        One ``dict`` per profile with the keys ``profile``, ``times_s``,
+        ``min_s``, ``mean_s`` and ``speedup`` (mean startup time of first
+        profile divided by mean startup time of profile).
+
+    Raises
+    ------
+    ValueError
+        If ``repeat`` is less than 1.
+
+
+    .. versionadded:: 0.12
+    '''
+    from .notebook import Session
+
+    if repeat < 1:
+        raise ValueError('`repeat` must be at least 1.')
+    kwargs.setdefault('no_browser', None)
+    report = []
+    for profile in profiles:
+        profile = get_profile(profile)
+        if profile is not None:
+            # Precompute isolated config before timing launches.
+            profile.config_dir
+        times_s = []
+        for i in range(repeat):
+            session = Session(daemon=True, profile=profile, **kwargs)
+            try:
+                session.start()
+                times_s.append(session.startup_duration_s)
+            finally:
+                session.stop()
+        report.append({'profile': getattr(profile, 'name', 'default'),
+                       'times_s': times_s, 'min_s': min(times_s),
+                       'mean_s': sum(times_s) / len(times_s)})
+    for row in report:
+        row['speedup'] = report[0]['mean_s'] / row['mean_s']
+    return report
@@ -0,0 +1,295 @@
+# coding: utf-8
+'''
+Full-text search of notebooks in a directory tree, using an inverted index
+stored in an SQLite database.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from multiprocessing import Pool, cpu_count
+from threading import Lock
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import sys
+
+from path_helpers import path
+
+
+#: Maximum length of indexed terms.
+MAX_TERM_LENGTH = 64
+
+#: Minimum number of notebooks to index in worker processes (fewer notebooks
+#: are indexed in the current process).
+MIN_PARALLEL = 16
+
+# Kinds of indexed text.
+SOURCE = 0
+OUTPUT = 1
+
+CRE_TERM = re.compile(r'\w+', re.UNICODE)
+CRE_QUERY_TERM = re.compile(r'(\w+)(\*?)', re.UNICODE)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS notebooks (id INTEGER PRIMARY KEY,
+                                      path TEXT UNIQUE, size INTEGER,
+                                      mtime REAL);
+CREATE TABLE IF NOT EXISTS postings (term TEXT, notebook INTEGER,
+                                     cell INTEGER, kind INTEGER);
+CREATE INDEX IF NOT EXISTS postings_term ON postings (term, notebook);
+CREATE INDEX IF NOT EXISTS postings_notebook ON postings (notebook);
+'''
+
+
+def terms(text):
+    '''
+    Returns
+    -------
+    set
+        Distinct lower case words in text.
+    '''
+    return set(term for term in CRE_TERM.findall(text.lower())
+               if len(term) <= MAX_TERM_LENGTH)
+
+
+def _text(value):
+    return u''.join(value) if isinstance(value, list) else (value or u'')
+
+
+def output_text(output):
+    '''
+    Returns
+    -------
+    unicode
+        Searchable text of cell output (i.e., stream text, plain text
+        representations and error messages).
+    '''
+    parts = [_text(output.get('text'))]
+    data = output.get('data', {})
+    for mimetype in ('text/plain', 'text/markdown'):
+        parts.append(_text(data.get(mimetype)))
+    parts += [output.get('ename', u''), output.get('evalue', u'')]
+    return u'\n'.join(parts)
+
+
+def notebook_postings(notebook_path, outputs=False):
+    '''
+    Parameters
+    ----------
+    notebook_path : str
+        Notebook file path.
+    outputs : bool, optional
+        If ``True``, also include terms in cell outputs.
+
+    Returns
+    -------
+    list
+        ``(term, cell index, kind)`` tuples, where kind is either
+        :data:`SOURCE` or :data:`OUTPUT`.  Empty if notebook cannot be read.
+    '''
+    try:
+        with io.open(notebook_path, 'r', encoding='utf8') as input_:
+            notebook = json.load(input_)
+    except (IOError, OSError, ValueError):
+        return []
+    postings = []
+    for i, cell in enumerate(notebook.get('cells', [])):
+        postings.extend((term, i, SOURCE)
+                        for term in terms(_text(cell.get('source'))))
+        if outputs:
+            text = u'\n'.join(output_text(output)
+                              for output in cell.get('outputs', []))
+            postings.extend((term, i, OUTPUT) for term in terms(text))
+    return postings
+
+
+def _notebook_postings(args):
+    return notebook_postings(*args)
+
+
+def _unicode(path_):
+    if isinstance(path_, bytes):
+        return path_.decode(sys.getfilesystemencoding())
+    return path_
+
+
+def default_db_path(root, outputs=False):
+    '''
+    Returns
+    -------
+    path_helpers.path
+        Path of search index database for directory tree, in the Jupyter data
+        directory.
+    '''
+    from jupyter_core.paths import jupyter_data_dir
+
+    digest = hashlib.sha1(_unicode(path(root).abspath()).encode('utf8'))\
+        .hexdigest()
+    return path(jupyter_data_dir()).joinpath('jupyter_helpers', 'search',
+                                             '%s%s.sqlite' %
+                                             (digest[:16],
+                                              '-outputs' if outputs else ''))
+
+
+class SearchIndex(object):
+    '''
+    Inverted index of words in cells of notebooks in a directory tree.
+
+    The index is stored in an SQLite database, so it persists across
+    sessions, and is updated incrementally: only notebooks which were added,
+    modified (by size or modification time) or removed since the last update
+    are indexed again (see :meth:`update`).
+
+    Parameters
+    ----------
+    root : str
+        Root directory of tree.
+    db_path : str, optional
+        Path of index database (default: :func:`default_db_path`).
+    outputs : bool, optional
+        If ``True``, also index cell outputs.
+    workers : int, optional
+        Number of worker processes to read notebooks with (default: number of
+        CPUs).
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, root, db_path=None, outputs=False, workers=None):
+        self.root = path(root).abspath()
+        self.outputs = outputs
+        self.workers = workers or cpu_count()
+        if db_path is None:
+            db_path = default_db_path(self.root, outputs)
+        self.db_path = path(db_path)
+        self.db_path.parent.makedirs_p()
+        self._lock = Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.db:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def update(self, entries):
+        '''
+        Synchronize index with notebooks in tree.
+
+        Parameters
+        ----------
+        entries : list
+            :data:`jupyter_helpers.index.NotebookEntry` of each notebook in
+            tree, e.g., as returned by
+            :meth:`jupyter_helpers.index.NotebookIndex.under` (anything with
+            ``path``, ``size`` and ``mtime`` attributes).
+
+        Returns
+        -------
+        int
+            Number of notebooks added, modified or removed.
+        '''
+        current = dict((_unicode(self.root.relpathto(entry.path)), entry)
+                       for entry in entries)
+        with self._lock:
+            indexed = dict((notebook_path, (id_, size, mtime))
+                           for id_, notebook_path, size, mtime in
+                           self.db.execute('SELECT id, path, size, mtime '
+                                           'FROM notebooks'))
+        removed = [indexed[p][0] for p in indexed if p not in current]
+        changed = sorted(p for p, entry in current.items()
+                         if indexed.get(p, (None, ))[1:] !=
+                         (entry.size, entry.mtime))
+        if not (removed or changed):
+            return 0
+
+        args = [(current[p].path, self.outputs) for p in changed]
+        if len(args) >= MIN_PARALLEL and self.workers > 1:
+            pool = Pool(min(self.workers, len(args)))
+            try:
+                postings = pool.map(_notebook_postings, args,
+                                    chunksize=max(len(args) //
+                                                  (4 * self.workers), 1))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            postings = [_notebook_postings(args_i) for args_i in args]
+
+        with self._lock:
+            with self.db:
+                for id_ in removed + [indexed[p][0] for p in changed
+                                      if p in indexed]:
+                    self.db.execute('DELETE FROM postings WHERE notebook = ?',
+                                    (id_, ))
+                    self.db.execute('DELETE FROM notebooks WHERE id = ?',
+                                    (id_, ))
+                for notebook_path, postings_i in zip(changed, postings):
+                    entry = current[notebook_path]
+                    id_ = self.db.execute('INSERT INTO notebooks (path, size, '
+                                          'mtime) VALUES (?, ?, ?)',
+                                          (notebook_path, entry.size,
+                                           entry.mtime)).lastrowid
+                    self.db.executemany('INSERT INTO postings VALUES '
+                                        '(?, ?, ?, ?)',
+                                        [(term, id_, cell, kind)
+                                         for term, cell, kind in postings_i])
+        return len(removed) + len(changed)
+
+    def search(self, query, outputs=None, limit=None):
+        '''
+        Find notebooks containing all words in query.
+
+        Words are matched case-insensitively; a word ending with ``*`` matches
+        any word starting with it (e.g., ``samp*``).
+
+        Parameters
+        ----------
+        query : str
+            Words to search for.
+        outputs : bool, optional
+            If ``True``, also match words in cell outputs (default: if outputs
+            are indexed).
+        limit : int, optional
+            Maximum number of results.
+
+        Returns
+        -------
+        list
+            Paths of matching notebooks, ordered by the number of matching
+            cells (most first), then by path.
+        '''
+        if outputs is None:
+            outputs = self.outputs
+        elif outputs and not self.outputs:
+            raise ValueError('Cell outputs are not indexed.')
+        conditions = []
+        arguments = []
+        for term, prefix in CRE_QUERY_TERM.findall(query.lower()):
+            if prefix:
+                conditions.append('(term >= ? AND term < ?)')
+                arguments += [term, term + u'\uffff']
+            else:
+                conditions.append('term = ?')
+                arguments.append(term)
+        if not conditions:
+            return []
+        kind = '' if outputs else ' AND kind = %d' % SOURCE
+        notebooks = ' INTERSECT '.join('SELECT notebook FROM postings WHERE '
+                                       '%s%s' % (condition, kind)
+                                       for condition in conditions)
+        sql = ('SELECT n.path, COUNT(DISTINCT p.cell) AS cells '
+               'FROM postings p JOIN notebooks n ON n.id = p.notebook '
+               'WHERE p.notebook IN (%s) AND (%s)%s '
+               'GROUP BY p.notebook ORDER BY cells DESC, n.path' %
+               (notebooks, ' OR '.join(conditions), kind))
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+        with self._lock:
+            rows = self.db.execute(sql, arguments + arguments).fetchall()
+        return [self.root.joinpath(notebook_path)
+                for notebook_path, cells in rows]
@@ -0,0 +1,430 @@
+# coding: utf-8
+'''
+Instantiation of notebook templates, i.e., copying template notebooks into a
+notebook directory.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from collections import OrderedDict
+from threading import Lock
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from path_helpers import path
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows.
+    fcntl = None
+
+
+#: Copy strategies, in order of preference for ``'auto'``.
+COPY_STRATEGIES = ('reflink', 'copy')
+
+#: Linux ``ioctl`` request to clone (i.e., reflink) a file.
+FICLONE = 0x40049409
+
+#: Chunk size for streamed copies.
+CHUNK_SIZE = 1 << 20
+
+# Pairs of `(source device, destination device)` which do not support
+# reflinks.
+_reflink_unsupported = set()
+
+
+def reflink(source, destination):
+    '''
+    Create copy-on-write clone of file (i.e., a reflink), which shares data
+    blocks with the source file until either file is modified.
+
+    Supported on Linux (e.g., Btrfs, XFS) and macOS (APFS).
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Destination file path (must not exist).
+
+    Raises
+    ------
+    OSError
+        If reflinks are not supported by the platform or file system.
+    '''
+    if sys.platform.startswith('linux') and fcntl is not None:
+        with open(source, 'rb') as input_:
+            with open(destination, 'wb') as output:
+                try:
+                    fcntl.ioctl(output.fileno(), FICLONE, input_.fileno())
+                    return
+                except (IOError, OSError) as exception:
+                    error = exception
+        os.remove(destination)
+        raise OSError(error.errno, 'Reflink not supported: %s' %
+                      error.strerror)
+    elif sys.platform == 'darwin':
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(source.encode(sys.getfilesystemencoding()),
+                          destination.encode(sys.getfilesystemencoding()),
+                          0) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, 'Reflink not supported: %s' %
+                          os.strerror(error))
+        return
+    raise OSError(errno.ENOTSUP, 'Reflink not supported on %s.' %
+                  sys.platform)
+
+
+def _streamed_copy(source, destination):
+    with open(source, 'rb') as input_:
+        with open(destination, 'wb') as output:
+            shutil.copyfileobj(input_, output, CHUNK_SIZE)
+    shutil.copymode(source, destination)
+
+
+def replace(source, destination):
+    '''
+    Rename file, replacing destination if it exists.
+    '''
+    if os.name == 'nt' and os.path.exists(destination):
+        # Windows `rename` does not replace existing files.
+        os.remove(destination)
+    os.rename(source, destination)
+
+
+def _temp_path(destination):
+    '''
+    Return unused temporary path next to destination (i.e., on the same file
+    system, so it may be renamed to the destination atomically).
+    '''
+    fd, temp_path = tempfile.mkstemp(prefix='.%s-' % destination.name,
+                                     suffix='.tmp', dir=destination.parent)
+    os.close(fd)
+    os.remove(temp_path)
+    return temp_path
+
+
+def copy_file(source, destination, strategy='auto', cache=None):
+    '''
+    Copy file to destination, replacing destination atomically.
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Destination file path.
+    strategy : str, optional
+        One of:
+
+         - ``'auto'``: Use first supported strategy in
+           :data:`COPY_STRATEGIES`.
+         - ``'reflink'``: Copy-on-write clone (see :func:`reflink`).  Constant
+           time regardless of file size.
+         - ``'hardlink'``: Hard link to source file.  Only suitable for
+           notebooks which are never saved, since the notebook server
+           overwrites saved notebooks *in place*, which would also modify the
+           source file.
+         - ``'copy'``: Streamed copy.
+    cache : TemplateCache, optional
+        If specified, read contents of source file through cache for the
+        ``'copy'`` strategy (i.e., only if the source file is not reflinked or
+        hard linked).
+
+    Returns
+    -------
+    str
+        Copy strategy used.
+    '''
+    source = path(source)
+    destination = path(destination)
+    if strategy == 'auto':
+        devices = (source.stat().st_dev, destination.parent.stat().st_dev)
+        strategies = [s for s in COPY_STRATEGIES
+                      if s != 'reflink' or devices not in _reflink_unsupported]
+    elif strategy in COPY_STRATEGIES + ('hardlink', ):
+        strategies = [strategy]
+    else:
+        raise ValueError('Unknown copy strategy: %r' % strategy)
+
+    temp_path = _temp_path(destination)
+    try:
+        for strategy_i in strategies:
+            try:
+                if strategy_i == 'reflink':
+                    reflink(source, temp_path)
+                elif strategy_i == 'hardlink':
+                    os.link(source, temp_path)
+                elif cache is not None and cache.fits(source):
+                    with open(temp_path, 'wb') as output:
+                        output.write(cache.get(source).data)
+                    shutil.copymode(source, temp_path)
+                else:
+                    _streamed_copy(source, temp_path)
+            except OSError:
+                if strategy_i == 'reflink' and strategy == 'auto':
+                    _reflink_unsupported.add(devices)
+                    continue
+                raise
+            replace(temp_path, destination)
+            return strategy_i
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _validation_error(data):
+    '''
+    Returns
+    -------
+    str or None
+        Reason notebook JSON is invalid, or ``None`` if it is valid.
+    '''
+    import nbformat
+
+    try:
+        notebook = json.loads(data.decode('utf8'))
+    except ValueError as exception:
+        return 'not JSON (%s)' % exception
+    if not isinstance(notebook, dict) or 'nbformat' not in notebook:
+        return 'not a notebook'
+    try:
+        nbformat.validate(notebook)
+    except nbformat.ValidationError as exception:
+        return str(exception).splitlines()[0]
+    return None
+
+
+class CachedTemplate(object):
+    '''
+    Template notebook contents held by a :class:`TemplateCache`.
+
+    Contents are parsed and validated once, when read.
+
+    Attributes
+    ----------
+    path : path_helpers.path
+        Real path of template file.
+    mtime : float
+        Modification time of template file when read.
+    data : bytes
+        Contents of template file.
+    error : str or None
+        Reason template is not a valid notebook, or ``None`` if it is valid.
+    '''
+    def __init__(self, path_, mtime, data):
+        self.path = path_
+        self.mtime = mtime
+        self.data = data
+        self.error = _validation_error(data)
+
+    def validate(self):
+        '''
+        Raises
+        ------
+        ValueError
+            If template is not a valid notebook.
+        '''
+        if self.error is not None:
+            raise ValueError('Invalid template notebook `%s`: %s' %
+                             (self.path, self.error))
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+class TemplateCache(object):
+    '''
+    In-memory cache of template notebooks.
+
+    Entries are keyed by the real path of each template and are invalidated
+    when the modification time or size of the template file changes.  Least
+    recently used entries are evicted when the total size of the cached
+    templates exceeds ``max_bytes``.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Maximum total size of cached templates.  Templates larger than this are
+        not cached.
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fits(self, template_path):
+        '''
+        Returns
+        -------
+        bool
+            ``True`` if template file is small enough to be cached (larger
+            templates should be streamed from disk instead).
+        '''
+        return path(template_path).size <= self.max_bytes
+
+    def get(self, template_path):
+        '''
+        Parameters
+        ----------
+        template_path : str
+            Path to template ``.ipynb`` file.
+
+        Returns
+        -------
+        CachedTemplate
+            Template contents, read from disk if not cached or if template file
+            changed since it was cached.
+        '''
+        template_path = path(template_path).realpath()
+        stat = template_path.stat()
+        with self._lock:
+            entry = self._entries.pop(template_path, None)
+            if entry is not None:
+                if (entry.mtime, entry.size) == (stat.st_mtime, stat.st_size):
+                    # Mark entry as most recently used.
+                    self._entries[template_path] = entry
+                    return entry
+                self.size -= entry.size
+        entry = CachedTemplate(template_path, stat.st_mtime,
+                               template_path.bytes())
+        if entry.size <= self.max_bytes:
+            with self._lock:
+                previous = self._entries.pop(template_path, None)
+                if previous is not None:
+                    self.size -= previous.size
+                self._entries[template_path] = entry
+                self.size += entry.size
+                while self.size > self.max_bytes:
+                    key, evicted = self._entries.popitem(last=False)
+                    self.size -= evicted.size
+        return entry
+
+    def invalidate(self, paths=None):
+        '''
+        Drop cache entries, e.g., as a subscriber of a
+        :class:`jupyter_helpers.watch.DirectoryWatcher` of a directory
+        containing templates.
+
+        Parameters
+        ----------
+        paths : list, optional
+            Template paths, or directories containing templates, to drop
+            (default: all).
+        '''
+        with self._lock:
+            if paths is None:
+                self._entries.clear()
+                self.size = 0
+                return
+            for path_i in paths:
+                path_i = path(path_i).realpath()
+                prefix = path_i.joinpath('')
+                for template_path in list(self._entries):
+                    if (template_path == path_i or
+                            template_path.startswith(prefix)):
+                        entry = self._entries.pop(template_path)
+                        self.size -= entry.size
+
+
+def instantiate_template(template_path, output_path, copy_strategy='auto',
+                         cache=None, parameters=None, max_output_chars=None,
+                         max_attachment_chars=None):
+    '''
+    Write a copy of a template notebook.
+
+    If any of ``parameters``, ``max_output_chars`` or ``max_attachment_chars``
+    are specified, the template is rewritten as a stream (i.e., without
+    loading it into memory) instead of being copied.
+
+    Parameters
+    ----------
+    template_path : str
+        Path to template ``.ipynb`` file.
+    output_path : str
+        Output notebook path.
+    copy_strategy : str, optional
+        File copy strategy (see :func:`copy_file`).
+    cache : TemplateCache, optional
+        If specified, read template contents through cache, and check that
+        the template is a valid notebook (validated once per template
+        version).  Templates larger than the cache are neither cached nor
+        validated.
+    parameters : dict, optional
+        Parameter values to inject after the template cell tagged
+        ``parameters`` (see :class:`jupyter_helpers.nbstream.ParameterInjector`).
+    max_output_chars : int, optional
+        If ``0``, strip all outputs.  Otherwise, replace outputs larger than
+        this (as JSON text) by a short notice (see
+        :class:`jupyter_helpers.nbstream.OutputStripper`).
+    max_attachment_chars : int, optional
+        Move cell attachments larger than this (as JSON text) to files in a
+        ``<output name>_files`` directory next to the output notebook.
+
+    Returns
+    -------
+    dict
+        Instantiation report, with the keys ``output_path``, ``strategy``
+        (copy strategy used, or ``'rewrite'``), ``template_bytes`` (size of
+        template notebook) and ``bytes`` (size of output notebook).
+
+        If the template is rewritten, the report also includes a summary of
+        removed content (see :attr:`jupyter_helpers.nbstream.OutputStripper.stats`).
+
+    Raises
+    ------
+    ValueError
+        If ``parameters`` are specified and the template has no cell tagged
+        ``parameters``, or if ``cache`` is specified and the template is not a
+        valid notebook.
+    '''
+    output_path = path(output_path)
+    report = {'output_path': output_path,
+              'template_bytes': path(template_path).size}
+    entry = None
+    if cache is not None and cache.fits(template_path):
+        entry = cache.get(template_path)
+        entry.validate()
+    if parameters or max_output_chars is not None or \
+            max_attachment_chars is not None:
+        from .nbstream import rewrite_notebook
+
+        attachments_dir = output_path.parent.joinpath(output_path.namebase +
+                                                      '_files')
+        temp_path = _temp_path(output_path)
+        try:
+            report.update(rewrite_notebook(template_path, temp_path,
+                                           data=None if entry is None
+                                           else entry.data,
+                                           parameters=parameters or None,
+                                           max_output_chars=max_output_chars,
+                                           max_attachment_chars=
+                                           max_attachment_chars,
+                                           attachments_dir=attachments_dir))
+            shutil.copymode(template_path, temp_path)
+            replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        report['strategy'] = 'rewrite'
+    else:
+        report['strategy'] = copy_file(template_path, output_path,
+                                       strategy=copy_strategy, cache=cache)
+    report['bytes'] = output_path.size
+    return report
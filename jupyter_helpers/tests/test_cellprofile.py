@@ -0,0 +1,50 @@
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import cellprofile, notebook
+
+pytest.importorskip('requests')
+
+
+def test_compare():
+    before = [cellprofile.CellProfile(0, 'a = 1', 1., 1., 100 << 20),
+              cellprofile.CellProfile(2, 'b = 2', 1., 1., 100 << 20)]
+    after = [cellprofile.CellProfile(0, 'a = 1', 1.1, 1., 100 << 20),
+             cellprofile.CellProfile(2, 'b = 2', 2., .5, 200 << 20),
+             cellprofile.CellProfile(3, 'c = 3', 5., 5., 200 << 20)]
+    comparisons = cellprofile.compare(before, after)
+    assert [c.regressions for c in comparisons] == \
+        [[], ['duration_s', 'peak_rss_bytes'], []]
+    assert comparisons[2].before is None
+    report = cellprofile.format_comparison(comparisons)
+    assert report.splitlines()[2].startswith('!    2 ')
+    assert report.splitlines()[-1] == '1 of 3 cells regressed.'
+
+
+def test_execute_profile(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    cells = [nbformat.v4.new_code_cell('import time\n'
+                                       'start = time.time()\n'
+                                       'while time.time() - start < .3:\n'
+                                       '    pass'),
+             nbformat.v4.new_code_cell('1 / 0'),
+             nbformat.v4.new_code_cell('time.sleep(.3)\n'
+                                       'x = " " * (64 << 20)')]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('a.ipynb'))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        statuses = session.execute('a.ipynb', allow_errors=True, profile=True)
+    finally:
+        sm.stop()
+    assert statuses[0]['cpu_s'] > .2
+    assert statuses[1]['cpu_s'] is None
+    profiles = cellprofile.read(notebook_dir.joinpath('a.ipynb'))
+    assert [p.cell for p in profiles] == [0, 1, 2]
+    assert profiles[0].cpu_s == statuses[0]['cpu_s']
+    # Sleeping does not use CPU time.
+    assert profiles[2].duration_s > .3 and profiles[2].cpu_s < .2
+    assert profiles[2].peak_rss_bytes >= max(profiles[0].peak_rss_bytes,
+                                             64 << 20)
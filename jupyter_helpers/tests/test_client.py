@@ -0,0 +1,79 @@
+# coding: utf-8
+import sys
+
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+
+requests = pytest.importorskip('requests')
+
+
+def test_client(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        client = session.client
+        assert client is session.client
+        assert client.version()
+
+        model = client.contents.save('a b.ipynb', {
+            'type': 'notebook', 'content': nbformat.v4.new_notebook()})
+        assert model['path'] == 'a b.ipynb'
+        assert notebook_dir.joinpath('a b.ipynb').isfile()
+        assert [m['name'] for m in client.contents.list()] == ['a b.ipynb']
+        client.contents.rename('a b.ipynb', 'b.ipynb')
+        assert client.contents.get('b.ipynb')['content']['cells'] == []
+
+        kernel = client.kernels.start()
+        assert [k['id'] for k in client.kernels.list()] == [kernel['id']]
+        client.kernels.shutdown(kernel['id'])
+        assert client.kernels.list() == []
+        assert client.kernelspecs.list()['default']
+
+        with pytest.raises(requests.HTTPError):
+            client.contents.get('missing.ipynb')
+        client.contents.delete('b.ipynb')
+        assert not notebook_dir.joinpath('b.ipynb').exists()
+    finally:
+        sm.stop()
+    assert session._client is None
+
+
+def test_api_path():
+    from jupyter_helpers.client import _api_path
+
+    assert _api_path(u'/sub dir\\caf\xe9 #1.ipynb/') == \
+        'sub%20dir/caf%C3%A9%20%231.ipynb'
+    assert _api_path(u'caf\xe9.ipynb'.encode('utf8')) == 'caf%C3%A9.ipynb'
+
+
+def _encodable(name):
+    try:
+        name.encode(sys.getfilesystemencoding() or 'ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _encodable(u'caf\xe9'), reason='File system encoding '
+                    'does not support non-ASCII file names.')
+def test_client_non_ascii(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    tmpdir.mkdir('sub dir')
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        client = session.client
+        name = u'sub dir/café #1.ipynb'
+        model = client.contents.save(name, {
+            'type': 'notebook', 'content': nbformat.v4.new_notebook()})
+        assert model['path'] == name
+        assert tmpdir.join(u'sub dir', u'café #1.ipynb').check(file=1)
+        assert client.contents.get(name)['name'] == u'café #1.ipynb'
+        assert [m['name'] for m in client.contents.list(u'sub dir')] == \
+            [u'café #1.ipynb']
+    finally:
+        sm.stop()
@@ -0,0 +1,114 @@
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers.convert import BatchConverter
+
+pytest.importorskip('nbconvert')
+
+
+def test_convert(tmpdir):
+    root = path(str(tmpdir.mkdir('notebooks')))
+    root.joinpath('sub').makedirs_p()
+    for i, notebook_path in enumerate(['a.ipynb', 'b.ipynb',
+                                       'sub/c.ipynb']):
+        nbformat.write(nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_markdown_cell('# Notebook %d' % i)]),
+            root.joinpath(notebook_path))
+    output_dir = path(str(tmpdir.join('archive')))
+    converter = BatchConverter(root, 'html', output_dir, workers=2)
+    results = converter.convert()
+    assert [r.status for r in results] == ['converted'] * 3
+    assert results[2].output_path == output_dir.joinpath('sub', 'c.html')
+    assert 'Notebook 2' in results[2].output_path.text()
+
+    # Unchanged notebooks are skipped, even if modified, and the manifest is
+    # persisted.
+    root.joinpath('a.ipynb').utime((0, 0))
+    nbformat.write(nbformat.v4.new_notebook(cells=[
+        nbformat.v4.new_markdown_cell('# Changed')]),
+        root.joinpath('b.ipynb'))
+    converter = BatchConverter(root, 'html', output_dir)
+    results = converter.convert()
+    assert [r.status for r in results] == ['skipped', 'converted',
+                                           'skipped']
+    assert 'Changed' in output_dir.joinpath('b.html').text()
+
+    assert converter.update_paths([root.joinpath('a.ipynb'),
+                                   output_dir.joinpath('a.html')])[0]\
+        .status == 'skipped'
+    # Notebooks removed since listed are dropped from the manifest.
+    results = converter.convert([root.joinpath('missing.ipynb'),
+                                 root.joinpath('a.ipynb')])
+    assert [r.status for r in results] == ['skipped', 'removed']
+    root.joinpath('a.ipynb').remove()
+    assert converter.convert([root.joinpath('a.ipynb')])[0].status == \
+        'removed'
+    assert 'a.ipynb' not in converter.manifest
+    root.joinpath('bad.ipynb').write_text('{')
+    results = converter.update_paths([root.joinpath('bad.ipynb')])
+    assert results[0].status == 'error'
+    assert not output_dir.joinpath('bad.html').exists()
+
+
+def test_session_convert_all(tmpdir):
+    from jupyter_helpers import notebook
+
+    notebook_dir = path(str(tmpdir))
+    for name in ('a.ipynb', 'b.ipynb'):
+        nbformat.write(nbformat.v4.new_notebook(),
+                       notebook_dir.joinpath(name))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        assert [r.status for r in session.convert_all()] == ['converted'] * 2
+        assert notebook_dir.joinpath('b.html').isfile()
+        assert [r.status for r in session.convert_all()] == ['skipped'] * 2
+    finally:
+        sm.stop()
+
+
+def test_convert_changed_during_conversion(tmpdir, monkeypatch):
+    from jupyter_helpers import convert
+
+    root = path(str(tmpdir))
+    notebook_path = root.joinpath('a.ipynb')
+    nbformat.write(nbformat.v4.new_notebook(), notebook_path)
+    convert_notebook = convert.convert_notebook
+
+    def edit_and_convert(*args):
+        output_path = convert_notebook(*args)
+        # Notebook is saved while (i.e., after) it is converted.
+        nbformat.write(nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_markdown_cell('# Changed')]), notebook_path)
+        return output_path
+
+    monkeypatch.setattr(convert, 'convert_notebook', edit_and_convert)
+    converter = BatchConverter(root, 'html', workers=1)
+    assert converter.convert()[0].status == 'converted'
+    monkeypatch.setattr(convert, 'convert_notebook', convert_notebook)
+    assert converter.convert()[0].status == 'converted'
+    assert 'Changed' in root.joinpath('a.html').text()
+
+
+def test_convert_invalidate(tmpdir):
+    root = path(str(tmpdir))
+    for name in ('a.ipynb', 'b.ipynb'):
+        nbformat.write(nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_markdown_cell('# Before')]), root.joinpath(name))
+        root.joinpath(name).utime((1e9, 1e9))
+    converter = BatchConverter(root, 'html', workers=1)
+    assert [r.status for r in converter.convert()] == ['converted'] * 2
+
+    # Change with the same size and modification time is only detected once
+    # reported (e.g., by a directory watcher).
+    notebook_path = root.joinpath('a.ipynb')
+    notebook_path.write_text(notebook_path.text().replace('Before', 'After '))
+    notebook_path.utime((1e9, 1e9))
+    assert converter.convert()[0].status == 'skipped'
+    root.joinpath('b.ipynb').remove()
+    converter.invalidate([root])
+    assert 'b.ipynb' not in converter.manifest
+    results = converter.convert()
+    assert [r.status for r in results] == ['converted']
+    assert 'After' in root.joinpath('a.html').text()
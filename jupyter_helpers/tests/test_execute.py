@@ -0,0 +1,125 @@
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+
+pytest.importorskip('requests')
+
+
+def test_execute(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    notebook_dir.joinpath('sub').makedirs_p()
+    cells = [nbformat.v4.new_markdown_cell('# Title'),
+             nbformat.v4.new_code_cell('import os\n'
+                                       'print(os.path.basename(os.getcwd()))\n'
+                                       'print(1)'),
+             nbformat.v4.new_code_cell('x = 2\nx * 3'),
+             nbformat.v4.new_code_cell('1 / 0'),
+             # Outputs of a previous run.
+             nbformat.v4.new_code_cell('y = 1', execution_count=4, outputs=[
+                 nbformat.v4.new_output('stream', text='stale\n')])]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('sub', 'a.ipynb'))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        statuses = session.execute('sub/a.ipynb', timeout=60)
+        assert [(s['cell'], s['status']) for s in statuses] == \
+            [(1, 'ok'), (2, 'ok'), (3, 'error'), (4, 'skipped')]
+        assert statuses[2]['ename'] == 'ZeroDivisionError'
+        # Kernel is shut down afterwards.
+        assert session.client.kernels.list() == []
+
+        result = nbformat.read(notebook_dir.joinpath('sub', 'a.ipynb'),
+                               as_version=4)
+        # Kernel runs in notebook directory, and stream outputs are merged.
+        assert result.cells[1].outputs[0].text == 'sub\n1\n'
+        assert result.cells[2].outputs[0].data['text/plain'] == '6'
+        assert result.cells[2].execution_count == 2
+        assert result.cells[3].outputs[0].output_type == 'error'
+        # Skipped cells are cleared.
+        assert result.cells[4].outputs == []
+        assert result.cells[4].execution_count is None
+
+        statuses = session.execute('sub/a.ipynb', allow_errors=True)
+        assert statuses[-1]['status'] == 'ok'
+    finally:
+        sm.stop()
+
+
+def test_execute_timeout(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    cells = [nbformat.v4.new_code_cell('import time\ntime.sleep(30)'),
+             nbformat.v4.new_code_cell('x = 1')]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('a.ipynb'))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        statuses = session.execute('a.ipynb', timeout=1)
+        assert [s['status'] for s in statuses] == ['timeout', 'skipped']
+    finally:
+        sm.stop()
+
+
+def test_execute_cache(tmpdir):
+    from jupyter_helpers.cache import ExecutionCache
+
+    notebook_dir = path(str(tmpdir.mkdir('notebooks')))
+    notebook_dir.joinpath('input.txt').write_text('a')
+    cells = [nbformat.v4.new_markdown_cell('# Title'),
+             nbformat.v4.new_code_cell('import os\n'
+                                       'print(open("input.txt").read())\n'
+                                       'print(os.getpid())')]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('a.ipynb'))
+    cache = ExecutionCache(str(tmpdir.join('cache')))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir,
+                             execution_cache=cache)
+
+    def output():
+        notebook = nbformat.read(notebook_dir.joinpath('a.ipynb'),
+                                 as_version=4)
+        return notebook.cells[-1].outputs[0].text
+
+    try:
+        assert session.execute('a.ipynb', inputs=['input.txt'])[0]['status'] \
+            == 'ok'
+        first = output()
+        assert first.startswith('a\n')
+        assert len(cache.entries()) == 1
+
+        # Changing markdown cells does not invalidate outputs.
+        notebook_ = nbformat.read(notebook_dir.joinpath('a.ipynb'),
+                                  as_version=4)
+        notebook_.cells[-1].outputs = []
+        notebook_.cells.insert(0, nbformat.v4.new_markdown_cell('Note'))
+        nbformat.write(notebook_, notebook_dir.joinpath('a.ipynb'))
+        statuses = session.execute('a.ipynb', inputs=['input.txt'])
+        assert [(s['cell'], s['status']) for s in statuses] == [(2, 'ok')]
+        assert output() == first
+
+        # Changing an input file does.
+        notebook_dir.joinpath('input.txt').write_text('b')
+        session.execute('a.ipynb', inputs=['input.txt'])
+        assert output().startswith('b\n')
+        assert len(cache.entries()) == 2
+        session.execute('a.ipynb', inputs=['input.txt'], cache=False)
+        assert output() != first
+    finally:
+        sm.stop()
+
+
+def test_execution_cache_evict(tmpdir):
+    from jupyter_helpers.cache import ExecutionCache
+
+    cache = ExecutionCache(str(tmpdir), max_bytes=100)
+    cache.put('aa', {'data': 'x' * 30})
+    cache.put('ab', {'data': 'y' * 30})
+    path(cache.entries()[0][0]).utime((0, 0))
+    cache.put('ba', {'data': 'z' * 30})
+    assert cache.get('aa') is None
+    assert cache.get('ab') == {'data': 'y' * 30}
+    assert len(cache.entries()) == 2
@@ -0,0 +1,30 @@
+from jupyter_helpers import importtime
+
+
+def test_report():
+    lines = ['import time: self [us] | cumulative | imported package\n',
+             'import time:       100 |        100 |     b\n',
+             'import time:       250 |        350 |   a\n',
+             '[I 13:03:10.907 NotebookApp] Serving notebooks from ...\n',
+             'import time:       500 |        500 | c\n']
+    records = importtime.report(lines)
+    assert [r.module for r in records] == ['c', 'a', 'b']
+    assert records[1] == importtime.ImportTime('a', 250, 350, 1)
+    assert records[2].depth == 2
+
+
+def test_session_importtime():
+    from jupyter_helpers import notebook
+
+    session = notebook.Session(daemon=True, no_browser=None, importtime=True)
+    session.start()
+    try:
+        assert session.is_alive()
+        assert session.import_report
+        assert any(r.module == 'tornado'
+                   for r in session.import_report)
+        assert session.importtime_lines
+        assert not any(line.startswith(importtime.PREFIX)
+                       for line in session.stderr_lines)
+    finally:
+        session.stop()
@@ -0,0 +1,64 @@
+import time
+
+import nbformat
+from path_helpers import path
+
+from jupyter_helpers.index import NotebookIndex, kernel_name
+
+
+def _write(notebook_path, kernel='python2', cells=1):
+    notebook = nbformat.v4.new_notebook(cells=[
+        nbformat.v4.new_code_cell('x = %d' % i) for i in range(cells)])
+    notebook.metadata.kernelspec = {'name': kernel, 'display_name': kernel,
+                                    'language': 'python'}
+    notebook_path.parent.makedirs_p()
+    nbformat.write(notebook, notebook_path)
+
+
+def test_kernel_name(tmpdir):
+    notebook_path = path(str(tmpdir.join('a.ipynb')))
+    _write(notebook_path, 'python3', cells=3)
+    assert kernel_name(notebook_path) == 'python3'
+
+    # Kernel name is not at end of file (e.g., keys not sorted).
+    notebook_path.write_text('{"metadata": {"kernelspec": {"name": "ir"}}, '
+                             '"cells": [%s]}' % ', '.join(['"x"'] * 50000))
+    assert kernel_name(notebook_path) == 'ir'
+
+
+def test_notebook_index(tmpdir):
+    root = path(str(tmpdir))
+    _write(root.joinpath('a.ipynb'))
+    _write(root.joinpath('sub', 'b.ipynb'), 'python3')
+    _write(root.joinpath('sub', 'deeper', 'c.ipynb'))
+    _write(root.joinpath('.hidden', 'd.ipynb'))
+    root.joinpath('sub', 'notes.txt').write_text('not a notebook')
+
+    index = NotebookIndex(root)
+    assert list(index) == [root.joinpath('a.ipynb'),
+                           root.joinpath('sub', 'b.ipynb'),
+                           root.joinpath('sub', 'deeper', 'c.ipynb')]
+    assert index[root.joinpath('sub', 'b.ipynb')].kernel_name == 'python3'
+    assert [e.path.name for e in index.under(root.joinpath('sub'))] == \
+        ['b.ipynb', 'c.ipynb']
+    assert [e.path.name for e in index.by_kernel('python2')] == \
+        ['a.ipynb', 'c.ipynb']
+
+    # Detect changes by modification time.
+    time.sleep(.01)
+    root.joinpath('sub', 'b.ipynb').remove()
+    root.joinpath('sub', 'deeper').rmtree()
+    _write(root.joinpath('a.ipynb'), 'python3', cells=2)
+    _write(root.joinpath('new', 'e.ipynb'))
+    index.refresh()
+    assert list(index) == [root.joinpath('a.ipynb'),
+                           root.joinpath('new', 'e.ipynb')]
+    assert index[root.joinpath('a.ipynb')].kernel_name == 'python3'
+
+    # Update from list of changed paths.
+    _write(root.joinpath('new', 'f.ipynb'))
+    root.joinpath('a.ipynb').remove()
+    index.update_paths([root.joinpath('new', 'f.ipynb'),
+                        root.joinpath('a.ipynb')])
+    assert list(index) == [root.joinpath('new', 'e.ipynb'),
+                           root.joinpath('new', 'f.ipynb')]
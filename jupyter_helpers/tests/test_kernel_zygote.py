@@ -0,0 +1,41 @@
+import os
+import time
+
+import nbformat
+import psutil
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+
+pytest.importorskip('requests')
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires `os.fork`.')
+def test_kernel_zygote(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    cells = [nbformat.v4.new_code_cell('import os, sys\n'
+                                       'print("sqlite3" in sys.modules)\n'
+                                       'print(os.getppid())')]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('a.ipynb'))
+    sm = notebook.SessionManager(kernel_zygote=['sqlite3', 'missing_module'])
+    try:
+        session = sm.get_session(notebook_dir=notebook_dir)
+        zygote = sm.kernel_zygote
+        assert zygote.failed_modules == ['missing_module']
+        assert [s['status'] for s in session.execute('a.ipynb')] == ['ok']
+        output = nbformat.read(notebook_dir.joinpath('a.ipynb'),
+                               as_version=4).cells[0].outputs[0].text
+        # Kernel is forked from zygote, with modules pre-imported.
+        assert output.split() == ['True', str(zygote.process.pid)]
+        # Forked kernel exits when shut down.
+        zygote_process = psutil.Process(zygote.process.pid)
+        for i in range(40):
+            if not zygote_process.children():
+                break
+            time.sleep(.05)
+        assert zygote_process.children() == []
+    finally:
+        sm.stop()
+    assert sm.kernel_zygote.process is None
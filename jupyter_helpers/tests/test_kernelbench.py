@@ -0,0 +1,45 @@
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import kernelbench, notebook
+
+pytest.importorskip('requests')
+
+
+def test_summarize():
+    stats = kernelbench.summarize('execute', [.4, .1, .2, .3, .5], 1, 2.)
+    assert stats.count == 6
+    assert stats.throughput == 2.5
+    assert stats.p50_s == .3
+    assert abs(stats.p90_s - .46) < 1e-9
+    assert stats.max_s == .5
+    assert kernelbench.summarize('inspect', [], 0, 1.).p99_s is None
+
+
+def test_aggregate():
+    results = [({'a': [.1, .2], 'b': []}, {'a': 0, 'b': 1}),
+               ({'a': [.3], 'b': [.4]}, {'a': 2, 'b': 0})]
+    stats = kernelbench.aggregate(results, ['a', 'b'], 1.)
+    assert [(s.name, s.count, s.errors) for s in stats] == \
+        [('a', 5, 2), ('b', 2, 1), ('all', 7, 3)]
+    assert stats[-1].max_s == .4
+
+
+def test_benchmark_kernels(tmpdir):
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=path(str(tmpdir)))
+    try:
+        stats = session.benchmark_kernels(kernels=1, clients=2,
+                                          duration_s=1)
+        # Benchmark kernels are shut down.
+        assert session.client.kernels.list() == []
+    finally:
+        sm.stop()
+    assert [s.name for s in stats] == ['complete', 'execute', 'inspect',
+                                       'all']
+    assert stats[-1].count == sum(s.count for s in stats[:-1]) > 0
+    assert stats[-1].errors == 0
+    assert stats[-1].p50_s <= stats[-1].p99_s <= stats[-1].max_s
+    report = kernelbench.format_report(stats).splitlines()
+    assert report[0].split()[:3] == ['request', 'count', 'errors']
+    assert len(report) == 5
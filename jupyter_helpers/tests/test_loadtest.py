@@ -0,0 +1,25 @@
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+
+pytest.importorskip('requests')
+
+
+def test_load_test(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    nbformat.write(nbformat.v4.new_notebook(), notebook_dir.joinpath('a.ipynb'))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        stats = session.load_test(clients=4, duration_s=1)
+    finally:
+        sm.stop()
+    assert [s.name for s in stats] == ['list', 'read', 'save', 'static',
+                                       'tree', 'all']
+    assert all(s.count > 0 for s in stats)
+    assert stats[-1].errors == 0
+    # Scratch notebooks are removed.
+    assert [p.name for p in notebook_dir.listdir()
+            if not p.name.startswith('.')] == ['a.ipynb']
@@ -0,0 +1,61 @@
+import time
+
+from path_helpers import path
+
+from jupyter_helpers.mirror import DirectoryMirror
+
+
+def test_directory_mirror(tmpdir):
+    source = path(str(tmpdir.mkdir('source')))
+    source.joinpath('a.txt').write_text('a')
+    source.joinpath('sub').makedirs_p()
+    source.joinpath('sub', 'b.txt').write_text('b')
+    mirror = DirectoryMirror(source, root=str(tmpdir.mkdir('mirrors')))
+    mirror.start()
+    try:
+        assert mirror.path.joinpath('sub', 'b.txt').text() == 'b'
+        assert mirror.sync() == (0, 0)
+
+        time.sleep(.01)
+        mirror.path.joinpath('a.txt').write_text('A')
+        mirror.path.joinpath('new').makedirs_p()
+        mirror.path.joinpath('new', 'c.txt').write_text('c')
+        mirror.path.joinpath('sub', 'b.txt').remove()
+        mirror.path.joinpath('sub').rmdir()
+        # Source is only modified on synchronization.
+        assert source.joinpath('a.txt').text() == 'a'
+        assert mirror.sync() == (2, 1)
+        assert source.joinpath('a.txt').text() == 'A'
+        assert source.joinpath('new', 'c.txt').text() == 'c'
+        assert not source.joinpath('sub').exists()
+        assert abs(source.joinpath('a.txt').mtime -
+                   mirror.path.joinpath('a.txt').mtime) < 1e-3
+
+        source.joinpath('d.txt').write_text('d')
+        mirror.pull([source.joinpath('d.txt')])
+        assert mirror.path.joinpath('d.txt').text() == 'd'
+        assert mirror.sync() == (0, 0)
+
+        mirror.path.joinpath('d.txt').write_text('D')
+    finally:
+        mirror_path = mirror.path
+        mirror.stop()
+    # Changes are synchronized when stopped, and mirror is removed.
+    assert source.joinpath('d.txt').text() == 'D'
+    assert not mirror_path.exists()
+
+
+def test_directory_mirror_background(tmpdir):
+    source = path(str(tmpdir.mkdir('source')))
+    mirror = DirectoryMirror(source, root=str(tmpdir.mkdir('mirrors')),
+                             sync_interval_s=.05)
+    mirror.start()
+    try:
+        mirror.path.joinpath('a.txt').write_text('a')
+        for i in range(40):
+            if source.joinpath('a.txt').exists():
+                break
+            time.sleep(.05)
+        assert source.joinpath('a.txt').text() == 'a'
+    finally:
+        mirror.stop()
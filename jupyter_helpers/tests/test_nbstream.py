@@ -0,0 +1,141 @@
+# coding: utf-8
+import base64
+import io
+import os
+
+import nbformat
+import pytest
+
+from jupyter_helpers import nbstream
+
+
+def _notebook(cells):
+    notebook = nbformat.v4.new_notebook(cells=cells)
+    return nbformat.writes(notebook)
+
+
+def _inject(text, parameters, **kwargs):
+    output = io.StringIO()
+    nbstream.ParameterInjector(io.StringIO(text), output, parameters,
+                               **kwargs).run()
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, nbstream.CHUNK_SIZE])
+def test_inject_parameters(chunk_size):
+    image = 'A' * 1000
+    cells = [nbformat.v4.new_code_cell('x = 1', outputs=[
+                 nbformat.v4.new_output('display_data',
+                                        data={'image/png': image})]),
+             nbformat.v4.new_code_cell('sample = None',
+                                       metadata={'tags': ['parameters']}),
+             nbformat.v4.new_markdown_cell(u'µ "quoted" \\\n\n  indented')]
+    text = _notebook(cells)
+    result = _inject(text, {'sample': 'S1', 'n': 3}, chunk_size=chunk_size,
+                     max_cell_chars=500)
+    notebook = nbformat.reads(result, as_version=4)
+    nbformat.validate(notebook)
+    assert [c.source for c in notebook.cells] == \
+        ['x = 1', 'sample = None', "n = 3\nsample = 'S1'",
+         u'µ "quoted" \\\n\n  indented']
+    assert notebook.cells[2].metadata.tags == ['injected-parameters']
+    # Formatting of all other cells is unchanged.
+    split = text.index('{\n   "cell_type": "markdown"')
+    assert result.startswith(text[:split])
+    assert result.endswith(text[split:])
+    assert result[:-len(text) + split].endswith('},\n  ')
+
+    # Injecting again replaces previously injected parameters.
+    again = nbformat.reads(_inject(result, {'sample': 'S2'}), as_version=4)
+    assert [c.source for c in again.cells][1:3] == \
+        ['sample = None', "sample = 'S2'"]
+    assert len(again.cells) == 4
+
+
+def test_inject_parameters_last_cell():
+    text = _notebook([nbformat.v4.new_code_cell('a = 0', metadata={
+        'tags': ['parameters']})])
+    notebook = nbformat.reads(_inject(text, {'a': 1.5}), as_version=4)
+    assert [c.source for c in notebook.cells] == ['a = 0', 'a = 1.5']
+
+
+def test_inject_parameters_executable():
+    from collections import namedtuple
+    from path_helpers import path
+
+    Point = namedtuple('Point', 'x y')
+    text = _notebook([nbformat.v4.new_code_cell('a = 0', metadata={
+        'tags': ['parameters']})])
+    parameters = {'data_path': path('/tmp/x'), 'names': [path(u'a'), u'µ'],
+                  'point': Point(1, 2.5), 'options': {'flag': True,
+                                                      'value': None}}
+    notebook = nbformat.reads(_inject(text, parameters), as_version=4)
+    namespace = {}
+    exec(notebook.cells[1].source, namespace)
+    for name, value in parameters.items():
+        assert namespace[name] == value
+    assert type(namespace['data_path']) == type('')
+    assert type(namespace['point']) == tuple
+
+
+@pytest.mark.parametrize('value', [float('nan'), object(), set([1])])
+def test_inject_parameters_invalid(value):
+    text = _notebook([nbformat.v4.new_code_cell('a = 0', metadata={
+        'tags': ['parameters']})])
+    with pytest.raises(ValueError):
+        _inject(text, {'a': value})
+
+
+def test_parameters_source():
+    assert nbstream.parameters_source({}) == []
+    assert nbstream.parameters_source({'b': 1, 'a': 'x'}) == \
+        [u"a = 'x'\n", u'b = 1']
+
+
+def test_inject_parameters_untagged():
+    text = _notebook([nbformat.v4.new_code_cell('a = 0')])
+    with pytest.raises(ValueError):
+        _inject(text, {'a': 1})
+
+
+@pytest.mark.parametrize('chunk_size', [5, nbstream.CHUNK_SIZE])
+def test_output_stripper(tmpdir, chunk_size):
+    image = base64.b64encode(os.urandom(3000)).decode('ascii')
+    cells = [nbformat.v4.new_code_cell('x = 1', execution_count=1, outputs=[
+                 nbformat.v4.new_output('display_data',
+                                        data={'image/png': image}),
+                 nbformat.v4.new_output('stream', text='small')]),
+             nbformat.v4.new_markdown_cell(
+                 '![a](attachment:a.png) ![b](attachment:b.png)',
+                 attachments={'a.png': {'image/png': image},
+                              'b.png': {'image/png': 'AAAA'}})]
+    text = _notebook(cells)
+    attachments_dir = str(tmpdir.join('output_files'))
+
+    def strip(**kwargs):
+        output = io.StringIO()
+        stripper = nbstream.OutputStripper(io.StringIO(text), output,
+                                           attachments_dir=attachments_dir,
+                                           chunk_size=chunk_size, **kwargs)
+        stripper.run()
+        notebook = nbformat.reads(output.getvalue(), as_version=4)
+        nbformat.validate(notebook)
+        return notebook, stripper.stats
+
+    notebook, stats = strip(max_output_chars=1000, max_attachment_chars=1000)
+    outputs = notebook.cells[0].outputs
+    assert outputs[0].text.startswith('[Output removed:')
+    assert outputs[1].text == 'small'
+    assert stats['outputs_removed'] == 1
+    assert notebook.cells[1].source == \
+        '![a](output_files/1-a.png) ![b](attachment:b.png)'
+    assert list(notebook.cells[1].attachments) == ['b.png']
+    assert stats['attachments'] == [os.path.join(attachments_dir, '1-a.png')]
+    with open(stats['attachments'][0], 'rb') as input_:
+        assert input_.read() == base64.b64decode(image)
+
+    notebook, stats = strip(max_output_chars=0)
+    assert notebook.cells[0].outputs == []
+    assert notebook.cells[0].execution_count is None
+    assert stats['outputs_removed'] == 2
+    assert sorted(notebook.cells[1].attachments) == ['a.png', 'b.png']
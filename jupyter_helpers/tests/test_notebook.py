@@ -1,5 +1,221 @@
+import sys
+
+from path_helpers import path
+import pytest
+
 from jupyter_helpers import notebook
 
 def test_get_session():
     sm = notebook.SessionManager()
     sm.get_session()
+
+
+def test_start_notebook_dir(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    session = notebook.Session(daemon=True, no_browser=None,
+                               notebook_dir=notebook_dir)
+    session.start()
+    try:
+        # Parsed from server output (without trailing newline).
+        assert session.notebook_dir == notebook_dir
+        assert session.notebook_dir.isdir()
+    finally:
+        session.stop()
+
+
+def test_get_session_zygote():
+    sm = notebook.SessionManager(zygote=True)
+    session = sm.get_session()
+    assert session.is_alive()
+    sm.stop()
+
+
+def test_get_session_in_process():
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session()
+    assert session.is_alive()
+    assert session.port
+    sm.stop()
+    assert not session.is_alive()
+
+
+@pytest.mark.parametrize('option', [{'zygote': True},
+                                    {'importtime': True},
+                                    {'profile': 'lean'},
+                                    {'kernel_zygote': True}])
+def test_get_session_in_process_unsupported(option):
+    sm = notebook.SessionManager(in_process=True)
+    try:
+        with pytest.raises(ValueError):
+            sm.get_session(**option)
+    finally:
+        sm.stop()
+
+
+def test_start_in_process_port_in_use():
+    from jupyter_helpers.inprocess import InProcessSession
+
+    session = InProcessSession(daemon=True, no_browser=None)
+    session.start()
+    try:
+        conflict = InProcessSession(daemon=True, no_browser=None,
+                                    port=session.port, port_retries=0)
+        with pytest.raises(notebook.NotebookStartupError) as exception:
+            conflict.start()
+        assert exception.value.reason == 'port_in_use'
+        assert not conflict.is_alive()
+
+        retry = InProcessSession(daemon=True, no_browser=None, retries=1,
+                                 port=session.port, port_retries=0)
+        retry.start()
+        assert retry.is_alive()
+        assert retry.port != session.port
+        retry.stop()
+    finally:
+        session.stop()
+
+
+def test_get_session_lean_profile():
+    sm = notebook.SessionManager(profile='lean')
+    session = sm.get_session()
+    assert session.is_alive()
+    assert session.startup_duration_s > 0
+    sm.stop()
+
+
+def test_start_port_in_use():
+    session = notebook.Session(daemon=True, no_browser=None)
+    session.start()
+    try:
+        conflict = notebook.Session(daemon=True, no_browser=None,
+                                    port=session.port, port_retries=0)
+        try:
+            conflict.start()
+        except notebook.NotebookStartupError as exception:
+            assert exception.reason == 'port_in_use'
+        else:
+            raise AssertionError('Port conflict not detected.')
+
+        retry = notebook.Session(daemon=True, no_browser=None, retries=1,
+                                 port=session.port, port_retries=0)
+        retry.start()
+        assert retry.port != session.port
+        retry.stop()
+    finally:
+        session.stop()
+
+
+def test_launch_from_templates(tmpdir):
+    template_path = path(str(tmpdir.mkdir('templates').join('t.ipynb')))
+    template_path.write_text('{"cells": [], "metadata": {}, "nbformat": 4, '
+                             '"nbformat_minor": 2}')
+    notebook_dir = path(str(tmpdir.join('notebooks')))
+    sm = notebook.SessionManager()
+    session = sm.launch_from_templates([(template_path, 'sample-%d.ipynb' % i)
+                                       for i in range(10)],
+                                      notebook_dir=notebook_dir,
+                                      create_dir=True, no_browser=True)
+    assert session.is_alive()
+    assert len(notebook_dir.files('*.ipynb')) == 10
+    sm.stop()
+
+
+def test_get_session_mirror(tmpdir):
+    notebook_dir = path(str(tmpdir.mkdir('notebooks')))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir, mirror=str(tmpdir),
+                             sync_interval_s=None)
+    assert session.source_dir == notebook_dir
+    assert session.notebook_dir != notebook_dir
+    assert sm.get_session(notebook_dir=notebook_dir) is session
+    session.resource_filename('a.txt').write_text('a')
+    sm.stop()
+    assert notebook_dir.joinpath('a.txt').text() == 'a'
+    assert session.mirror is None
+
+
+def test_launch_from_template_mirror(tmpdir):
+    template_path = path(str(tmpdir.mkdir('templates').join('a.ipynb')))
+    template_path.write_text('{"cells": [], "metadata": {}, "nbformat": 4, '
+                             '"nbformat_minor": 2}')
+    notebook_dir = path(str(tmpdir.mkdir('notebooks')))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir,
+                             mirror=str(tmpdir.mkdir('mirrors')),
+                             sync_interval_s=None)
+    # Notebook created in mirror, but not yet synchronized.
+    session.resource_filename('a.ipynb').write_text('edited')
+    try:
+        with pytest.raises(IOError):
+            sm.launch_from_template(template_path, notebook_dir=notebook_dir,
+                                    no_browser=True)
+        with pytest.raises(IOError):
+            sm.launch_from_templates([(template_path, 'a.ipynb')],
+                                     notebook_dir=notebook_dir,
+                                     no_browser=True)
+        assert session.resource_filename('a.ipynb').text() == 'edited'
+    finally:
+        sm.stop()
+    assert notebook_dir.joinpath('a.ipynb').text() == 'edited'
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason='inotify is only supported on Linux.')
+def test_get_session_watch(tmpdir):
+    import time
+
+    notebook_dir = path(str(tmpdir))
+    template_path = notebook_dir.joinpath('templates', 'a.ipynb')
+    template_path.parent.makedirs_p()
+    template_path.write_text('{"cells": [], "metadata": {}, "nbformat": 4, '
+                             '"nbformat_minor": 2}')
+    sm = notebook.SessionManager(in_process=True, watch=True)
+    session = sm.get_session(notebook_dir=notebook_dir)
+    try:
+        session.convert_all()
+        converter, = session._converters.values()
+        assert converter.invalidate in session.watcher.subscribers
+
+        sm.template_cache.get(template_path)
+        template_path.write_text(template_path.text().replace('2', '3'))
+        # Changed templates in notebook directory are dropped from cache.
+        for i in range(50):
+            if not len(sm.template_cache):
+                break
+            time.sleep(.1)
+        assert len(sm.template_cache) == 0
+    finally:
+        sm.stop()
+
+
+def test_start_broken_server_extension(tmpdir):
+    import json
+    import os
+    import time
+
+    # Server keeps running if a server extension fails to load (which is
+    # logged with a traceback), even if it takes a while to start.
+    config_dir = path(str(tmpdir.mkdir('config')))
+    config_dir.joinpath('jupyter_notebook_config.json').write_text(json.dumps(
+        {'NotebookApp': {'nbserver_extensions': {'missing_extension': True,
+                                                 'slow_extension': True}}}))
+    modules_dir = path(str(tmpdir.mkdir('modules')))
+    modules_dir.joinpath('slow_extension.py').write_text(
+        'import time\n\n\n'
+        'def load_jupyter_server_extension(app):\n'
+        '    time.sleep(1)\n')
+    env = dict(os.environ, JUPYTER_CONFIG_DIR=config_dir,
+               PYTHONPATH=os.pathsep.join([modules_dir] +
+                                          [p for p in
+                                           [os.environ.get('PYTHONPATH')]
+                                           if p]))
+    session = notebook.Session(daemon=True, no_browser=None, allow_root=None)
+    start = time.time()
+    session.start(env=env)
+    try:
+        assert session.is_alive()
+        assert time.time() - start > 1
+        assert any('missing_extension' in line
+                   for line in session.stderr_lines)
+    finally:
+        session.stop()
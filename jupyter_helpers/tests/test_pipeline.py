@@ -0,0 +1,62 @@
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+from jupyter_helpers.pipeline import PipelineError, topological_order
+
+pytest.importorskip('requests')
+
+
+def test_topological_order():
+    assert topological_order({'a': ['b'], 'b': []}) == ['b', 'a']
+    with pytest.raises(ValueError):
+        topological_order({'a': ['b'], 'b': ['a']})
+    with pytest.raises(ValueError):
+        topological_order({'a': ['c']})
+
+
+def test_run_pipeline(tmpdir):
+    templates = path(str(tmpdir.mkdir('templates')))
+    for name, source in (('write', 'open(name, "w").write(name)'),
+                         ('read', 'assert open(name).read() == name'),
+                         ('fail', '1 / 0')):
+        nbformat.write(nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_code_cell('name = None',
+                                      metadata={'tags': ['parameters']}),
+            nbformat.v4.new_code_cell(source)]),
+            templates.joinpath('%s.ipynb' % name))
+    nodes = [{'name': 'read-a', 'template_path': templates.joinpath('read.ipynb'),
+              'output_name': 'read-a.ipynb', 'parameters': {'name': 'a'},
+              'depends': ['write-a']},
+             {'name': 'write-a',
+              'template_path': templates.joinpath('write.ipynb'),
+              'output_name': 'write-a.ipynb', 'parameters': {'name': 'a'}},
+             {'name': 'write-b',
+              'template_path': templates.joinpath('write.ipynb'),
+              'output_name': 'write-b.ipynb', 'parameters': {'name': 'b'}},
+             {'name': 'fail', 'template_path': templates.joinpath('fail.ipynb'),
+              'depends': ['write-b']},
+             {'name': 'after-fail',
+              'template_path': templates.joinpath('read.ipynb'),
+              'output_name': 'after-fail.ipynb', 'parameters': {'name': 'b'},
+              'depends': ['fail']}]
+    notebook_dir = path(str(tmpdir.join('notebooks')))
+    events = []
+    sm = notebook.SessionManager(in_process=True)
+    try:
+        with pytest.raises(PipelineError) as exception:
+            sm.run_pipeline(nodes, notebook_dir=notebook_dir, create_dir=True,
+                            workers=2, callback=lambda name, result:
+                            events.append((name, result['status'])))
+    finally:
+        sm.stop()
+    results = exception.value.results
+    assert list(results) == ['write-a', 'write-b', 'read-a', 'fail',
+                             'after-fail']
+    assert [r['status'] for r in results.values()] == \
+        ['ok', 'ok', 'ok', 'error', 'skipped']
+    assert 'ZeroDivisionError' in results['fail']['error']
+    assert events.index(('write-a', 'ok')) < events.index(('read-a',
+                                                           'running'))
+    assert notebook_dir.joinpath('b').text() == 'b'
@@ -0,0 +1,48 @@
+import time
+
+import nbformat
+import pytest
+from path_helpers import path
+
+from jupyter_helpers import notebook
+
+pytest.importorskip('requests')
+
+
+def _wait(condition, timeout_s=60):
+    start = time.time()
+    while not condition():
+        assert time.time() - start < timeout_s
+        time.sleep(.05)
+
+
+def test_kernel_pool(tmpdir):
+    notebook_dir = path(str(tmpdir))
+    notebook_dir.joinpath('sub').makedirs_p()
+    cells = [nbformat.v4.new_code_cell('import os\n'
+                                       'print(os.path.basename(os.getcwd()))'),
+             nbformat.v4.new_code_cell('print(preloaded)')]
+    nbformat.write(nbformat.v4.new_notebook(cells=cells),
+                   notebook_dir.joinpath('sub', 'a.ipynb'))
+    sm = notebook.SessionManager(in_process=True)
+    session = sm.get_session(notebook_dir=notebook_dir,
+                             kernel_pool={'size': 1,
+                                          'preload': 'preloaded = 42'})
+    try:
+        pool = session.kernel_pool
+        _wait(lambda: pool.idle() == 1)
+        kernel_id = pool._idle[pool.default_kernel_name][0][0]
+
+        statuses = session.execute('sub/a.ipynb')
+        assert [s['status'] for s in statuses] == ['ok', 'ok']
+        result = nbformat.read(notebook_dir.joinpath('sub', 'a.ipynb'),
+                               as_version=4)
+        assert [c.outputs[0].text for c in result.cells] == ['sub\n', '42\n']
+
+        # Pool is refilled with a new kernel.
+        _wait(lambda: pool.idle() == 1)
+        assert [k['id'] for k in session.client.kernels.list()] != \
+            [kernel_id]
+    finally:
+        sm.stop()
+    assert session.kernel_pool is None
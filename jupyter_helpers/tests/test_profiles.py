@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from jupyter_helpers import profiles
+
+
+def test_lean_profile_disables_extensions(tmpdir, monkeypatch):
+    system_dir = tmpdir.mkdir('system')
+    system_dir.mkdir('jupyter_notebook_config.d').join('package.json')\
+        .write(json.dumps({'NotebookApp': {'nbserver_extensions':
+                                           {'package_extension': True,
+                                            'allowed_extension': True}}}))
+    system_dir.join('jupyter_notebook_config.json')\
+        .write(json.dumps({'NotebookApp': {'nbserver_extensions':
+                                           {'system_extension': True}}}))
+    monkeypatch.setenv('JUPYTER_CONFIG_DIR', str(tmpdir.mkdir('user')))
+    monkeypatch.setenv('JUPYTER_CONFIG_PATH', str(system_dir))
+
+    profile = profiles.LeanProfile(nbserver_extensions=['allowed_extension'],
+                                   config_dir=str(tmpdir.join('lean')))
+    config = json.loads(profile.config_dir
+                        .joinpath('jupyter_notebook_config.json').text())
+    extensions = config['NotebookApp']['nbserver_extensions']
+    assert extensions['package_extension'] is False
+    assert extensions['system_extension'] is False
+    assert extensions['allowed_extension'] is True
+
+
+def test_compare_startup_repeat():
+    with pytest.raises(ValueError):
+        profiles.compare_startup(repeat=0)
@@ -0,0 +1,62 @@
+import time
+
+import nbformat
+from path_helpers import path
+
+from jupyter_helpers.index import NotebookIndex
+from jupyter_helpers.search import SearchIndex, terms
+
+
+def _write(notebook_path, *sources, **kwargs):
+    notebook = nbformat.v4.new_notebook(cells=[
+        nbformat.v4.new_code_cell(source, outputs=kwargs.get('outputs', []))
+        for source in sources])
+    notebook_path.parent.makedirs_p()
+    nbformat.write(notebook, notebook_path)
+
+
+def test_terms():
+    assert terms(u'Load_Sample(id=3); load_sample') == \
+        set([u'load_sample', u'id', u'3'])
+
+
+def test_search_index(tmpdir):
+    root = path(str(tmpdir.join('notebooks')))
+    _write(root.joinpath('a.ipynb'), 'sample = load(1)', 'plot(sample)')
+    _write(root.joinpath('sub', 'b.ipynb'), 'samples = load(2)', 'plot(x)')
+    _write(root.joinpath('c.ipynb'), 'x = 1', outputs=[
+        nbformat.v4.new_output('stream', text='droplet count')])
+    notebooks = NotebookIndex(root)
+    index = SearchIndex(root, db_path=str(tmpdir.join('index.sqlite')),
+                        outputs=True)
+    try:
+        assert index.update(notebooks.under(root)) == 3
+        assert index.update(notebooks.under(root)) == 0
+        assert index.search('sample') == [root.joinpath('a.ipynb')]
+        # Ranked by number of matching cells.
+        assert index.search('Samp* LOAD') == [root.joinpath('a.ipynb'),
+                                              root.joinpath('sub', 'b.ipynb')]
+        assert index.search('plot', limit=1) == [root.joinpath('a.ipynb')]
+        assert index.search('droplet') == [root.joinpath('c.ipynb')]
+        assert index.search('droplet', outputs=False) == []
+        assert index.search('sample missing') == []
+
+        # Only modified and removed notebooks are indexed again.
+        time.sleep(.01)
+        _write(root.joinpath('sub', 'b.ipynb'), 'sample = 3')
+        root.joinpath('a.ipynb').remove()
+        notebooks.refresh()
+        assert index.update(notebooks.under(root)) == 2
+        assert index.search('sample') == [root.joinpath('sub', 'b.ipynb')]
+        assert index.search('plot') == []
+    finally:
+        index.close()
+
+    # Index persists across instances.
+    index = SearchIndex(root, db_path=str(tmpdir.join('index.sqlite')),
+                        outputs=True)
+    try:
+        assert index.update(notebooks.under(root)) == 0
+        assert index.search('droplet') == [root.joinpath('c.ipynb')]
+    finally:
+        index.close()
@@ -0,0 +1,121 @@
+import json
+
+from path_helpers import path
+import pytest
+
+from jupyter_helpers import templates
+
+
+NOTEBOOK = {'cells': [{'cell_type': 'code', 'execution_count': None,
+                       'metadata': {}, 'outputs': [],
+                       'source': ['x = 1']}],
+            'metadata': {}, 'nbformat': 4, 'nbformat_minor': 2}
+
+
+@pytest.fixture
+def template(tmpdir):
+    template_path = path(str(tmpdir.join('template.ipynb')))
+    template_path.write_text(json.dumps(NOTEBOOK, indent=1, sort_keys=True))
+    return template_path
+
+
+@pytest.mark.parametrize('strategy', ['auto', 'copy', 'hardlink'])
+def test_copy_file(template, strategy):
+    output_path = template.parent.joinpath('output.ipynb')
+    output_path.write_text('existing')
+    used = templates.copy_file(template, output_path, strategy=strategy)
+    assert used in templates.COPY_STRATEGIES + ('hardlink', )
+    assert output_path.bytes() == template.bytes()
+    assert sorted(template.parent.files()) == [output_path, template]
+
+
+def test_copy_file_cache(template):
+    cache = templates.TemplateCache()
+    output_path = template.parent.joinpath('output.ipynb')
+    # Linked files are not read through the cache.
+    templates.copy_file(template, output_path, strategy='hardlink',
+                        cache=cache)
+    assert len(cache) == 0
+    templates.copy_file(template, output_path, strategy='copy', cache=cache)
+    assert len(cache) == 1
+    assert output_path.bytes() == template.bytes()
+
+
+def test_template_cache(template):
+    cache = templates.TemplateCache(max_bytes=2 * (template.size + 1))
+    entry = cache.get(template)
+    assert cache.get(template) is entry
+    assert entry.data == template.bytes()
+    assert entry.error is None
+
+    # Modified template is read again.
+    template.write_text(template.text() + '\n')
+    assert cache.get(template) is not entry
+    assert len(cache) == 1
+
+    # Least recently used template is evicted.
+    other = template.parent.joinpath('other.ipynb')
+    template.copy(other)
+    other_2 = template.parent.joinpath('other_2.ipynb')
+    template.copy(other_2)
+    cache.get(other)
+    cache.get(other_2)
+    assert len(cache) == 2
+    assert cache.size <= cache.max_bytes
+
+
+def test_instantiate_template_invalid(template):
+    cache = templates.TemplateCache()
+    output_path = template.parent.joinpath('output.ipynb')
+    notebook = json.loads(template.text())
+    notebook['cells'] = 1
+    template.write_text(json.dumps(notebook))
+    for i in range(2):
+        # Invalid template is rejected on every instantiation (validated once).
+        with pytest.raises(ValueError):
+            templates.instantiate_template(template, output_path, cache=cache)
+        assert len(cache) == 1
+    assert not output_path.exists()
+
+    template.write_text('not a notebook')
+    with pytest.raises(ValueError):
+        templates.instantiate_template(template, output_path, cache=cache,
+                                       max_output_chars=0)
+    assert not output_path.exists()
+
+
+def test_instantiate_template_parameters(template):
+    output_path = template.parent.joinpath('output.ipynb')
+    with pytest.raises(ValueError):
+        # Template has no cell tagged `parameters`.
+        templates.instantiate_template(template, output_path,
+                                       parameters={'x': 2})
+    assert sorted(template.parent.files()) == [template]
+
+    notebook = json.loads(template.text())
+    notebook['cells'][0]['metadata']['tags'] = ['parameters']
+    template.write_text(json.dumps(notebook, indent=1, sort_keys=True))
+    cache = templates.TemplateCache()
+    report = templates.instantiate_template(template, output_path,
+                                            cache=cache, parameters={'x': 2},
+                                            max_output_chars=0)
+    assert len(cache) == 1
+    assert report['strategy'] == 'rewrite'
+    assert report['template_bytes'] == template.size
+    assert report['outputs_removed'] == 0
+    cells = json.loads(output_path.text())['cells']
+    assert [c['source'] for c in cells] == [['x = 1'], ['x = 2']]
+
+
+def test_template_cache_invalidate(template):
+    cache = templates.TemplateCache()
+    other = template.parent.joinpath('sub', 'other.ipynb')
+    other.parent.makedirs_p()
+    template.copy(other)
+    cache.get(template)
+    cache.get(other)
+    cache.invalidate([other.parent])
+    assert len(cache) == 1
+    assert cache.size == template.size
+    cache.invalidate([template])
+    assert len(cache) == 0
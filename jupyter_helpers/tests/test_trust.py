@@ -0,0 +1,26 @@
+import nbformat
+from nbformat.sign import NotebookNotary
+
+from jupyter_helpers.trust import sign_notebooks
+
+
+def test_sign_notebooks(tmpdir):
+    notary = NotebookNotary(data_dir=str(tmpdir), secret=b'secret')
+    notebook_paths = []
+    for i in range(3):
+        notebook = nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_code_cell('x = %d' % i)])
+        notebook_path = str(tmpdir.join('%d.ipynb' % i))
+        nbformat.write(notebook, notebook_path)
+        notebook_paths.append(notebook_path)
+
+    signatures = sign_notebooks(notebook_paths, notary=notary)
+    assert len(set(signatures)) == 3
+    for notebook_path in notebook_paths:
+        notebook = nbformat.read(notebook_path, as_version=4)
+        assert notary.check_signature(notebook)
+    # Signing again only updates existing signatures.
+    sign_notebooks(notebook_paths, notary=notary)
+    count, = notary.store.db.execute('SELECT Count(*) FROM nbsignatures')\
+        .fetchone()
+    assert count == 3
@@ -0,0 +1,97 @@
+import sys
+import threading
+
+from path_helpers import path
+import pytest
+
+from jupyter_helpers.watch import DirectoryWatcher
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason='inotify is only supported on Linux.')
+def test_directory_watcher(tmpdir):
+    root = path(str(tmpdir))
+    root.joinpath('sub').makedirs_p()
+    batches = []
+    notified = threading.Event()
+
+    def callback(paths):
+        batches.append(paths)
+        notified.set()
+
+    watcher = DirectoryWatcher(root, latency_s=.2)
+    watcher.subscribe(callback)
+    watcher.start()
+    try:
+        for i in range(3):
+            root.joinpath('sub', 'a.ipynb').write_text('{}' * (i + 1))
+        root.joinpath('.hidden').write_text('ignored')
+        root.joinpath('new').makedirs_p()
+        assert notified.wait(5)
+        notified.clear()
+        # Events are coalesced into a single batch of distinct paths.
+        assert batches == [[root.joinpath('new'),
+                            root.joinpath('sub', 'a.ipynb')]]
+
+        # New directories are watched.
+        root.joinpath('new', 'b.ipynb').write_text('{}')
+        assert notified.wait(5)
+        assert batches[-1] == [root.joinpath('new', 'b.ipynb')]
+    finally:
+        watcher.stop()
+    assert not watcher.is_alive()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason='inotify is only supported on Linux.')
+def test_directory_watcher_move(tmpdir):
+    root = path(str(tmpdir.mkdir('root')))
+    root.joinpath('sub', 'deep').makedirs_p()
+    outside = path(str(tmpdir.mkdir('outside')))
+    batches = []
+    notified = threading.Event()
+
+    def callback(paths):
+        batches.append(paths)
+        notified.set()
+
+    watcher = DirectoryWatcher(root, latency_s=.2)
+    watcher.subscribe(callback)
+    watcher.start()
+    try:
+        root.joinpath('sub').rename(root.joinpath('renamed'))
+        assert notified.wait(5)
+        notified.clear()
+        assert batches[-1] == [root.joinpath('renamed'),
+                               root.joinpath('renamed', 'deep'),
+                               root.joinpath('sub')]
+
+        # Contents of directories moved into tree are reported (e.g., files
+        # created before the directory was watched).
+        tree = outside.joinpath('tree')
+        tree.joinpath('deep').makedirs_p()
+        tree.joinpath('deep', 'x.ipynb').write_text('{}')
+        tree.rename(root.joinpath('tree'))
+        assert notified.wait(5)
+        notified.clear()
+        assert batches[-1] == [root.joinpath('tree'),
+                               root.joinpath('tree', 'deep'),
+                               root.joinpath('tree', 'deep', 'x.ipynb')]
+
+        # Changes in renamed directory are reported under its new path.
+        root.joinpath('renamed', 'deep', 'a.ipynb').write_text('{}')
+        assert notified.wait(5)
+        notified.clear()
+        assert batches[-1] == [root.joinpath('renamed', 'deep', 'a.ipynb')]
+
+        # Directories moved out of tree are no longer watched.
+        root.joinpath('renamed').rename(outside.joinpath('moved'))
+        assert notified.wait(5)
+        notified.clear()
+        assert batches[-1] == [root.joinpath('renamed')]
+        outside.joinpath('moved', 'deep', 'b.ipynb').write_text('{}')
+        root.joinpath('c.ipynb').write_text('{}')
+        assert notified.wait(5)
+        assert batches[-1] == [root.joinpath('c.ipynb')]
+    finally:
+        watcher.stop()
@@ -0,0 +1,81 @@
+# coding: utf-8
+'''
+Notebook trust, i.e., signatures of notebooks stored in the signature database
+of the notebook server.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from datetime import datetime
+
+
+def get_notary():
+    '''
+    Returns
+    -------
+    nbformat.sign.NotebookNotary
+        Notary using the signature database and secret of notebook servers
+        launched with the current Jupyter config (e.g., respecting
+        ``NotebookNotary.db_file`` set in ``jupyter_notebook_config.py``).
+    '''
+    from nbformat.sign import NotebookNotary
+    from traitlets.config.loader import Config
+
+    from .profiles import discover_config
+
+    server_config, frontend_config = discover_config()
+    return NotebookNotary(config=Config(server_config))
+
+
+def sign_notebooks(notebook_paths, notary=None):
+    '''
+    Mark notebooks as trusted, i.e., as if signed by the user.
+
+    Signatures are stored in a single database transaction, rather than one
+    transaction per notebook (as done by ``NotebookNotary.sign``).
+
+    Parameters
+    ----------
+    notebook_paths : list
+        Paths of notebooks to sign.
+    notary : nbformat.sign.NotebookNotary, optional
+        Notary to sign notebooks with (default: :func:`get_notary`).
+
+    Returns
+    -------
+    list
+        Signature of each notebook.
+    '''
+    import nbformat
+
+    if notary is None:
+        notary = get_notary()
+    # Notebooks are signed as read by the notebook server contents manager.
+    signatures = [notary.compute_signature(nbformat.read(notebook_path,
+                                                         as_version=4))
+                  for notebook_path in notebook_paths]
+
+    store = notary.store
+    db = getattr(store, 'db', None)
+    if db is None:
+        # Signature store is not an SQLite database.
+        for signature in signatures:
+            store.store_signature(signature, notary.algorithm)
+        return signatures
+
+    now = datetime.utcnow()
+    with db:
+        # Commit on success, roll back on error.
+        for signature in set(signatures):
+            cursor = db.execute('UPDATE nbsignatures SET last_seen = ? WHERE '
+                                'algorithm = ? AND signature = ?',
+                                (now, notary.algorithm, signature))
+            if cursor.rowcount == 0:
+                db.execute('INSERT INTO nbsignatures (algorithm, signature, '
+                           'last_seen) VALUES (?, ?, ?)',
+                           (notary.algorithm, signature, now))
+    count, = db.execute('SELECT Count(*) FROM nbsignatures').fetchone()
+    if count > store.cache_size:
+        with db:
+            store.cull_db()
+    return signatures
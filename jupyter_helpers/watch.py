@@ -0,0 +1,322 @@
+# coding: utf-8
+'''
+Push-based notification of changes in a directory tree, using the Linux
+``inotify`` API (through ``ctypes``, i.e., without additional dependencies).
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from threading import Lock, Thread
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from path_helpers import path
+
+
+logger = logging.getLogger(__name__)
+
+# See `inotify(7)`.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+#: Events reported for watched directories.
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF |
+              IN_ONLYDIR)
+
+_EVENT = struct.Struct('iIII')
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOTSUP, 'inotify is not supported on %s.' %
+                      sys.platform)
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                           ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def _check(result, message):
+    if result < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, '%s: %s' % (message, os.strerror(error)))
+    return result
+
+
+def _encode(name):
+    if isinstance(name, bytes):
+        return name
+    elif sys.version_info[0] < 3:
+        return name.encode(sys.getfilesystemencoding())
+    return name.encode(sys.getfilesystemencoding(), 'surrogateescape')
+
+
+def _decode(name):
+    if sys.version_info[0] < 3:
+        return name
+    return name.decode(sys.getfilesystemencoding(), 'surrogateescape')
+
+
+class DirectoryWatcher(object):
+    '''
+    Watch a directory tree for changes and notify subscribers with batches of
+    changed paths.
+
+    Events are coalesced: once a change is detected, events are collected
+    until ``latency_s`` has passed, and each subscriber is then called once
+    with the sorted list of distinct paths created, modified, moved or
+    removed in the meantime.  If the kernel event queue overflows (i.e.,
+    changes may have been missed) or the root directory is moved, subscribers
+    are called with ``None`` instead.
+
+    Hidden files and directories (i.e., names starting with ``.``, such as
+    ``.ipynb_checkpoints``) are ignored.
+
+    Only supported on Linux.
+
+    Parameters
+    ----------
+    root : str
+        Root directory of tree to watch.
+    latency_s : float, optional
+        Time to collect events for before notifying subscribers.
+
+    Example
+    -------
+
+        >>> watcher = DirectoryWatcher(notebook_dir)
+        >>> watcher.subscribe(notebook_index.update_paths)
+        >>> watcher.start()
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, root, latency_s=.1):
+        self.root = path(root).abspath()
+        self.latency_s = latency_s
+        self.subscribers = []
+        self.thread = None
+        self._fd = None
+        self._stop_pipe = None
+        # Watched directory path, by watch descriptor.
+        self._watches = {}
+        self._lock = Lock()
+
+    def subscribe(self, callback):
+        '''
+        Parameters
+        ----------
+        callback : function
+            Called (from the watcher thread) with a list of changed paths, or
+            ``None`` if changes may have been missed.
+        '''
+        with self._lock:
+            if callback not in self.subscribers:
+                self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        '''
+        Start watching directory tree in a background thread.
+
+        Raises
+        ------
+        OSError
+            If ``inotify`` is not supported, or if the number of watches would
+            exceed the limit of the user (see
+            ``/proc/sys/fs/inotify/max_user_watches``).
+        '''
+        if self.is_alive():
+            return
+        libc = _get_libc()
+        self._fd = _check(libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC),
+                          'Failed to initialize inotify')
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            os.close(self._fd)
+            self._fd = None
+            raise
+        self._stop_pipe = os.pipe()
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stop watching directory tree.
+        '''
+        if self.thread is None:
+            return
+        os.write(self._stop_pipe[1], b'x')
+        self.thread.join()
+        for fd in self._stop_pipe + (self._fd, ):
+            os.close(fd)
+        self.thread = None
+        self._stop_pipe = None
+        self._fd = None
+        self._watches.clear()
+
+    def _watch_tree(self, directory, changed=None):
+        '''
+        Add watches for directory and its (non-hidden) subdirectories.
+
+        If ``changed`` is specified, add the (non-hidden) files and
+        subdirectories found to it, since they may have been created (or
+        moved into the directory) before the directory was watched.
+        '''
+        libc = _get_libc()
+        for root, directories, files in os.walk(directory):
+            directories[:] = [d for d in directories if not d.startswith('.')]
+            if changed is not None:
+                changed.update(path(root).joinpath(name)
+                               for name in directories + files
+                               if not name.startswith('.'))
+            wd = libc.inotify_add_watch(self._fd, _encode(root), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    # Directory was removed in the meantime.
+                    continue
+                _check(wd, 'Failed to watch `%s`' % root)
+            self._watches[wd] = path(root)
+
+    def _unwatch_tree(self, directory):
+        '''
+        Remove watches of directory and its subdirectories, e.g., once moved
+        (watches follow moved directories, so events would otherwise be
+        reported under their previous paths).
+        '''
+        libc = _get_libc()
+        prefix = directory.joinpath('')
+        for wd, watched in list(self._watches.items()):
+            if watched == directory or watched.startswith(prefix):
+                # Fails if watch was removed in the meantime (e.g., directory
+                # deleted), which is fine.
+                libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _read_events(self, changed):
+        '''
+        Read pending events, adding changed paths to ``changed``.
+
+        Returns
+        -------
+        bool
+            ``False`` if the event queue overflowed.
+        '''
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except OSError as exception:
+            if exception.errno == errno.EAGAIN:
+                return True
+            raise
+        complete = True
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                complete = False
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # Watch was removed (e.g., directory deleted).
+                del self._watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changed.add(directory)
+                if mask & IN_MOVE_SELF and directory == self.root:
+                    # Paths of all watches are stale.
+                    self._unwatch_tree(self.root)
+                    complete = False
+                continue
+            name = _decode(name.rstrip(b'\0'))
+            if not name or name.startswith('.'):
+                continue
+            changed_path = directory.joinpath(name)
+            changed.add(changed_path)
+            if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                # Directory was moved (within or out of tree), so stop watching
+                # it under its previous path.
+                self._unwatch_tree(changed_path)
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Watch new directory tree (also under new path of directory
+                # moved within tree).
+                self._watch_tree(changed_path, changed)
+        return complete
+
+    def _notify(self, paths):
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(paths)
+            except Exception:
+                logger.exception('Error notifying `%s` of changes in `%s`.',
+                                 callback, self.root)
+
+    def _run(self):
+        changed = set()
+        complete = True
+        deadline = None
+        while True:
+            timeout = (None if deadline is None
+                       else max(deadline - time.time(), 0))
+            ready, _, _ = select.select([self._fd, self._stop_pipe[0]], [], [],
+                                        timeout)
+            if self._stop_pipe[0] in ready:
+                break
+            if self._fd in ready:
+                try:
+                    complete &= self._read_events(changed)
+                except OSError:
+                    logger.exception('Error reading inotify events for `%s`.',
+                                     self.root)
+                    complete = False
+                if deadline is None and (changed or not complete):
+                    deadline = time.time() + self.latency_s
+            if deadline is not None and time.time() >= deadline:
+                self._notify(sorted(changed) if complete else None)
+                changed = set()
+                complete = True
+                deadline = None
@@ -0,0 +1,260 @@
+# coding: utf-8
+'''
+Zygote process for launching Jupyter notebook servers by forking a parent
+process which has already imported the notebook server modules.
+
+Launching ``python -m jupyter notebook`` spends most of its time importing
+``notebook``, ``tornado``, ``jinja2``, etc.  A :class:`NotebookZygote` keeps a
+single background interpreter with these modules imported and forks it to
+create each new notebook server, so each launch only pays for the server
+initialization itself.
+
+.. versionadded:: 0.12
+'''
+from __future__ import absolute_import
+from subprocess import Popen, PIPE
+from threading import Lock
+import fcntl
+import importlib
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import traceback
+
+import psutil
+
+from .notebook import package_env
+
+
+#: Modules imported by the zygote process before forking notebook servers.
+DEFAULT_MODULES = ('notebook.notebookapp', 'tornado.web', 'jinja2',
+                   'jupyter_client', 'nbformat')
+
+
+class ForkedProcess(psutil.Process):
+    '''
+    Handle to a process forked by the zygote, with a :class:`subprocess.Popen`
+    style :meth:`poll` method.
+    '''
+    def poll(self):
+        '''
+        Returns
+        -------
+        int or None
+            ``None`` if process is running, otherwise ``-1`` (the exit status
+            is only available to the zygote process).
+        '''
+        try:
+            if self.status() != psutil.STATUS_ZOMBIE:
+                return None
+        except psutil.NoSuchProcess:
+            pass
+        return -1
+
+
+class NotebookZygote(object):
+    '''
+    Handle to a background process which forks Jupyter notebook servers.
+
+    Only supported on POSIX platforms (requires :func:`os.fork`).
+
+    Parameters
+    ----------
+    modules : list, optional
+        Names of modules to import in zygote process before forking (default:
+        :data:`DEFAULT_MODULES`).
+
+    See also
+    --------
+    Session
+
+
+    .. versionadded:: 0.12
+    '''
+    def __init__(self, modules=DEFAULT_MODULES):
+        self.modules = tuple(modules)
+        self.process = None
+        self._lock = Lock()
+
+    def is_alive(self):
+        '''
+        Returns
+        -------
+        bool
+            ``True`` if zygote process is running.
+        '''
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        '''
+        Launch zygote process and wait until the modules have been imported.
+        '''
+        if not hasattr(os, 'fork'):
+            raise OSError('Forking notebook servers is only supported on POSIX '
+                          'platforms.')
+        if self.is_alive():
+            return
+
+        args = ((os.environ.get('PYTHONEXEPATH', sys.executable), '-m',
+                 'jupyter_helpers.zygote') + self.modules)
+        self.process = Popen(args, stdin=PIPE, stdout=PIPE, close_fds=True,
+                             env=package_env())
+        response = self.process.stdout.readline()
+        if response.strip() != b'ready':
+            self.stop()
+            raise RuntimeError('Zygote process failed to start: %r' % response)
+
+    def spawn(self, args, cwd=None, env=None):
+        '''
+        Fork a new notebook server from the zygote process.
+
+        Parameters
+        ----------
+        args : list
+            Command line arguments for notebook server, e.g., as returned by
+            :attr:`Session.args`.
+        cwd : str, optional
+            Working directory of notebook server (defaults to current working
+            directory).
+        env : dict, optional
+            Environment of notebook server (defaults to current environment).
+
+        Returns
+        -------
+        process : ForkedProcess
+            Handle to the forked notebook server process.
+        stderr : file
+            Combined ``stdout``/``stderr`` stream of notebook server process.
+        '''
+        with self._lock:
+            self.start()
+            fifo_dir = tempfile.mkdtemp(prefix='jupyter-zygote-')
+            try:
+                fifo_path = os.path.join(fifo_dir, 'stderr')
+                os.mkfifo(fifo_path)
+                # Open read end without blocking, since there is no writer yet.
+                fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+                request = {'args': list(args),
+                           'cwd': cwd or os.getcwd(),
+                           'env': dict(os.environ if env is None else env),
+                           'stderr': fifo_path}
+                self.process.stdin.write(json.dumps(request).encode('utf8') +
+                                         b'\n')
+                self.process.stdin.flush()
+                response = self.process.stdout.readline()
+            finally:
+                shutil.rmtree(fifo_dir, ignore_errors=True)
+        if not response:
+            os.close(fd)
+            raise RuntimeError('Zygote process exited unexpectedly.')
+        response = json.loads(response.decode('utf8'))
+        if 'error' in response:
+            os.close(fd)
+            raise RuntimeError('Zygote failed to fork notebook server: %s' %
+                               response['error'])
+        # The forked server now holds the write end of the FIFO, so switch to
+        # blocking reads (end of file is reached when the server exits).
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags & ~os.O_NONBLOCK)
+        return ForkedProcess(response['pid']), os.fdopen(fd, 'rb')
+
+    def stop(self):
+        '''
+        Stop zygote process (notebook servers forked from it keep running).
+        '''
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.stdin.close()
+                self.process.wait()
+            self.process = None
+
+    def __del__(self):
+        try:
+            self.stop()
+        except Exception:
+            pass
+
+
+def _fork_server(request):
+    '''
+    Fork a notebook server according to a request from
+    :meth:`NotebookZygote.spawn`.
+
+    Returns
+    -------
+    int
+        Process ID of forked notebook server.
+    '''
+    # Open write end in the parent so that the server holds it from the moment
+    # the fork returns.
+    fd = os.open(request['stderr'], os.O_WRONLY)
+    pid = os.fork()
+    if pid:
+        os.close(fd)
+        return pid
+
+    # Forked notebook server process.
+    code = 1
+    try:
+        os.setsid()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(devnull)
+        os.close(fd)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = ['jupyter-notebook'] + request['args']
+
+        from notebook.notebookapp import NotebookApp
+
+        NotebookApp.launch_instance(argv=request['args'])
+        code = 0
+    except SystemExit as exception:
+        if exception.code is None:
+            code = 0
+        elif isinstance(exception.code, int):
+            code = exception.code
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def main(modules):
+    '''
+    Zygote process main loop.
+
+    Import the specified modules, then fork a notebook server for each
+    JSON request line read from ``stdin``, replying with the process ID of the
+    forked server.  Exits when ``stdin`` is closed.
+    '''
+    for module_name in modules:
+        importlib.import_module(module_name)
+    # Forked servers are reaped automatically.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    sys.stdout.write('ready\n')
+    sys.stdout.flush()
+    for line in iter(sys.stdin.readline, ''):
+        if not line.strip():
+            continue
+        try:
+            response = {'pid': _fork_server(json.loads(line))}
+        except Exception as exception:
+            response = {'error': str(exception)}
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
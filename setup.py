@@ -15,5 +15,6 @@ setup(name='jupyter-helpers',
       author_email='christian@fobel.net',
       url='https://github.com/sci-bots/jupyter-helpers',
       license='BSD',
-      install_requires=['notebook', 'jupyter', 'path_helpers>=0.2', 'psutil'],
+      install_requires=['notebook', 'jupyter', 'path_helpers>=0.2', 'psutil',
+                        'requests', 'scandir; python_version < "3.5"'],
       packages=['jupyter_helpers'])